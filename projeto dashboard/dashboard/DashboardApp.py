@@ -1,22 +1,26 @@
+# Primeiro import: marca o início da partida e, com --relatorio-inicio, passa a medir as importações seguintes.
+from inicializacao import RELATORIO_INICIO, carregar_modulos_pesados
 import tkinter as tk
-from tkinter import messagebox
-import pandas as pd 
+from tkinter import messagebox, filedialog
+import math
 import os
 import sys
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import threading
 from PIL import Image, ImageTk
 
 
 import customtkinter
+import conexoes
 from app_state import AppState
 
-from backend import (
-    carregar_dados, verificar_login, inicializar_banco_de_dados, DATABASE_NAME, CSV_FILE_NAME,
-    USUARIOS_FUNCIONARIOS, USUARIOS_GERENTES,
-    COL_CATEGORIA, COL_NOME_PRODUTO, COL_VALOR,
-    COL_SENTIMENTO, COL_PRECO, resource_path_backend
+# Só módulos leves aqui: a tela de login não espera pandas, matplotlib, seaborn nem tksheet. Esses são
+# importados em segundo plano (carregar_modulos_pesados) e usados por imports locais depois do login.
+from constantes import (
+    DATABASE_NAME, COL_CATEGORIA, COL_VALOR, COL_SENTIMENTO, COL_AVALIACAO, ORDEM_SENTIMENTO, FAIXAS_DESCONTO, resource_path_backend
 )
-from gui.dashboard_tabs_ui import DashboardTabsUIManager
+from autenticacao import verificar_login, USUARIOS_FUNCIONARIOS, USUARIOS_GERENTES
+from tarefas import ExecutorTarefas
+from cache_graficos import CacheGraficos
 
 def resource_path(relative_path):
     if hasattr(sys, '_MEIPASS'):
@@ -43,15 +47,101 @@ class DashboardApp(customtkinter.CTk):
         self.font_metric_label = ("Arial", 11)
         self.font_metric_value = ("Arial", 16, "bold")
 
+        # Barra de status: indicador de carregamento enquanto houver tarefas em segundo plano.
+        self.status_frame = customtkinter.CTkFrame(self, fg_color="transparent", height=24)
+        self.status_frame.pack(side="bottom", fill="x", padx=10)
+        self.status_label = customtkinter.CTkLabel(self.status_frame, text="", font=self.font_metric_label, anchor="w")
+        self.status_label.pack(side="left", fill="x", expand=True)
+        self.loading_bar = customtkinter.CTkProgressBar(self.status_frame, mode="indeterminate", width=160)
+        self.status_message = ""
+
         self._container = customtkinter.CTkFrame(self, fg_color="transparent")
         self._container.pack(side="top", fill="both", expand=True)
 
         self.login_frame = None
+        self.login_button = None
         self.dashboard_frame = None
         self.tabs_ui_manager = None
+        self.database_ready = False
+        self._login_in_progress = False
+        self._dados_carregados = None
+        self._carregando_dados = False
+        self.export_dialog = None
+        self._export_cancelamento = None
+
+        self.executor = ExecutorTarefas(self, ao_mudar_ocupado=self._on_busy_changed)
+        self.charts = None
+        self.chart_images = CacheGraficos(resource_path_backend(DATABASE_NAME))
 
         self.show_login_page()
         self.protocol("WM_DELETE_WINDOW", self._on_app_closing)
+        self.after_idle(RELATORIO_INICIO.marcar, "tela de login pronta")
+        self._start_module_preload()
+
+    def _on_busy_changed(self, ocupado):
+        if ocupado:
+            if not self.loading_bar.winfo_ismapped():
+                self.loading_bar.pack(side="right", padx=5)
+                self.loading_bar.start()
+            self.status_label.configure(text=self.status_message or "Carregando...")
+        else:
+            if self.loading_bar.winfo_ismapped():
+                self.loading_bar.stop()
+                self.loading_bar.pack_forget()
+            self.status_label.configure(text=self.status_message)
+
+    def _set_status(self, texto):
+        self.status_message = texto
+        self._on_busy_changed(self.executor.ocupado)
+
+    def _start_module_preload(self):
+        # Partida em cadeia, toda em segundo plano enquanto o usuário digita as credenciais: módulos pesados,
+        # depois banco (criação/migração/importação), depois os dados do dashboard. Em sequência, e não em
+        # paralelo, para duas threads não importarem o pandas ao mesmo tempo.
+        self._set_status("Carregando módulos...")
+        self.executor.enviar("modulos", carregar_modulos_pesados, self._on_modules_loaded, self._on_modules_error)
+
+    def _on_modules_loaded(self, _):
+        from gui.graficos import RegistroGraficos
+        RELATORIO_INICIO.marcar("módulos pesados carregados")
+        self.charts = RegistroGraficos()
+        self._start_database_initialization()
+
+    def _on_modules_error(self, erro):
+        messagebox.showerror("Erro de Inicialização", f"Não foi possível carregar as bibliotecas do dashboard: {erro}")
+        self._on_app_closing()
+
+    def _start_database_initialization(self):
+        # Cria/migra o banco e importa CSVs novos fora da thread do Tk; o login aguarda o término.
+        from backend import inicializar_banco_de_dados
+        def progresso(dados):
+            self.executor.na_thread_principal(self._show_import_progress, dados)
+        self._set_status("Verificando o banco de dados...")
+        self.executor.enviar("banco", lambda: inicializar_banco_de_dados(callback_progresso=progresso),
+                             self._on_database_ready, self._on_database_error)
+
+    def _show_import_progress(self, progresso):
+        nome_arquivo = os.path.basename(progresso["arquivo"])
+        if progresso["bytes_totais"]:
+            percentual = 100.0 * progresso["bytes_lidos"] / progresso["bytes_totais"]
+            self._set_status(f"Importando '{nome_arquivo}': {progresso['linhas']} linhas ({percentual:.0f}%)")
+        else:
+            self._set_status(f"Importando '{nome_arquivo}': {progresso['linhas']} linhas")
+
+    def _on_database_ready(self, sucesso):
+        RELATORIO_INICIO.marcar("banco de dados pronto")
+        self.database_ready = True
+        self._set_status("" if sucesso else "AVISO: A importação de dados não foi concluída. Veja o console para detalhes.")
+        self._start_data_preload()
+
+    def _start_data_preload(self):
+        # Os dados não dependem do usuário: começam a carregar antes do login e ficam prontos para as sessões seguintes.
+        self._carregando_dados = True
+        self.executor.enviar("dados", self._load_dashboard_data, self._on_dashboard_data_loaded, self._on_dashboard_data_error)
+
+    def _on_database_error(self, erro):
+        messagebox.showerror("Erro de Banco de Dados", f"Não foi possível inicializar o banco de dados: {erro}\nVerifique o arquivo {resource_path_backend(DATABASE_NAME)} para mais detalhes.")
+        self._on_app_closing()
 
     def clear_container(self):
         for widget in self._container.winfo_children():
@@ -92,11 +182,13 @@ class DashboardApp(customtkinter.CTk):
         self.password_entry = customtkinter.CTkEntry(form_frame, show="*", width=250, font=self.font_normal)
         self.password_entry.grid(row=1, column=1, padx=5, pady=5)
 
-        login_button = customtkinter.CTkButton(form_frame, text="Entrar", command=self._attempt_login, font=self.font_bold)
-        login_button.grid(row=2, column=0, columnspan=2, pady=20)
+        self.login_button = customtkinter.CTkButton(form_frame, text="Entrar", command=self._attempt_login, font=self.font_bold)
+        self.login_button.grid(row=2, column=0, columnspan=2, pady=20)
         self.bind('<Return>', lambda event: self._attempt_login())
 
     def _attempt_login(self):
+        if self._login_in_progress:
+            return
         username = self.username_entry.get()
         password = self.password_entry.get()
         role = verificar_login(username, password)
@@ -110,27 +202,88 @@ class DashboardApp(customtkinter.CTk):
             else:
                 self.app_state.user_permissions = {}
 
-            self.app_state.df_vendas = carregar_dados()
-            if self.app_state.df_vendas is None:
-                messagebox.showerror("Erro de Dados", "Não foi possível carregar os dados de vendas. O dashboard pode não funcionar corretamente.")
-                self.app_state.df_vendas = pd.DataFrame()
-            elif self.app_state.df_vendas.empty:
-                messagebox.showwarning("Dados Vazios", "Os dados de vendas estão vazios. O dashboard pode não apresentar informações.")
-            self.app_state.df_filtrado = self.app_state.df_vendas.copy() if self.app_state.df_vendas is not None else pd.DataFrame()
-
-            self.show_dashboard_page()
+            if self._dados_carregados is not None:
+                self._enter_dashboard()
+                return
+            # Dados ainda a caminho (ou a carga anterior falhou): o dashboard abre assim que chegarem.
+            self._login_in_progress = True
+            if self.login_button is not None:
+                self.login_button.configure(state="disabled", text="Carregando dados...")
+            if self.database_ready and not self._carregando_dados:
+                self._start_data_preload()
         else:
             messagebox.showerror("Erro de Login", "Usuário ou senha inválidos, ou conta inativa.")
             self.password_entry.delete(0, "end")
 
+    def _load_dashboard_data(self):
+        # Roda numa thread de trabalho: nada de widgets aqui.
+        import pandas as pd
+        from backend import carregar_dados, carregar_arvore_categorias, obter_versao_dados
+        from filtros import MotorFiltros
+        from estatisticas import MotorEstatisticas
+        df = carregar_dados()
+        arvore = carregar_arvore_categorias()
+        versao = obter_versao_dados()
+        if df is None:
+            return None, arvore, MotorFiltros(pd.DataFrame(), arvore), MotorEstatisticas(pd.DataFrame(), arvore), versao
+        # O motor reordena as vendas por categoria uma única vez; df_vendas passa a ser essa versão ordenada.
+        return df, arvore, MotorFiltros(df, arvore), MotorEstatisticas(df, arvore), versao
+
+    def _on_dashboard_data_loaded(self, resultado):
+        self._carregando_dados = False
+        self._dados_carregados = resultado
+        RELATORIO_INICIO.marcar("dados do dashboard carregados")
+        RELATORIO_INICIO.finalizar()
+        if self._login_in_progress:
+            self._enter_dashboard()
+
+    def _enter_dashboard(self):
+        self._login_in_progress = False
+        df, arvore, motor, motor_estatisticas, versao = self._dados_carregados
+        if df is None:
+            # Não guarda a carga que falhou: o próximo login tenta de novo.
+            self._dados_carregados = None
+            messagebox.showerror("Erro de Dados", "Não foi possível carregar os dados de vendas. O dashboard pode não funcionar corretamente.")
+        elif df.empty:
+            messagebox.showwarning("Dados Vazios", "Os dados de vendas estão vazios. O dashboard pode não apresentar informações.")
+        self.app_state.arvore_categorias = arvore
+        self.app_state.motor_filtros = motor
+        self.app_state.motor_estatisticas = motor_estatisticas
+        self.app_state.versao_dados = versao
+        self.app_state.df_vendas = motor.df
+        # Sem filtro ativo a visão filtrada é o próprio DataFrame carregado: uma única cópia física.
+        self.app_state.df_filtrado = self.app_state.df_vendas
+        self.show_dashboard_page()
+        RELATORIO_INICIO.marcar("dashboard exibido")
+
+    def _on_dashboard_data_error(self, erro):
+        self._carregando_dados = False
+        print(f"ERRO: Falha ao carregar os dados do dashboard: {type(erro).__name__} - {erro}")
+        if not self._login_in_progress:
+            return
+        self._login_in_progress = False
+        if self.login_button is not None and self.login_button.winfo_exists():
+            self.login_button.configure(state="normal", text="Entrar")
+        messagebox.showerror("Erro de Dados", f"Não foi possível carregar os dados de vendas: {erro}")
+
     def _logout(self):
+        if self.export_dialog is not None and self.export_dialog.winfo_exists():
+            self._close_export_dialog()
+        self.charts.liberar_todos()
         self.app_state = AppState()
         self.show_login_page()
 
     def _on_app_closing(self):
+        if self._export_cancelamento is not None:
+            self._export_cancelamento.set()
+        self.executor.encerrar()
+        if self.charts is not None:
+            self.charts.liberar_todos()
+        conexoes.fechar_todos()
         self.destroy()
 
     def show_dashboard_page(self):
+        self.unbind('<Return>')
         self.clear_container()
         self.dashboard_frame = customtkinter.CTkFrame(self._container, fg_color="transparent")
         self.dashboard_frame.pack(fill="both", expand=True)
@@ -172,22 +325,151 @@ class DashboardApp(customtkinter.CTk):
         customtkinter.CTkFrame(self.sidebar_frame, height=2, fg_color="gray").pack(fill="x", pady=10, padx=10)
 
         customtkinter.CTkLabel(self.sidebar_frame, text="Filtros do Dashboard", font=self.font_header, anchor="w").pack(pady=(10,5), fill="x", padx=10)
-        
+
+        customtkinter.CTkLabel(self.sidebar_frame, text="Buscar produto:", font=self.font_normal, anchor="w").pack(fill="x", padx=10)
+        self.busca_entry = customtkinter.CTkEntry(self.sidebar_frame, placeholder_text="ex.: cabo usb c", font=self.font_normal)
+        self.busca_entry.pack(fill="x", padx=10, pady=(0, 2))
+        self.busca_entry.bind('<Return>', self._apply_filters)
+        self.busca_resultado_label = customtkinter.CTkLabel(self.sidebar_frame, text="", font=self.font_metric_label, anchor="w")
+        self.busca_resultado_label.pack(fill="x", padx=10, pady=(0, 5))
+
         customtkinter.CTkLabel(self.sidebar_frame, text=f"Selecione a {COL_CATEGORIA}:", font=self.font_normal, anchor="w").pack(fill="x", padx=10)
         self.categoria_var = tk.StringVar(value="Todas")
-        categorias_disponiveis = ["Todas"]
-        if self.app_state.df_vendas is not None and COL_CATEGORIA in self.app_state.df_vendas.columns:
-            categorias_unicas = self.app_state.df_vendas[COL_CATEGORIA].dropna().unique()
-            categorias_disponiveis.extend(sorted(list(categorias_unicas)))
-
-        self.categoria_combobox = customtkinter.CTkComboBox(self.sidebar_frame, variable=self.categoria_var, values=categorias_disponiveis, state="readonly", command=self._apply_filters_ctk_combobox_fix, font=self.font_normal)
-        self.categoria_combobox.pack(fill="x", pady=5, padx=10)
+        self.categoria_caminho_ids = []
+        self.categoria_drill_frame = customtkinter.CTkFrame(self.sidebar_frame, fg_color="transparent")
+        self.categoria_drill_frame.pack(fill="x", padx=10)
+        self.categoria_resumo_label = customtkinter.CTkLabel(self.sidebar_frame, text="", font=self.font_metric_label, anchor="w", justify="left", wraplength=250)
+        self.categoria_resumo_label.pack(fill="x", padx=10, pady=(0, 5))
+        self._render_category_drilldown()
+
+        customtkinter.CTkLabel(self.sidebar_frame, text=f"Faixa de {COL_VALOR} (₹):", font=self.font_normal, anchor="w").pack(fill="x", padx=10)
+        self.valor_min_entry, self.valor_max_entry = self._build_range_entries()
+        customtkinter.CTkLabel(self.sidebar_frame, text=f"Faixa de {COL_AVALIACAO} (0 a 5):", font=self.font_normal, anchor="w").pack(fill="x", padx=10)
+        self.avaliacao_min_entry, self.avaliacao_max_entry = self._build_range_entries()
+
+        customtkinter.CTkLabel(self.sidebar_frame, text=f"{COL_SENTIMENTO}:", font=self.font_normal, anchor="w").pack(fill="x", padx=10)
+        self.sentimento_var = tk.StringVar(value="Todos")
+        customtkinter.CTkComboBox(self.sidebar_frame, values=["Todos"] + ORDEM_SENTIMENTO, variable=self.sentimento_var, state="readonly",
+                                  command=lambda _: self._apply_filters(), font=self.font_normal).pack(fill="x", padx=10, pady=(0, 5))
+
+        customtkinter.CTkLabel(self.sidebar_frame, text="Faixa de Desconto:", font=self.font_normal, anchor="w").pack(fill="x", padx=10)
+        self.faixa_desconto_var = tk.StringVar(value=FAIXAS_DESCONTO[0][0])
+        customtkinter.CTkComboBox(self.sidebar_frame, values=[faixa[0] for faixa in FAIXAS_DESCONTO], variable=self.faixa_desconto_var, state="readonly",
+                                  command=lambda _: self._apply_filters(), font=self.font_normal).pack(fill="x", padx=10, pady=(0, 5))
+
+        botoes_filtro = customtkinter.CTkFrame(self.sidebar_frame, fg_color="transparent")
+        botoes_filtro.pack(fill="x", padx=10, pady=5)
+        customtkinter.CTkButton(botoes_filtro, text="Aplicar", command=self._apply_filters, font=self.font_bold, width=100).pack(side="left", expand=True, padx=(0, 2))
+        customtkinter.CTkButton(botoes_filtro, text="Limpar", command=self._clear_filters, font=self.font_bold, width=100).pack(side="left", expand=True, padx=(2, 0))
+        customtkinter.CTkButton(self.sidebar_frame, text="Exportar...", command=self._open_export_dialog, font=self.font_bold).pack(fill="x", padx=10, pady=5)
 
         if self.app_state.user_role == "gerente":
             customtkinter.CTkFrame(self.sidebar_frame, height=2, fg_color="gray").pack(fill="x", pady=10, padx=10)
             customtkinter.CTkLabel(self.sidebar_frame, text="Painel do Gerente", font=self.font_header, anchor="w").pack(pady=(10,5), fill="x", padx=10)
             self._build_manager_panel()
 
+    def _render_category_drilldown(self):
+        from backend import filhos_categoria
+        for widget in self.categoria_drill_frame.winfo_children():
+            widget.destroy()
+
+        arvore = self.app_state.arvore_categorias
+        if arvore is None or arvore.empty:
+            customtkinter.CTkComboBox(self.categoria_drill_frame, values=["Todas"], state="readonly", font=self.font_normal).pack(fill="x", pady=5)
+            self.categoria_resumo_label.configure(text="")
+            return
+
+        # Um combobox por nível: o primeiro lista as raízes e cada seleção abre os filhos do nó escolhido.
+        pai_id = None
+        for nivel in range(len(self.categoria_caminho_ids) + 1):
+            filhos = filhos_categoria(arvore, pai_id)
+            if filhos is None or filhos.empty:
+                break
+            selecionado_id = self.categoria_caminho_ids[nivel] if nivel < len(self.categoria_caminho_ids) else None
+            valor_inicial = arvore.at[selecionado_id, 'nome'] if selecionado_id is not None else "Todas"
+            combobox = customtkinter.CTkComboBox(
+                self.categoria_drill_frame, values=["Todas"] + sorted(filhos['nome'].tolist()), state="readonly",
+                command=lambda escolha, n=nivel, p=pai_id: self._on_category_level_selected(n, p, escolha), font=self.font_normal
+            )
+            combobox.set(valor_inicial)
+            combobox.pack(fill="x", pady=(5 if nivel == 0 else 2, 0), padx=(min(nivel, 4) * 8, 0))
+            pai_id = selecionado_id
+            if pai_id is None:
+                break
+
+        self._update_category_rollup_label()
+
+    def _on_category_level_selected(self, nivel, pai_id, escolha):
+        from backend import filhos_categoria
+        arvore = self.app_state.arvore_categorias
+        self.categoria_caminho_ids = self.categoria_caminho_ids[:nivel]
+        if escolha != "Todas":
+            filhos = filhos_categoria(arvore, pai_id)
+            encontrados = filhos.index[filhos['nome'] == escolha]
+            if len(encontrados):
+                self.categoria_caminho_ids.append(int(encontrados[0]))
+        self.categoria_var.set(arvore.at[self.categoria_caminho_ids[-1], 'nome'] if self.categoria_caminho_ids else "Todas")
+        self._render_category_drilldown()
+        self._apply_filters()
+
+    def _update_category_rollup_label(self):
+        # Os totais vêm da tabela de rollups pré-agregada na importação, sem varrer as vendas.
+        from backend import filhos_categoria
+        arvore = self.app_state.arvore_categorias
+        if self.categoria_caminho_ids:
+            no = arvore.loc[self.categoria_caminho_ids[-1]]
+            receita, contagem, avaliacao = no['receita'], int(no['contagem']), no['avaliacao_media']
+        else:
+            raizes = filhos_categoria(arvore)
+            receita, contagem = raizes['receita'].sum(), int(raizes['contagem'].sum())
+            avaliacao = (raizes['avaliacao_media'] * raizes['contagem']).sum() / contagem if contagem else float('nan')
+        texto_avaliacao = f"{avaliacao:.2f}" if not math.isnan(avaliacao) else "-"
+        self.categoria_resumo_label.configure(text=f"Vendas: ₹ {receita:,.2f}\nProdutos: {contagem}  |  Avaliação média: {texto_avaliacao}")
+
+    def _build_range_entries(self):
+        frame = customtkinter.CTkFrame(self.sidebar_frame, fg_color="transparent")
+        frame.pack(fill="x", padx=10, pady=(0, 5))
+        entradas = []
+        for placeholder in ("mín", "máx"):
+            entrada = customtkinter.CTkEntry(frame, placeholder_text=placeholder, width=100, font=self.font_normal)
+            entrada.pack(side="left", expand=True, fill="x", padx=2)
+            entrada.bind('<Return>', self._apply_filters)
+            entradas.append(entrada)
+        return entradas
+
+    def _read_range_entry(self, entrada):
+        texto = entrada.get().strip().replace(",", ".")
+        if not texto:
+            return None
+        try:
+            return float(texto)
+        except ValueError:
+            print(f"AVISO: Valor de filtro inválido ignorado: '{texto}'.")
+            return None
+
+    def _read_sidebar_filters(self):
+        faixa_desconto = next((faixa for faixa in FAIXAS_DESCONTO if faixa[0] == self.faixa_desconto_var.get()), FAIXAS_DESCONTO[0])
+        return {
+            "busca": self.busca_entry.get().strip() or None,
+            "valor_min": self._read_range_entry(self.valor_min_entry),
+            "valor_max": self._read_range_entry(self.valor_max_entry),
+            "avaliacao_min": self._read_range_entry(self.avaliacao_min_entry),
+            "avaliacao_max": self._read_range_entry(self.avaliacao_max_entry),
+            "sentimento": self.sentimento_var.get(),
+            "desconto_min": faixa_desconto[1],
+            "desconto_max": faixa_desconto[2],
+        }
+
+    def _clear_filters(self):
+        for entrada in (self.busca_entry, self.valor_min_entry, self.valor_max_entry, self.avaliacao_min_entry, self.avaliacao_max_entry):
+            entrada.delete(0, "end")
+        self.sentimento_var.set("Todos")
+        self.faixa_desconto_var.set(FAIXAS_DESCONTO[0][0])
+        self.categoria_caminho_ids = []
+        self.categoria_var.set("Todas")
+        self._render_category_drilldown()
+        self._apply_filters()
+
     def _build_manager_panel(self):
         customtkinter.CTkLabel(self.sidebar_frame, text="Criar Nova Conta de Funcionário", font=self.font_bold).pack(anchor="w", padx=10, pady=(5,0))
         create_user_lf = customtkinter.CTkFrame(self.sidebar_frame) 
@@ -277,25 +559,161 @@ class DashboardApp(customtkinter.CTk):
             USUARIOS_FUNCIONARIOS[username][key] = value
             messagebox.showinfo("Sucesso", f"Status de '{username}' atualizado.")
             self._populate_manage_employees_panel()
-    def _apply_filters_ctk_combobox_fix(self, choice=None):
-        self._apply_filters()
-
     def _apply_filters(self, event=None):
-        if self.app_state.df_vendas is None or self.app_state.df_vendas.empty:
+        categoria_id = self.categoria_caminho_ids[-1] if self.categoria_caminho_ids else None
+        filtros = {"categoria_id": categoria_id}
+        filtros.update(self._read_sidebar_filters())
+        # Só os filtros ativos entram no dicionário: ele também serve de assinatura para as consultas SQL.
+        self.app_state.filtros = {chave: valor for chave, valor in filtros.items() if valor is not None and valor != "Todos"}
+
+        if self.app_state.df_vendas is None or self.app_state.df_vendas.empty or self.app_state.motor_filtros is None:
+            import pandas as pd
             self.app_state.df_filtrado = pd.DataFrame()
             self._update_dashboard_content()
             return
 
-        df_temp = self.app_state.df_vendas.copy()
-        categoria_selecionada = self.categoria_var.get()
+        self.app_state.df_filtrado = self.app_state.motor_filtros.aplicar(self.app_state.filtros)
+        busca = self.app_state.filtros.get("busca")
+        self.busca_resultado_label.configure(text=f"{len(self.app_state.df_filtrado)} produto(s) para '{busca}'" if busca else "")
+        self._update_dashboard_content()
 
-        if categoria_selecionada != "Todas" and COL_CATEGORIA in df_temp.columns:
-            df_temp = df_temp[df_temp[COL_CATEGORIA] == categoria_selecionada]
+    # --- Exportação ---
+
+    def _user_can_see_details(self):
+        return self.app_state.user_role == "gerente" or self.app_state.user_permissions.get("can_see_details", False)
+
+    def _export_sources(self):
+        # Rótulo -> (função que gera os blocos, total de linhas, nome sugerido do arquivo). A visão filtrada é lida
+        # direto do SQLite, com os mesmos filtros de df_filtrado; os agregados dos gráficos já estão em memória.
+        from backend import iterar_vendas_filtradas
+        from exportacao import blocos_dataframe
+        fontes = {}
+        df_filtrado = self.app_state.df_filtrado
+        if self._user_can_see_details() and df_filtrado is not None and not df_filtrado.empty:
+            filtros = dict(self.app_state.filtros)
+            fontes[f"Visão filtrada ({len(df_filtrado)} linhas)"] = (lambda: iterar_vendas_filtradas(filtros), len(df_filtrado), "vendas_filtradas")
+        if self.tabs_ui_manager:
+            for titulo, dados in self.tabs_ui_manager.dados_exportaveis():
+                fontes[f"Gráfico: {titulo}"] = (lambda dados=dados: blocos_dataframe(dados), len(dados), titulo)
+        return fontes
+
+    def _open_export_dialog(self):
+        from exportacao import formatos_disponiveis
+        if self.export_dialog is not None and self.export_dialog.winfo_exists():
+            self.export_dialog.focus()
+            return
+        fontes = self._export_sources()
+        if not fontes:
+            messagebox.showinfo("Exportar", "Nada para exportar com os filtros atuais.")
+            return
 
-        self.app_state.df_filtrado = df_temp
-        self._update_dashboard_content()
+        dialog = customtkinter.CTkToplevel(self)
+        dialog.title("Exportar Dados")
+        dialog.geometry("460x260")
+        dialog.transient(self)
+        dialog.protocol("WM_DELETE_WINDOW", self._close_export_dialog)
+        self.export_dialog = dialog
+        self.export_fontes = fontes
+
+        customtkinter.CTkLabel(dialog, text="Dados:", font=self.font_normal, anchor="w").pack(fill="x", padx=15, pady=(15, 0))
+        self.export_fonte_var = tk.StringVar(value=next(iter(fontes)))
+        customtkinter.CTkComboBox(dialog, values=list(fontes), variable=self.export_fonte_var, state="readonly", font=self.font_normal).pack(fill="x", padx=15)
+        customtkinter.CTkLabel(dialog, text="Formato:", font=self.font_normal, anchor="w").pack(fill="x", padx=15, pady=(10, 0))
+        formatos = formatos_disponiveis()
+        self.export_formato_var = tk.StringVar(value=formatos[0])
+        customtkinter.CTkComboBox(dialog, values=formatos, variable=self.export_formato_var, state="readonly", font=self.font_normal).pack(fill="x", padx=15)
+
+        self.export_progress_bar = customtkinter.CTkProgressBar(dialog)
+        self.export_progress_bar.set(0)
+        self.export_progress_bar.pack(fill="x", padx=15, pady=(15, 0))
+        self.export_status_label = customtkinter.CTkLabel(dialog, text="", font=self.font_metric_label, anchor="w")
+        self.export_status_label.pack(fill="x", padx=15)
+
+        botoes = customtkinter.CTkFrame(dialog, fg_color="transparent")
+        botoes.pack(fill="x", padx=15, pady=10)
+        self.export_start_button = customtkinter.CTkButton(botoes, text="Exportar", command=self._start_export, font=self.font_bold, width=100)
+        self.export_start_button.pack(side="left", expand=True, padx=(0, 2))
+        self.export_cancel_button = customtkinter.CTkButton(botoes, text="Cancelar", command=self._cancel_export, font=self.font_bold, width=100, state="disabled")
+        self.export_cancel_button.pack(side="left", expand=True, padx=(2, 0))
+
+    def _start_export(self):
+        from exportacao import FORMATOS_EXPORTACAO, exportar
+        fonte = self.export_fontes.get(self.export_fonte_var.get())
+        formato = self.export_formato_var.get()
+        if fonte is None:
+            return
+        gerar_blocos, total, nome_sugerido = fonte
+        extensao = FORMATOS_EXPORTACAO[formato]
+        caminho = filedialog.asksaveasfilename(parent=self.export_dialog, title="Salvar exportação", initialfile=nome_sugerido + extensao,
+                                               defaultextension=extensao, filetypes=[(formato, "*" + extensao)])
+        if not caminho:
+            return
+
+        # A gravação roda no pool de tarefas; o progresso volta pela fila do executor e o botão Cancelar
+        # sinaliza o Event, verificado entre um bloco e outro.
+        cancelamento = threading.Event()
+        self._export_cancelamento = cancelamento
+        def progresso(linhas, total_linhas):
+            self.executor.na_thread_principal(self._show_export_progress, linhas, total_linhas)
+
+        self.export_start_button.configure(state="disabled")
+        self.export_cancel_button.configure(state="normal")
+        self.export_progress_bar.set(0)
+        self.export_status_label.configure(text=f"Exportando para '{os.path.basename(caminho)}'...")
+        self.executor.enviar("exportacao",
+                             lambda: (exportar(gerar_blocos(), caminho, formato, total=total, ao_progredir=progresso, cancelamento=cancelamento), caminho),
+                             self._on_export_done, self._on_export_error)
+
+    def _export_dialog_open(self):
+        return self.export_dialog is not None and self.export_dialog.winfo_exists()
+
+    def _show_export_progress(self, linhas, total):
+        if not self._export_dialog_open():
+            return
+        if total:
+            self.export_progress_bar.set(min(1.0, linhas / total))
+            self.export_status_label.configure(text=f"Exportando: {linhas} de {total} linhas ({100.0 * linhas / total:.0f}%)")
+        else:
+            self.export_status_label.configure(text=f"Exportando: {linhas} linhas")
+
+    def _finish_export(self, mensagem):
+        self._export_cancelamento = None
+        if not self._export_dialog_open():
+            self._set_status(mensagem)
+            return
+        self.export_start_button.configure(state="normal")
+        self.export_cancel_button.configure(state="disabled")
+        self.export_status_label.configure(text=mensagem)
+
+    def _on_export_done(self, resultado):
+        linhas, caminho = resultado
+        if self._export_dialog_open():
+            self.export_progress_bar.set(1)
+        self._finish_export(f"Exportadas {linhas} linhas para '{os.path.basename(caminho)}'.")
+
+    def _on_export_error(self, erro):
+        from exportacao import ExportacaoCancelada
+        if isinstance(erro, ExportacaoCancelada):
+            self._finish_export("Exportação cancelada.")
+            return
+        print(f"ERRO: Falha na exportação: {type(erro).__name__} - {erro}")
+        self._finish_export("Falha na exportação.")
+        messagebox.showerror("Erro na Exportação", f"Não foi possível exportar os dados: {erro}")
+
+    def _cancel_export(self):
+        if self._export_cancelamento is not None:
+            self._export_cancelamento.set()
+            self.export_status_label.configure(text="Cancelando...")
+
+    def _close_export_dialog(self):
+        # Fechar a janela no meio da exportação cancela a gravação (o arquivo parcial é apagado).
+        if self._export_cancelamento is not None:
+            self._export_cancelamento.set()
+        self.export_dialog.destroy()
+        self.export_dialog = None
 
     def _build_main_dashboard_content(self):
+        from gui.dashboard_tabs_ui import DashboardTabsUIManager
         for widget in self.main_content_area.winfo_children():
             widget.destroy()
 
@@ -313,19 +731,44 @@ class DashboardApp(customtkinter.CTk):
         self.tabs_ui_manager.setup_tabs()
 
     def _build_indicators(self):
-        for widget in self.indicators_frame.winfo_children():
-            widget.destroy()
-
+        # Os indicadores atuais ficam na tela até o novo resumo chegar do segundo plano.
         if self.app_state.df_filtrado is None or self.app_state.df_filtrado.empty:
+            self.executor.cancelar("indicadores")
+            for widget in self.indicators_frame.winfo_children():
+                widget.destroy()
             customtkinter.CTkLabel(self.indicators_frame, text="Nenhum dado disponível para os filtros selecionados.", font=self.font_normal).pack()
             return
 
-        df = self.app_state.df_filtrado
-        total_vendas = df[COL_VALOR].sum() if COL_VALOR in df.columns else 0
-        media_vendas = 0
-        if COL_VALOR in df.columns and df[COL_VALOR].notna().any():
-            media_vendas = df[COL_VALOR].mean()
-        num_transacoes = df.shape[0]
+        filtros = dict(self.app_state.filtros)
+        # Filtros só de categoria: os totais saem das estatísticas por categoria, sem consulta nem varredura.
+        motor_estatisticas = self.app_state.motor_estatisticas
+        estatisticas = motor_estatisticas.para_filtros(filtros) if motor_estatisticas is not None else None
+        if estatisticas is not None and COL_VALOR in estatisticas.colunas:
+            self.executor.cancelar("indicadores")
+            self._render_indicators(estatisticas.resumo_indicadores(COL_VALOR))
+            return
+
+        from backend import consultar_agregados
+        cache = self.app_state.cache_derivados
+        self.executor.enviar(
+            "indicadores",
+            lambda: cache.obter(filtros, ("indicadores",), lambda: consultar_agregados(filtros, metricas=("receita", "ticket_medio", "contagem"))),
+            self._render_indicators
+        )
+
+    def _render_indicators(self, resumo):
+        import pandas as pd
+        if not self.indicators_frame.winfo_exists():
+            return
+        for widget in self.indicators_frame.winfo_children():
+            widget.destroy()
+        if resumo is None or resumo.empty:
+            customtkinter.CTkLabel(self.indicators_frame, text="Não foi possível calcular os indicadores.", font=self.font_normal).pack()
+            return
+
+        total_vendas = resumo.at[0, COL_VALOR]
+        media_vendas = resumo.at[0, "Ticket Médio"] if pd.notna(resumo.at[0, "Ticket Médio"]) else 0
+        num_transacoes = int(resumo.at[0, "Contagem"])
 
         metrics_data = [
             ("Total de Vendas", f"$ {total_vendas:,.2f}"),
@@ -348,26 +791,12 @@ class DashboardApp(customtkinter.CTk):
         for widget in tab_frame.winfo_children():
             widget.destroy()
 
-    def embed_matplotlib_figure(self, fig, parent_frame):
-        self._clear_tab_frame(parent_frame)
-        canvas = FigureCanvasTkAgg(fig, master=parent_frame)
-        canvas.draw()
-        widget = canvas.get_tk_widget()
-        widget.pack(side="top", fill="both", expand=True)
-        return canvas
-
     def _show_no_data_message(self, parent_frame, custom_message=None):
         self._clear_tab_frame(parent_frame)
         message_text = custom_message or "Nenhum dado disponível para os filtros selecionados."
         customtkinter.CTkLabel(parent_frame, text=message_text, font=self.font_header).pack(pady=20)
 
 if __name__ == "__main__":
-    if not os.path.exists(DATABASE_NAME):
-        try:
-            inicializar_banco_de_dados()
-        except Exception as e:
-            messagebox.showerror("Erro de Banco de Dados", f"Não foi possível inicializar o banco de dados: {e}\nVerifique o arquivo {resource_path_backend} para mais detalhes.")
-            sys.exit(1)
-
+    # O banco é criado/migrado e os CSVs importados em segundo plano, já com a janela aberta.
     app = DashboardApp()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
@@ -1,5 +1,5 @@
 
-import pandas as pd
+from cache_derivados import CacheDerivados
 
 class AppState:
 
@@ -10,3 +10,9 @@ class AppState:
         self.user_permissions = {}
         self.df_vendas = None
         self.df_filtrado = None
+        self.filtros = {}
+        self.arvore_categorias = None
+        self.motor_filtros = None
+        self.motor_estatisticas = None
+        self.cache_derivados = CacheDerivados()
+        self.versao_dados = None
@@ -0,0 +1,18 @@
+#isso aqui é só para simular usuários (obs: eu faria um banco de dados real para ser mais seguro).
+USUARIOS_FUNCIONARIOS = {
+    "func1": {"password": "senha123", "can_see_details": True, "active": True},
+    "ana.vendas": {"password": "vendas234", "can_see_details": False, "active": True}
+}
+USUARIOS_GERENTES = {
+    "admin": "admin",
+    "boss": "boss1337"
+}
+
+def verificar_login(username, password):
+    if username in USUARIOS_FUNCIONARIOS:
+        user_data = USUARIOS_FUNCIONARIOS[username]
+        if user_data["password"] == password and user_data.get("active", False):
+            return "funcionario"
+    if username in USUARIOS_GERENTES and USUARIOS_GERENTES[username] == password:
+        return "gerente"
+    return None
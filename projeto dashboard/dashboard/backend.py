@@ -1,10 +1,24 @@
 import pandas as pd
+import numpy as np
 import os
+import re
 import sys
 import sqlite3
+import time
 
-DATABASE_NAME = 'dashboard_data.db'
-CSV_FILE_NAME = 'vendas.csv'
+import conexoes
+import snapshot_cache
+
+# Constantes e usuários ficam em módulos leves (a tela de login não importa o pandas); reexportados aqui.
+from constantes import (
+    DATABASE_NAME, CSV_FILE_NAME, ID_CATEGORIA_TODAS,
+    COL_CATEGORIA, COL_NOME_PRODUTO, COL_VALOR, COL_AVALIACAO, COL_CONTAGEM_AVALIACOES, COL_PERCENTUAL_DESCONTO,
+    COL_SENTIMENTO, COL_PRECO, COL_CATEGORIA_ID, COL_ID_VENDA,
+    ORDEM_SENTIMENTO, FAIXAS_DESCONTO, COLUNAS_NUMERICAS, resource_path_backend
+)
+from autenticacao import USUARIOS_FUNCIONARIOS, USUARIOS_GERENTES, verificar_login
+
+IMPORT_DIR_NAME = 'importar'
 
 CSV_CATEGORY = 'category'
 CSV_DISCOUNTED_PRICE = 'discounted_price'
@@ -13,32 +27,53 @@ CSV_RATING = 'rating'
 CSV_RATING_COUNT = 'rating_count'
 CSV_ACTUAL_PRICE = 'actual_price'
 CSV_DISCOUNT_PERCENTAGE = 'discount_percentage'
+CSV_CATEGORY_MAIN = 'category_main'
+CSV_SENTIMENT = 'sentiment'
+CSV_CATEGORY_ID = 'categoria_id'
+SEPARADOR_CATEGORIA = '|'
 
-COL_CATEGORIA = 'Categoria'
-COL_NOME_PRODUTO = 'Nome do Produto'
-COL_VALOR = 'Valor'
-COL_AVALIACAO = 'Avaliação'
-COL_CONTAGEM_AVALIACOES = 'Contagem de Avaliações'
-COL_PERCENTUAL_DESCONTO = 'Percentual de Desconto'
-COL_SENTIMENTO = 'Sentimento'
-COL_PRECO = 'Preço Original'
-
-#isso aqui é só para simular usuários (obs: eu faria um banco de dados real para ser mais seguro).
-USUARIOS_FUNCIONARIOS = {
-    "func1": {"password": "senha123", "can_see_details": True, "active": True},
-    "ana.vendas": {"password": "vendas234", "can_see_details": False, "active": True}
-}
-USUARIOS_GERENTES = {
-    "admin": "admin",
-    "boss": "boss1337"
-}
+COLUNAS_CSV_IMPORTACAO = [
+    CSV_PRODUCT_NAME, CSV_CATEGORY, CSV_RATING, CSV_RATING_COUNT,
+    CSV_DISCOUNTED_PRICE, CSV_ACTUAL_PRICE, CSV_DISCOUNT_PERCENTAGE
+]
 
-def resource_path_backend(relative_path):
-    if hasattr(sys, '_MEIPASS'):
-        base_path = sys._MEIPASS
-    else:
-        base_path = os.path.abspath(os.path.dirname(__file__))
-    return os.path.join(base_path, relative_path)
+SCHEMA_VERSION = 9
+
+TAMANHO_BLOCO_IMPORTACAO = 50000
+IMPORTACAO_CACHE_SIZE = -65536
+
+PERFIL_CARGA_PADRAO = 'padrao'
+PERFIL_CARGA_COMPACTO = 'compacto'
+PERFIL_CARGA = PERFIL_CARGA_COMPACTO
+
+CHAVE_PRODUTO = 'chave_produto'
+ORDINAL_PRODUTO = 'ordinal_produto'
+HASH_CONTEUDO = 'hash_conteudo'
+OCORRENCIA_CONTEUDO = 'ocorrencia_conteudo'
+ARQUIVO_ORIGEM = 'arquivo_origem'
+
+# Colunas de texto indexadas pela busca (FTS5). Descrição e texto das avaliações entram aqui, numa nova
+# migração, quando passarem a ser importados.
+TABELA_BUSCA = 'vendas_busca'
+COLUNAS_BUSCA = [CSV_PRODUCT_NAME]
+
+COLUNAS_VENDAS_NORMALIZADAS = [
+    CSV_PRODUCT_NAME, CSV_CATEGORY, CSV_CATEGORY_MAIN, CSV_RATING, CSV_RATING_COUNT,
+    CSV_DISCOUNTED_PRICE, CSV_ACTUAL_PRICE, CSV_DISCOUNT_PERCENTAGE
+]
+
+SQL_CRIAR_TABELA_VENDAS = f'''
+CREATE TABLE vendas (
+    "{CSV_PRODUCT_NAME}" TEXT,
+    "{CSV_CATEGORY}" TEXT,
+    "{CSV_CATEGORY_MAIN}" TEXT,
+    "{CSV_RATING}" REAL,
+    "{CSV_RATING_COUNT}" INTEGER,
+    "{CSV_DISCOUNTED_PRICE}" REAL,
+    "{CSV_ACTUAL_PRICE}" REAL,
+    "{CSV_DISCOUNT_PERCENTAGE}" REAL
+)
+'''
 
 def classificar_sentimento(rating):
     if pd.isna(rating):
@@ -51,203 +86,990 @@ def classificar_sentimento(rating):
         return "Negativo"
     return "Não Avaliado"
 
-def get_db_connection(db_name=DATABASE_NAME):
-    db_path = resource_path_backend(db_name)
-    conn = sqlite3.connect(db_path)
-    return conn, db_path
+def classificar_sentimento_vetorizado(avaliacoes):
+    # Mesmas faixas de classificar_sentimento, aplicadas ao array inteiro; NaN e negativos ficam "Não Avaliado".
+    notas = np.asarray(avaliacoes, dtype='float64')
+    codigos = np.full(notas.shape, ORDEM_SENTIMENTO.index("Não Avaliado"), dtype=np.int8)
+    with np.errstate(invalid='ignore'):
+        codigos[notas >= 0] = ORDEM_SENTIMENTO.index("Negativo")
+        codigos[notas >= 3.0] = ORDEM_SENTIMENTO.index("Neutro")
+        codigos[notas >= 4.0] = ORDEM_SENTIMENTO.index("Positivo")
+    return pd.Categorical.from_codes(codigos, categories=ORDEM_SENTIMENTO)
 
-def inicializar_banco_de_dados():
-    conn, db_path = get_db_connection()
-    cursor = conn.cursor()
+def obter_gerenciador_conexoes(db_name=DATABASE_NAME):
+    # Conexões persistentes: escrita única protegida por lock e leituras 'mode=ro' reaproveitadas entre chamadas.
+    return conexoes.obter_gerenciador(resource_path_backend(db_name))
+
+def fechar_conexoes():
+    conexoes.fechar_todos()
+
+def _converter_moeda(serie):
+    serie = serie.astype(str).str.replace('₹', '', regex=False).str.replace(',', '', regex=False)
+    return pd.to_numeric(serie, errors='coerce')
+
+def normalizar_vendas(df_bruto):
+    # Converte as colunas de texto do CSV ("₹1,099", "24,269", "64%") para os tipos da tabela 'vendas'.
+    df = pd.DataFrame(index=df_bruto.index)
+    df[CSV_PRODUCT_NAME] = df_bruto[CSV_PRODUCT_NAME]
+    df[CSV_CATEGORY] = df_bruto[CSV_CATEGORY]
+    df[CSV_CATEGORY_MAIN] = df_bruto[CSV_CATEGORY].astype(str).str.split(SEPARADOR_CATEGORIA).str[0]
+    df[CSV_RATING] = df_bruto[CSV_RATING].astype(str).str.extract(r'(\d+\.?\d*)', expand=False).astype(float)
+    df[CSV_RATING_COUNT] = pd.to_numeric(df_bruto[CSV_RATING_COUNT].astype(str).str.replace(',', '', regex=False), errors='coerce')
+    df[CSV_DISCOUNTED_PRICE] = _converter_moeda(df_bruto[CSV_DISCOUNTED_PRICE])
+    df[CSV_ACTUAL_PRICE] = _converter_moeda(df_bruto[CSV_ACTUAL_PRICE])
+    df[CSV_DISCOUNT_PERCENTAGE] = pd.to_numeric(df_bruto[CSV_DISCOUNT_PERCENTAGE].astype(str).str.replace('%', '', regex=False), errors='coerce')
+    return df
 
+def _inserir_vendas(cursor, df_normalizado):
+    colunas = list(df_normalizado.columns)
+    nomes = ", ".join(f'"{col}"' for col in colunas)
+    marcadores = ", ".join("?" for _ in colunas)
+    df_objetos = df_normalizado.astype(object).where(df_normalizado.notna(), None)
+    cursor.executemany(f"INSERT INTO vendas ({nomes}) VALUES ({marcadores})", df_objetos.itertuples(index=False, name=None))
+
+def _inserir_vendas_novas(cursor, df_com_chaves):
+    # Só linhas com chave nova são gravadas. As chaves de todas as linhas lidas vão para a tabela temporária
+    # 'importacao_chaves', para saber no fim quais vendas do arquivo deixaram de existir nele.
+    colunas = COLUNAS_VENDAS_NORMALIZADAS + [CHAVE_PRODUTO, HASH_CONTEUDO, OCORRENCIA_CONTEUDO, ARQUIVO_ORIGEM]
+    nomes = ", ".join(f'"{col}"' for col in colunas)
+    marcadores = ", ".join("?" for _ in colunas)
+    df_objetos = df_com_chaves[colunas].astype(object).where(df_com_chaves[colunas].notna(), None)
+    cursor.executemany(f'''
+        INSERT INTO vendas ({nomes}) VALUES ({marcadores})
+        ON CONFLICT("{ARQUIVO_ORIGEM}", "{HASH_CONTEUDO}", "{OCORRENCIA_CONTEUDO}") DO NOTHING
+    ''', df_objetos.itertuples(index=False, name=None))
+    cursor.executemany(
+        "INSERT INTO temp.importacao_chaves (hash_conteudo, ocorrencia) VALUES (?, ?)",
+        zip(df_com_chaves[HASH_CONTEUDO].tolist(), df_com_chaves[OCORRENCIA_CONTEUDO].tolist())
+    )
+
+def _remover_vendas_ausentes(cursor, origem, max_rowid_antes):
+    # Vendas do arquivo que não apareceram nesta leitura foram editadas ou apagadas nele e saem do banco.
+    # Uma removida e uma nova do mesmo produto (chave_produto) contam como uma linha alterada.
+    # Devolve (alteradas, removidas), com as alteradas incluídas nas removidas.
+    ausentes = f'''
+        SELECT v.rowid AS id, v."{CHAVE_PRODUTO}" AS chave FROM vendas v
+        WHERE v."{ARQUIVO_ORIGEM}" = ? AND v.rowid <= ? AND NOT EXISTS (
+            SELECT 1 FROM temp.importacao_chaves c
+            WHERE c.hash_conteudo = v."{HASH_CONTEUDO}" AND c.ocorrencia = v."{OCORRENCIA_CONTEUDO}"
+        )
+    '''
+    cursor.execute(f'''
+        SELECT COALESCE(SUM(min(r.n, i.n)), 0)
+        FROM (SELECT chave, COUNT(*) AS n FROM ({ausentes}) GROUP BY chave) r
+        JOIN (SELECT "{CHAVE_PRODUTO}" AS chave, COUNT(*) AS n FROM vendas
+              WHERE "{ARQUIVO_ORIGEM}" = ? AND rowid > ? GROUP BY "{CHAVE_PRODUTO}") i ON i.chave = r.chave
+    ''', (origem, max_rowid_antes, origem, max_rowid_antes))
+    alteradas = cursor.fetchone()[0]
+    cursor.execute(f"DELETE FROM vendas WHERE rowid IN (SELECT id FROM ({ausentes}))", (origem, max_rowid_antes))
+    return alteradas, cursor.rowcount
+
+def obter_versao_esquema(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='schema_version'")
+    if cursor.fetchone():
+        cursor.execute("SELECT MAX(versao) FROM schema_version")
+        return cursor.fetchone()[0] or 0
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='vendas'")
-    table_exists = cursor.fetchone()
+    # Bancos antigos não têm 'schema_version': a tabela 'vendas' só com colunas TEXT é a versão 1.
+    return 1 if cursor.fetchone() else 0
+
+def _registrar_versao_esquema(cursor, versao):
+    cursor.execute("CREATE TABLE IF NOT EXISTS schema_version (versao INTEGER PRIMARY KEY, aplicada_em TEXT NOT NULL)")
+    cursor.execute("INSERT OR REPLACE INTO schema_version (versao, aplicada_em) VALUES (?, datetime('now'))", (versao,))
 
-    should_create_table = not table_exists
-    should_attempt_import = True
+def _migrar_para_v2(cursor):
+    cursor.execute("PRAGMA table_info(vendas)")
+    colunas_legado = [linha[1] for linha in cursor.fetchall()]
+    colunas_faltantes = [col for col in COLUNAS_CSV_IMPORTACAO if col not in colunas_legado]
+    if colunas_faltantes:
+        raise sqlite3.DatabaseError(f"Tabela 'vendas' legada sem as colunas {colunas_faltantes}.")
 
-    if table_exists:
-        cursor.execute("SELECT COUNT(*) FROM vendas")
-        count = cursor.fetchone()[0]
-        if count > 0:
-            should_attempt_import = False
-            print(f"INFO: Tabela 'vendas' já existe e contém dados em '{db_path}'. Importação do CSV ignorada.")
+    cursor.execute("ALTER TABLE vendas RENAME TO vendas_legado")
+    cursor.execute(SQL_CRIAR_TABELA_VENDAS)
+    nomes = ", ".join(f'"{col}"' for col in COLUNAS_CSV_IMPORTACAO)
+    cursor.execute(f"SELECT {nomes} FROM vendas_legado")
+    df_legado = pd.DataFrame(cursor.fetchall(), columns=COLUNAS_CSV_IMPORTACAO)
+    if not df_legado.empty:
+        _inserir_vendas(cursor, normalizar_vendas(df_legado))
+    cursor.execute("DROP TABLE vendas_legado")
+    print(f"INFO: Tabela 'vendas' migrada para colunas tipadas ({len(df_legado)} linhas convertidas).")
+
+def _hash_linhas(df):
+    # Hash determinístico por linha; números e textos são canonizados para que o valor lido do CSV
+    # e o mesmo valor relido do banco gerem a mesma chave.
+    canonico = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            canonico[col] = df[col].astype('float64')
         else:
-            print(f"INFO: Tabela 'vendas' existe mas está vazia em '{db_path}'. Tentando importar do CSV '{CSV_FILE_NAME}'.")
-    else:
-        print(f"INFO: Tabela 'vendas' não existe em '{db_path}'. Será criada e os dados serão importados do CSV '{CSV_FILE_NAME}'.")
+            canonico[col] = df[col].astype(object).where(df[col].notna(), '').astype(str)
+    return pd.util.hash_pandas_object(canonico, index=False).to_numpy().view(np.int64)
+
+def _ordinais_por_chave(chaves, contagens_por_chave):
+    # Posição de cada linha entre as linhas de mesma chave; 'contagens_por_chave' continua a contagem
+    # entre blocos do mesmo arquivo.
+    locais = pd.Series(chaves).groupby(chaves).cumcount().to_numpy()
+    unicos, contagens_bloco = np.unique(chaves, return_counts=True)
+    deslocamentos = np.array([contagens_por_chave.get(chave, 0) for chave in unicos.tolist()], dtype=np.int64)
+    ordinais = locais + deslocamentos[np.searchsorted(unicos, chaves)]
+    for chave, deslocamento, quantidade in zip(unicos.tolist(), deslocamentos.tolist(), contagens_bloco.tolist()):
+        contagens_por_chave[chave] = deslocamento + quantidade
+    return ordinais
+
+def calcular_chaves_vendas(df_normalizado, ocorrencias_por_conteudo, origem):
+    # Uma venda é identificada por (arquivo de origem, hash do conteúdo, ocorrência). A ocorrência só separa
+    # linhas idênticas repetidas no mesmo arquivo: inserir ou editar uma linha não muda a chave das outras, e
+    # a mesma venda em dois arquivos conta duas vezes. chave_produto (produto + categoria) liga a versão
+    # editada de uma linha à anterior, na contagem de alteradas.
+    df = df_normalizado.copy()
+    df[CHAVE_PRODUTO] = _hash_linhas(df_normalizado[[CSV_PRODUCT_NAME, CSV_CATEGORY]])
+    df[HASH_CONTEUDO] = _hash_linhas(df_normalizado[COLUNAS_VENDAS_NORMALIZADAS])
+    df[OCORRENCIA_CONTEUDO] = _ordinais_por_chave(df[HASH_CONTEUDO].to_numpy(), ocorrencias_por_conteudo)
+    df[ARQUIVO_ORIGEM] = origem
+    return df
+
+def _migrar_para_v3(cursor):
+    cursor.execute(f'ALTER TABLE vendas ADD COLUMN "{CHAVE_PRODUTO}" INTEGER')
+    cursor.execute(f'ALTER TABLE vendas ADD COLUMN "{ORDINAL_PRODUTO}" INTEGER')
+    cursor.execute(f'ALTER TABLE vendas ADD COLUMN "{HASH_CONTEUDO}" INTEGER')
+
+    nomes = ", ".join(f'"{col}"' for col in COLUNAS_VENDAS_NORMALIZADAS)
+    cursor.execute(f"SELECT rowid, {nomes} FROM vendas ORDER BY rowid")
+    df_existente = pd.DataFrame(cursor.fetchall(), columns=['rowid'] + COLUNAS_VENDAS_NORMALIZADAS)
+    if not df_existente.empty:
+        for col in [CSV_RATING, CSV_RATING_COUNT, CSV_DISCOUNTED_PRICE, CSV_ACTUAL_PRICE, CSV_DISCOUNT_PERCENTAGE]:
+            df_existente[col] = pd.to_numeric(df_existente[col], errors='coerce')
+        chaves = _hash_linhas(df_existente[[CSV_PRODUCT_NAME, CSV_CATEGORY]])
+        ordinais = _ordinais_por_chave(chaves, {})
+        hashes = _hash_linhas(df_existente[COLUNAS_VENDAS_NORMALIZADAS])
+        cursor.executemany(
+            f'UPDATE vendas SET "{CHAVE_PRODUTO}" = ?, "{ORDINAL_PRODUTO}" = ?, "{HASH_CONTEUDO}" = ? WHERE rowid = ?',
+            zip(chaves.tolist(), ordinais.tolist(), hashes.tolist(), df_existente['rowid'].tolist())
+        )
+    cursor.execute(f'CREATE UNIQUE INDEX idx_vendas_chave ON vendas ("{CHAVE_PRODUTO}", "{ORDINAL_PRODUTO}")')
+    cursor.execute('''
+    CREATE TABLE importacoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        arquivo TEXT NOT NULL,
+        tamanho INTEGER,
+        modificado_em INTEGER,
+        iniciado_em TEXT,
+        concluido_em TEXT,
+        linhas_lidas INTEGER DEFAULT 0,
+        linhas_novas INTEGER DEFAULT 0,
+        linhas_alteradas INTEGER DEFAULT 0,
+        status TEXT NOT NULL,
+        mensagem TEXT
+    )
+    ''')
+    print(f"INFO: Chaves de linha calculadas para {len(df_existente)} linhas existentes.")
+
+def _migrar_para_v4(cursor):
+    # Coluna gerada: o sentimento acompanha a avaliação sem precisar de backfill nem de código no importador.
+    cursor.execute(f'''
+        ALTER TABLE vendas ADD COLUMN "{CSV_SENTIMENT}" TEXT GENERATED ALWAYS AS (
+            CASE
+                WHEN "{CSV_RATING}" IS NULL THEN 'Não Avaliado'
+                WHEN "{CSV_RATING}" >= 4.0 THEN 'Positivo'
+                WHEN "{CSV_RATING}" >= 3.0 THEN 'Neutro'
+                WHEN "{CSV_RATING}" >= 0 THEN 'Negativo'
+                ELSE 'Não Avaliado'
+            END
+        ) VIRTUAL
+    ''')
+    cursor.execute(f'CREATE INDEX idx_vendas_categoria ON vendas ("{CSV_CATEGORY_MAIN}", "{CSV_DISCOUNTED_PRICE}")')
+    cursor.execute(f'CREATE INDEX idx_vendas_sentimento ON vendas ("{CSV_SENTIMENT}", "{CSV_CATEGORY_MAIN}")')
+
+def _atualizar_arvore_categorias(cursor):
+    # Cria os nós de cada prefixo do caminho ("A", "A|B", "A|B|C"...) e liga cada venda ao nó folha.
+    cursor.execute(f'SELECT DISTINCT "{CSV_CATEGORY}" FROM vendas WHERE "{CSV_CATEGORY_ID}" IS NULL AND "{CSV_CATEGORY}" IS NOT NULL')
+    caminhos_novos = [linha[0] for linha in cursor.fetchall()]
+    if not caminhos_novos:
+        return 0
+
+    cursor.execute("SELECT caminho, id FROM categorias")
+    ids_por_caminho = dict(cursor.fetchall())
+    for caminho_completo in caminhos_novos:
+        partes = caminho_completo.split(SEPARADOR_CATEGORIA)
+        pai_id = None
+        ancestrais = []
+        for nivel in range(1, len(partes) + 1):
+            caminho = SEPARADOR_CATEGORIA.join(partes[:nivel])
+            if caminho not in ids_por_caminho:
+                cursor.execute(
+                    "INSERT INTO categorias (pai_id, nome, caminho, nivel) VALUES (?, ?, ?, ?)",
+                    (pai_id, partes[nivel - 1], caminho, nivel)
+                )
+                novo_id = cursor.lastrowid
+                ids_por_caminho[caminho] = novo_id
+                cursor.executemany(
+                    "INSERT INTO categorias_ancestrais (ancestral_id, descendente_id) VALUES (?, ?)",
+                    [(ancestral_id, novo_id) for ancestral_id in ancestrais + [novo_id]]
+                )
+            pai_id = ids_por_caminho[caminho]
+            ancestrais.append(pai_id)
+
+    cursor.execute(f'''
+        UPDATE vendas SET "{CSV_CATEGORY_ID}" = (SELECT id FROM categorias WHERE caminho = vendas."{CSV_CATEGORY}")
+        WHERE "{CSV_CATEGORY_ID}" IS NULL AND "{CSV_CATEGORY}" IS NOT NULL
+    ''')
+    return len(caminhos_novos)
+
+def _atualizar_resumo_categorias(cursor):
+    # Cada venda conta para o nó folha e para todos os ancestrais (via tabela de fechamento).
+    # A linha ID_CATEGORIA_TODAS guarda o total geral, usado quando nenhuma categoria está selecionada.
+    cursor.execute("DELETE FROM categorias_resumo")
+    cursor.execute(f'''
+        INSERT INTO categorias_resumo (categoria_id, receita, contagem, avaliacao_media)
+        SELECT a.ancestral_id, SUM(v."{CSV_DISCOUNTED_PRICE}"), COUNT(*), AVG(v."{CSV_RATING}")
+        FROM vendas v
+        JOIN categorias_ancestrais a ON a.descendente_id = v."{CSV_CATEGORY_ID}"
+        WHERE v."{CSV_DISCOUNTED_PRICE}" IS NOT NULL
+        GROUP BY a.ancestral_id
+    ''')
+    cursor.execute(f'''
+        INSERT INTO categorias_resumo (categoria_id, receita, contagem, avaliacao_media)
+        SELECT ?, COALESCE(SUM("{CSV_DISCOUNTED_PRICE}"), 0), COUNT(*), AVG("{CSV_RATING}")
+        FROM vendas
+        WHERE "{CSV_DISCOUNTED_PRICE}" IS NOT NULL
+    ''', (ID_CATEGORIA_TODAS,))
+
+def _atualizar_resumo_sentimento(cursor):
+    cursor.execute("DELETE FROM resumo_sentimento")
+    cursor.execute(f'''
+        INSERT INTO resumo_sentimento (categoria_id, sentimento, contagem)
+        SELECT a.ancestral_id, v."{CSV_SENTIMENT}", COUNT(*)
+        FROM vendas v
+        JOIN categorias_ancestrais a ON a.descendente_id = v."{CSV_CATEGORY_ID}"
+        WHERE v."{CSV_DISCOUNTED_PRICE}" IS NOT NULL
+        GROUP BY a.ancestral_id, v."{CSV_SENTIMENT}"
+    ''')
+    cursor.execute(f'''
+        INSERT INTO resumo_sentimento (categoria_id, sentimento, contagem)
+        SELECT ?, "{CSV_SENTIMENT}", COUNT(*)
+        FROM vendas
+        WHERE "{CSV_DISCOUNTED_PRICE}" IS NOT NULL
+        GROUP BY "{CSV_SENTIMENT}"
+    ''', (ID_CATEGORIA_TODAS,))
+
+def _atualizar_tabelas_resumo(cursor):
+    # Chamado dentro da transação da importação: os resumos nunca ficam defasados em relação a 'vendas'.
+    _atualizar_resumo_categorias(cursor)
+    _atualizar_resumo_sentimento(cursor)
+
+def _migrar_para_v5(cursor):
+    cursor.execute('''
+    CREATE TABLE categorias (
+        id INTEGER PRIMARY KEY,
+        pai_id INTEGER REFERENCES categorias(id),
+        nome TEXT NOT NULL,
+        caminho TEXT NOT NULL UNIQUE,
+        nivel INTEGER NOT NULL
+    )
+    ''')
+    cursor.execute("CREATE INDEX idx_categorias_pai ON categorias (pai_id)")
+    cursor.execute('''
+    CREATE TABLE categorias_ancestrais (
+        ancestral_id INTEGER NOT NULL,
+        descendente_id INTEGER NOT NULL,
+        PRIMARY KEY (ancestral_id, descendente_id)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX idx_categorias_ancestrais_desc ON categorias_ancestrais (descendente_id)")
+    cursor.execute('''
+    CREATE TABLE categorias_resumo (
+        categoria_id INTEGER PRIMARY KEY,
+        receita REAL,
+        contagem INTEGER,
+        avaliacao_media REAL
+    )
+    ''')
+    cursor.execute(f'ALTER TABLE vendas ADD COLUMN "{CSV_CATEGORY_ID}" INTEGER')
+    cursor.execute(f'CREATE INDEX idx_vendas_categoria_id ON vendas ("{CSV_CATEGORY_ID}")')
+    caminhos = _atualizar_arvore_categorias(cursor)
+    _atualizar_resumo_categorias(cursor)
+    print(f"INFO: Árvore de categorias criada a partir de {caminhos} caminhos distintos.")
+
+def _migrar_para_v6(cursor):
+    cursor.execute('''
+    CREATE TABLE resumo_sentimento (
+        categoria_id INTEGER NOT NULL,
+        sentimento TEXT NOT NULL,
+        contagem INTEGER NOT NULL,
+        PRIMARY KEY (categoria_id, sentimento)
+    ) WITHOUT ROWID
+    ''')
+    _atualizar_tabelas_resumo(cursor)
+
+def _migrar_para_v7(cursor):
+    # Índice de texto completo com conteúdo externo: o texto continua só em 'vendas'. Os gatilhos atualizam
+    # o índice a cada INSERT/UPDATE/DELETE do importador, dentro da mesma transação.
+    colunas = ", ".join(f'"{col}"' for col in COLUNAS_BUSCA)
+    novos = ", ".join(f'new."{col}"' for col in COLUNAS_BUSCA)
+    antigos = ", ".join(f'old."{col}"' for col in COLUNAS_BUSCA)
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE {TABELA_BUSCA} USING fts5(
+            {colunas}, content='vendas', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER {TABELA_BUSCA}_ai AFTER INSERT ON vendas BEGIN
+            INSERT INTO {TABELA_BUSCA} (rowid, {colunas}) VALUES (new.rowid, {novos});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER {TABELA_BUSCA}_ad AFTER DELETE ON vendas BEGIN
+            INSERT INTO {TABELA_BUSCA} ({TABELA_BUSCA}, rowid, {colunas}) VALUES ('delete', old.rowid, {antigos});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER {TABELA_BUSCA}_au AFTER UPDATE OF {colunas} ON vendas BEGIN
+            INSERT INTO {TABELA_BUSCA} ({TABELA_BUSCA}, rowid, {colunas}) VALUES ('delete', old.rowid, {antigos});
+            INSERT INTO {TABELA_BUSCA} (rowid, {colunas}) VALUES (new.rowid, {novos});
+        END
+    ''')
+    cursor.execute(f"INSERT INTO {TABELA_BUSCA} ({TABELA_BUSCA}) VALUES ('rebuild')")
+    cursor.execute("SELECT COUNT(*) FROM vendas")
+    print(f"INFO: Índice de busca criado para {cursor.fetchone()[0]} linhas.")
+
+def _migrar_para_v8(cursor):
+    # Identidade do banco: um token aleatório gravado na criação (ou na migração) deste arquivo. Um banco
+    # apagado e recriado, ou outro banco migrado, recebe um token novo mesmo que os ids de importação se repitam.
+    cursor.execute("CREATE TABLE banco_identidade (token TEXT NOT NULL, criado_em TEXT NOT NULL)")
+    cursor.execute("INSERT INTO banco_identidade (token, criado_em) VALUES (lower(hex(randomblob(16))), datetime('now'))")
+
+def _migrar_para_v9(cursor):
+    # A chave (produto + categoria, ordinal) misturava vendas de arquivos diferentes e mudava quando uma
+    # linha era inserida no meio do arquivo. A nova chave é (arquivo de origem, hash do conteúdo, ocorrência).
+    # As linhas existentes ficam atribuídas a 'vendas.csv'; o registro 'migracao' em 'importacoes' faz todos
+    # os arquivos serem relidos uma vez, para que as vendas dos extras voltem com a origem certa.
+    cursor.execute("DROP INDEX IF EXISTS idx_vendas_chave")
+    cursor.execute(f'ALTER TABLE vendas DROP COLUMN "{ORDINAL_PRODUTO}"')
+    cursor.execute(f'ALTER TABLE vendas ADD COLUMN "{OCORRENCIA_CONTEUDO}" INTEGER')
+    cursor.execute(f'ALTER TABLE vendas ADD COLUMN "{ARQUIVO_ORIGEM}" TEXT')
+    cursor.execute(f'''
+        UPDATE vendas SET "{ARQUIVO_ORIGEM}" = ?, "{OCORRENCIA_CONTEUDO}" = o.ocorrencia
+        FROM (
+            SELECT rowid AS id, ROW_NUMBER() OVER (PARTITION BY "{HASH_CONTEUDO}" ORDER BY rowid) - 1 AS ocorrencia
+            FROM vendas
+        ) o
+        WHERE o.id = vendas.rowid
+    ''', (CSV_FILE_NAME,))
+    cursor.execute(f'''
+        CREATE UNIQUE INDEX idx_vendas_origem_conteudo
+        ON vendas ("{ARQUIVO_ORIGEM}", "{HASH_CONTEUDO}", "{OCORRENCIA_CONTEUDO}")
+    ''')
+    cursor.execute("ALTER TABLE importacoes ADD COLUMN linhas_removidas INTEGER DEFAULT 0")
+    cursor.execute('''
+        INSERT INTO importacoes (arquivo, iniciado_em, concluido_em, status, mensagem)
+        VALUES ('vendas', datetime('now', 'localtime'), datetime('now', 'localtime'), 'migracao',
+                'Chaves refeitas por conteúdo e arquivo de origem')
+    ''')
+    cursor.execute("SELECT COUNT(*) FROM vendas")
+    print(f"INFO: Chaves de {cursor.fetchone()[0]} linhas refeitas por conteúdo; os arquivos CSV serão relidos uma vez.")
 
-    if should_create_table:
+MIGRACOES = {
+    2: _migrar_para_v2,
+    3: _migrar_para_v3,
+    4: _migrar_para_v4,
+    5: _migrar_para_v5,
+    6: _migrar_para_v6,
+    7: _migrar_para_v7,
+    8: _migrar_para_v8,
+    9: _migrar_para_v9,
+}
+
+def migrar_esquema(conn):
+    cursor = conn.cursor()
+    versao_atual = obter_versao_esquema(cursor)
+
+    if versao_atual == 0:
+        conn.execute("BEGIN")
         try:
-            cursor.execute(f'''
-            CREATE TABLE vendas (
-                "{CSV_PRODUCT_NAME}" TEXT,
-                "{CSV_CATEGORY}" TEXT,
-                "{CSV_RATING}" TEXT,
-                "{CSV_RATING_COUNT}" TEXT,
-                "{CSV_DISCOUNTED_PRICE}" TEXT,
-                "{CSV_ACTUAL_PRICE}" TEXT,
-                "{CSV_DISCOUNT_PERCENTAGE}" TEXT
-            )
-            ''')
-            print(f"INFO: Tabela 'vendas' criada em '{db_path}'.")
+            cursor.execute(SQL_CRIAR_TABELA_VENDAS)
+            _registrar_versao_esquema(cursor, 2)
             conn.commit()
-        except sqlite3.Error as e:
-            print(f"ERRO ao criar tabela 'vendas' em '{db_path}': {e}")
-            conn.close()
-            return False
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        print("INFO: Tabela 'vendas' criada (esquema versão 2).")
+        versao_atual = 2
 
-    if should_attempt_import:
-        caminho_csv = resource_path_backend(CSV_FILE_NAME)
+    for versao in sorted(MIGRACOES):
+        if versao <= versao_atual:
+            continue
+        print(f"INFO: Aplicando migração do esquema para a versão {versao}...")
+        conn.execute("BEGIN")
+        try:
+            MIGRACOES[versao](cursor)
+            _registrar_versao_esquema(cursor, versao)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        versao_atual = versao
+    return versao_atual
 
-        if not os.path.exists(caminho_csv):
-            expected_base_path = ""
-            if hasattr(sys, '_MEIPASS'):
-                expected_base_path = sys._MEIPASS
-            else:
-                expected_base_path = os.path.abspath(os.path.dirname(__file__))
-            print(f"AVISO: Arquivo '{CSV_FILE_NAME}' não encontrado em '{expected_base_path}'. O caminho completo verificado foi '{caminho_csv}'. Não é possível importar dados para o banco '{db_path}'. A tabela 'vendas' pode estar vazia.")
-        else:
+def _imprimir_progresso_importacao(progresso):
+    if progresso["concluido"]:
+        print(f"INFO: Importação concluída: {progresso['linhas']} linhas - {progresso['linhas_por_segundo']:,.0f} linhas/s")
+    elif progresso["bytes_totais"]:
+        percentual = 100.0 * progresso["bytes_lidos"] / progresso["bytes_totais"]
+        print(f"INFO: Importação: {progresso['linhas']} linhas ({percentual:.0f}%) - {progresso['linhas_por_segundo']:,.0f} linhas/s")
+    else:
+        print(f"INFO: Importação: {progresso['linhas']} linhas - {progresso['linhas_por_segundo']:,.0f} linhas/s")
+
+def _aplicar_pragmas_importacao(conn):
+    anteriores = {
+        "synchronous": conn.execute("PRAGMA synchronous").fetchone()[0],
+        "cache_size": conn.execute("PRAGMA cache_size").fetchone()[0],
+    }
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute(f"PRAGMA cache_size={IMPORTACAO_CACHE_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return anteriores
+
+def _restaurar_pragmas_importacao(conn, anteriores):
+    conn.execute(f"PRAGMA synchronous={int(anteriores['synchronous'])}")
+    conn.execute(f"PRAGMA cache_size={int(anteriores['cache_size'])}")
+
+def importar_csv_em_blocos(conn, caminho_csv, tamanho_bloco=TAMANHO_BLOCO_IMPORTACAO, callback_progresso=None):
+    # Lê o CSV em blocos limitados e grava tudo numa única transação: a memória de pico é a de um bloco.
+    # Só linhas novas ou alteradas são gravadas, e vendas que saíram do arquivo são apagadas; o lote fica
+    # registrado na tabela 'importacoes'.
+    callback_progresso = callback_progresso or _imprimir_progresso_importacao
+    st = os.stat(caminho_csv)
+    bytes_totais = st.st_size
+    origem = _origem_arquivo(caminho_csv)
+    cursor = conn.cursor()
+    anteriores = _aplicar_pragmas_importacao(conn)
+    resultado = {"linhas_lidas": 0, "linhas_novas": 0, "linhas_alteradas": 0, "linhas_removidas": 0}
+    ocorrencias_por_conteudo = {}
+    inicio = time.perf_counter()
+    iniciado_em = time.strftime('%Y-%m-%d %H:%M:%S')
+    try:
+        with open(caminho_csv, 'rb') as arquivo:
+            leitor = pd.read_csv(arquivo, usecols=COLUNAS_CSV_IMPORTACAO, dtype=str, chunksize=tamanho_bloco)
+            conn.execute("BEGIN")
             try:
-                print(f"INFO: Lendo dados de '{caminho_csv}'...")
-                df_csv = pd.read_csv(caminho_csv)
-
-                if df_csv.empty:
-                    print(f"AVISO: O arquivo CSV '{caminho_csv}' foi lido mas está vazio. Nenhum dado será importado para a tabela 'vendas'.")
-                else:
-                    print(f"INFO: Importando dados de '{caminho_csv}' para a tabela 'vendas' em '{db_path}'...")
-                    colunas_definidas_na_tabela = [
-                        CSV_PRODUCT_NAME, CSV_CATEGORY, CSV_RATING, CSV_RATING_COUNT,
-                        CSV_DISCOUNTED_PRICE, CSV_ACTUAL_PRICE, CSV_DISCOUNT_PERCENTAGE
-                    ]
-                    
-                    print(f"DEBUG: Colunas lidas do CSV '{CSV_FILE_NAME}': {df_csv.columns.tolist()}")
-                    print(f"DEBUG: Colunas esperadas/definidas na tabela 'vendas' (baseado nas constantes CSV_): {colunas_definidas_na_tabela}")
-
-                    colunas_faltantes_no_csv = [col_esperada for col_esperada in colunas_definidas_na_tabela if col_esperada not in df_csv.columns]
-                    
-                    if colunas_faltantes_no_csv:
-                        print(f"ERRO CRÍTICO DE IMPORTAÇÃO: O arquivo CSV '{CSV_FILE_NAME}' não contém as seguintes colunas, que são necessárias para a tabela 'vendas': {colunas_faltantes_no_csv}.")
-                        print(f"ERRO CRÍTICO DE IMPORTAÇÃO: Colunas encontradas no CSV: {df_csv.columns.tolist()}.")
-                        print(f"ERRO CRÍTICO DE IMPORTAÇÃO: Verifique se os nomes das colunas no CSV correspondem exatamente às constantes CSV_... no backend.py.")
-                        print(f"ERRO CRÍTICO DE IMPORTAÇÃO: A importação de dados foi abortada.")
-                        conn.close()
-                        return False
-
-                    df_para_importar = df_csv[colunas_definidas_na_tabela]
-
-                    df_para_importar.to_sql('vendas', conn, if_exists='append', index=False)
-                    conn.commit()
-                    print(f"INFO: Dados de '{CSV_FILE_NAME}' importados com sucesso para a tabela 'vendas'.")
-
-            except pd.errors.EmptyDataError:
-                print(f"AVISO: O arquivo CSV '{caminho_csv}' está vazio (EmptyDataError). Nenhum dado será importado.")
-            except FileNotFoundError:
-                print(f"ERRO: Arquivo CSV '{caminho_csv}' não encontrado ao tentar ler com pandas.")
-                if conn: conn.close()
-                return False
-            except KeyError as e:
-                print(f"ERRO CRÍTICO DE IMPORTAÇÃO (KeyError): Uma coluna esperada ('{e}') não foi encontrada no CSV ao tentar preparar os dados para o banco.")
-                print(f"ERRO CRÍTICO DE IMPORTAÇÃO: Colunas lidas do CSV: {df_csv.columns.tolist() if 'df_csv' in locals() and hasattr(df_csv, 'columns') else 'Não foi possível ler as colunas do CSV'}.")
-                print(f"ERRO CRÍTICO DE IMPORTAÇÃO: Verifique os nomes das colunas no '{CSV_FILE_NAME}' e as constantes CSV_... no backend.py.")
-                if conn:
-                    conn.rollback()
-                    conn.close()
-                return False
+                cursor.execute('''
+                    CREATE TEMP TABLE IF NOT EXISTS importacao_chaves (
+                        hash_conteudo INTEGER, ocorrencia INTEGER, PRIMARY KEY (hash_conteudo, ocorrencia)
+                    ) WITHOUT ROWID
+                ''')
+                cursor.execute("DELETE FROM temp.importacao_chaves")
+                cursor.execute("SELECT COALESCE(MAX(rowid), 0) FROM vendas")
+                max_rowid_antes = cursor.fetchone()[0]
+                for bloco in leitor:
+                    df_bloco = calcular_chaves_vendas(normalizar_vendas(bloco[COLUNAS_CSV_IMPORTACAO]), ocorrencias_por_conteudo, origem)
+                    _inserir_vendas_novas(cursor, df_bloco)
+                    resultado["linhas_lidas"] += len(bloco)
+                    decorrido = time.perf_counter() - inicio
+                    callback_progresso({
+                        "arquivo": caminho_csv,
+                        "linhas": resultado["linhas_lidas"],
+                        "bytes_lidos": min(arquivo.tell(), bytes_totais),
+                        "bytes_totais": bytes_totais,
+                        "linhas_por_segundo": resultado["linhas_lidas"] / decorrido if decorrido > 0 else 0.0,
+                        "concluido": False,
+                    })
+                cursor.execute("SELECT COALESCE(MAX(rowid), 0) FROM vendas")
+                # Sem AUTOINCREMENT, cada INSERT recebe MAX(rowid) + 1, então a diferença conta as linhas gravadas.
+                inseridas = cursor.fetchone()[0] - max_rowid_antes
+                alteradas, apagadas = _remover_vendas_ausentes(cursor, origem, max_rowid_antes)
+                resultado["linhas_novas"] = inseridas - alteradas
+                resultado["linhas_alteradas"] = alteradas
+                resultado["linhas_removidas"] = apagadas - alteradas
+                if inseridas or apagadas:
+                    _atualizar_arvore_categorias(cursor)
+                    _atualizar_tabelas_resumo(cursor)
+                cursor.execute('''
+                    INSERT INTO importacoes (arquivo, tamanho, modificado_em, iniciado_em, concluido_em,
+                                             linhas_lidas, linhas_novas, linhas_alteradas, linhas_removidas, status)
+                    VALUES (?, ?, ?, ?, datetime('now', 'localtime'), ?, ?, ?, ?, 'sucesso')
+                ''', (os.path.abspath(caminho_csv), st.st_size, st.st_mtime_ns, iniciado_em, resultado["linhas_lidas"],
+                      resultado["linhas_novas"], resultado["linhas_alteradas"], resultado["linhas_removidas"]))
+                conn.commit()
             except Exception as e:
-                print(f"ERRO GERAL ao importar dados do CSV '{caminho_csv}' para o banco de dados '{db_path}': {type(e).__name__} - {e}")
-                if conn:
-                    conn.rollback()
-                    conn.close()
+                conn.rollback()
+                cursor.execute('''
+                    INSERT INTO importacoes (arquivo, tamanho, modificado_em, iniciado_em, concluido_em, status, mensagem)
+                    VALUES (?, ?, ?, ?, datetime('now', 'localtime'), 'erro', ?)
+                ''', (os.path.abspath(caminho_csv), st.st_size, st.st_mtime_ns, iniciado_em, f"{type(e).__name__} - {e}"))
+                conn.commit()
+                raise
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS temp.importacao_chaves")
+        _restaurar_pragmas_importacao(conn, anteriores)
+
+    decorrido = time.perf_counter() - inicio
+    callback_progresso({
+        "arquivo": caminho_csv,
+        "linhas": resultado["linhas_lidas"],
+        "bytes_lidos": bytes_totais,
+        "bytes_totais": bytes_totais,
+        "linhas_por_segundo": resultado["linhas_lidas"] / decorrido if decorrido > 0 else 0.0,
+        "concluido": True,
+    })
+    return resultado
+
+def _origem_arquivo(caminho_csv):
+    # Nome do arquivo relativo à pasta de dados ('vendas.csv', 'importar/extra.csv'), gravado em cada venda.
+    try:
+        return os.path.relpath(os.path.abspath(caminho_csv), resource_path_backend('')).replace(os.sep, '/')
+    except ValueError:
+        return os.path.abspath(caminho_csv)
+
+def _arquivo_ja_importado(cursor, caminho_csv):
+    # Importações anteriores à última migração de chaves não contam: o arquivo precisa ser relido uma vez.
+    st = os.stat(caminho_csv)
+    cursor.execute('''
+        SELECT 1 FROM importacoes
+        WHERE arquivo = ? AND tamanho = ? AND modificado_em = ? AND status = 'sucesso'
+          AND id > COALESCE((SELECT MAX(id) FROM importacoes WHERE status = 'migracao'), 0)
+        LIMIT 1
+    ''', (os.path.abspath(caminho_csv), st.st_size, st.st_mtime_ns))
+    return cursor.fetchone() is not None
+
+def listar_arquivos_importacao():
+    # 'vendas.csv' primeiro; depois os CSVs extras deixados na pasta 'importar', em ordem alfabética.
+    arquivos = []
+    caminho_csv = resource_path_backend(CSV_FILE_NAME)
+    if os.path.exists(caminho_csv):
+        arquivos.append(caminho_csv)
+    pasta_importacao = resource_path_backend(IMPORT_DIR_NAME)
+    if os.path.isdir(pasta_importacao):
+        for nome in sorted(os.listdir(pasta_importacao)):
+            if nome.lower().endswith('.csv'):
+                arquivos.append(os.path.join(pasta_importacao, nome))
+    return arquivos
+
+def inicializar_banco_de_dados(callback_progresso=None, tamanho_bloco=TAMANHO_BLOCO_IMPORTACAO):
+    gerenciador = obter_gerenciador_conexoes()
+    with gerenciador.escrita() as conn:
+        return _importar_arquivos_pendentes(conn, gerenciador.db_path, callback_progresso, tamanho_bloco)
+
+def _importar_arquivos_pendentes(conn, db_path, callback_progresso, tamanho_bloco):
+    cursor = conn.cursor()
+
+    try:
+        versao_esquema = migrar_esquema(conn)
+    except Exception as e:
+        print(f"ERRO ao criar/migrar o esquema do banco '{db_path}': {type(e).__name__} - {e}")
+        return False
+
+    caminho_csv = resource_path_backend(CSV_FILE_NAME)
+    if not os.path.exists(caminho_csv):
+        expected_base_path = ""
+        if hasattr(sys, '_MEIPASS'):
+            expected_base_path = sys._MEIPASS
+        else:
+            expected_base_path = os.path.abspath(os.path.dirname(__file__))
+        print(f"AVISO: Arquivo '{CSV_FILE_NAME}' não encontrado em '{expected_base_path}'. O caminho completo verificado foi '{caminho_csv}'. Não é possível importar dados para o banco '{db_path}'. A tabela 'vendas' pode estar vazia.")
+
+    houve_alteracao = False
+    for caminho_arquivo in listar_arquivos_importacao():
+        nome_arquivo = os.path.basename(caminho_arquivo)
+        if _arquivo_ja_importado(cursor, caminho_arquivo):
+            print(f"INFO: '{nome_arquivo}' não mudou desde a última importação para '{db_path}' (esquema versão {versao_esquema}). Importação ignorada.")
+            continue
+
+        try:
+            print(f"INFO: Lendo cabeçalho de '{caminho_arquivo}'...")
+            colunas_csv = pd.read_csv(caminho_arquivo, nrows=0).columns.tolist()
+            colunas_definidas_na_tabela = COLUNAS_CSV_IMPORTACAO
+
+            print(f"DEBUG: Colunas lidas do CSV '{nome_arquivo}': {colunas_csv}")
+            print(f"DEBUG: Colunas esperadas/definidas na tabela 'vendas' (baseado nas constantes CSV_): {colunas_definidas_na_tabela}")
+
+            colunas_faltantes_no_csv = [col_esperada for col_esperada in colunas_definidas_na_tabela if col_esperada not in colunas_csv]
+
+            if colunas_faltantes_no_csv:
+                print(f"ERRO CRÍTICO DE IMPORTAÇÃO: O arquivo CSV '{nome_arquivo}' não contém as seguintes colunas, que são necessárias para a tabela 'vendas': {colunas_faltantes_no_csv}.")
+                print(f"ERRO CRÍTICO DE IMPORTAÇÃO: Colunas encontradas no CSV: {colunas_csv}.")
+                print(f"ERRO CRÍTICO DE IMPORTAÇÃO: Verifique se os nomes das colunas no CSV correspondem exatamente às constantes CSV_... no backend.py.")
+                print(f"ERRO CRÍTICO DE IMPORTAÇÃO: A importação de dados foi abortada.")
                 return False
-    
-    conn.close()
+
+            print(f"INFO: Importando alterações de '{caminho_arquivo}' para a tabela 'vendas' em '{db_path}' em blocos de {tamanho_bloco} linhas...")
+            resultado = importar_csv_em_blocos(conn, caminho_arquivo, tamanho_bloco, callback_progresso)
+
+            if resultado["linhas_lidas"] == 0:
+                print(f"AVISO: O arquivo CSV '{caminho_arquivo}' foi lido mas está vazio. Nenhum dado será importado para a tabela 'vendas'.")
+            else:
+                print(f"INFO: '{nome_arquivo}': {resultado['linhas_lidas']} linhas lidas, {resultado['linhas_novas']} novas, {resultado['linhas_alteradas']} alteradas, {resultado['linhas_removidas']} removidas.")
+            if resultado["linhas_novas"] or resultado["linhas_alteradas"] or resultado["linhas_removidas"]:
+                houve_alteracao = True
+
+        except pd.errors.EmptyDataError:
+            print(f"AVISO: O arquivo CSV '{caminho_arquivo}' está vazio (EmptyDataError). Nenhum dado será importado.")
+        except FileNotFoundError:
+            print(f"ERRO: Arquivo CSV '{caminho_arquivo}' não encontrado ao tentar ler com pandas.")
+            return False
+        except (KeyError, ValueError) as e:
+            print(f"ERRO CRÍTICO DE IMPORTAÇÃO ({type(e).__name__}): Uma coluna esperada não foi encontrada ou não pôde ser lida no CSV ao tentar preparar os dados para o banco: {e}")
+            print(f"ERRO CRÍTICO DE IMPORTAÇÃO: Colunas lidas do CSV: {colunas_csv if 'colunas_csv' in locals() else 'Não foi possível ler as colunas do CSV'}.")
+            print(f"ERRO CRÍTICO DE IMPORTAÇÃO: Verifique os nomes das colunas no '{nome_arquivo}' e as constantes CSV_... no backend.py.")
+            return False
+        except Exception as e:
+            print(f"ERRO GERAL ao importar dados do CSV '{caminho_arquivo}' para o banco de dados '{db_path}': {type(e).__name__} - {e}")
+            return False
+
+    if houve_alteracao:
+        snapshot_cache.limpar_snapshots(db_path)
+
     return True
 
-def carregar_dados():
-    conn, db_path = get_db_connection()
+def compactar_dataframe(df):
+    # Perfil compacto: float32 nos valores, inteiros de 32 bits quando não há NaN e nomes de produto
+    # codificados como dicionário (cada nome longo fica guardado uma única vez).
+    for col in [COL_VALOR, COL_PRECO, COL_AVALIACAO, COL_PERCENTUAL_DESCONTO]:
+        if col in df.columns:
+            df[col] = df[col].astype('float32')
+    if COL_CONTAGEM_AVALIACOES in df.columns:
+        contagens = df[COL_CONTAGEM_AVALIACOES]
+        df[COL_CONTAGEM_AVALIACOES] = contagens.astype('int32') if contagens.notna().all() else contagens.astype('float32')
+    if COL_CATEGORIA_ID in df.columns and df[COL_CATEGORIA_ID].notna().all():
+        df[COL_CATEGORIA_ID] = df[COL_CATEGORIA_ID].astype('int32')
+    if COL_ID_VENDA in df.columns and (df.empty or df[COL_ID_VENDA].max() < 2**31):
+        df[COL_ID_VENDA] = df[COL_ID_VENDA].astype('int32')
+    if COL_NOME_PRODUTO in df.columns:
+        df[COL_NOME_PRODUTO] = df[COL_NOME_PRODUTO].astype('category')
+    return df
+
+def carregar_dados(usar_cache=True, perfil=None):
+    perfil = perfil or PERFIL_CARGA
+    gerenciador = obter_gerenciador_conexoes()
+    db_path = gerenciador.db_path
+    if not os.path.exists(db_path):
+        print(f"ERRO: A tabela 'vendas' não existe no banco de dados '{db_path}'. Execute a inicialização primeiro.")
+        return None
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='vendas'")
-        if not cursor.fetchone():
-            print(f"ERRO: A tabela 'vendas' não existe no banco de dados '{db_path}'. Execute a inicialização primeiro.")
-            return None
-
-        df = pd.read_sql_query("SELECT * FROM vendas", conn)
-
-        if df.empty:
-            print(f"INFO: A tabela 'vendas' no banco de dados '{db_path}' está vazia.")
-            return pd.DataFrame()
-
-        colunas_db_originais_necessarias = [
-            CSV_CATEGORY,
-            CSV_DISCOUNTED_PRICE,
-            CSV_PRODUCT_NAME
-        ]
-        colunas_faltantes_db = [col for col in colunas_db_originais_necessarias if col not in df.columns]
-
-        if colunas_faltantes_db:
-            print(f"ERRO: As seguintes colunas essenciais não foram encontradas na tabela 'vendas' do banco de dados: {', '.join(colunas_faltantes_db)}.\nINFO: Colunas encontradas na tabela: {df.columns.tolist()}")
-            return None
-
-        df = df.rename(columns={
-            CSV_CATEGORY: COL_CATEGORIA,
-            CSV_PRODUCT_NAME: COL_NOME_PRODUTO,
-            CSV_DISCOUNTED_PRICE: COL_VALOR,
-            CSV_RATING: COL_AVALIACAO,
-            CSV_RATING_COUNT: COL_CONTAGEM_AVALIACOES,
-            CSV_DISCOUNT_PERCENTAGE: COL_PERCENTUAL_DESCONTO,
-            CSV_ACTUAL_PRICE: COL_PRECO
-        })
-
-        if COL_VALOR in df.columns:
-            df[COL_VALOR] = df[COL_VALOR].astype(str).str.replace('₹', '', regex=False).str.replace(',', '', regex=False)
-            df[COL_VALOR] = pd.to_numeric(df[COL_VALOR], errors='coerce')
-            df.dropna(subset=[COL_VALOR], inplace=True)
-
-        
-        if COL_PRECO in df.columns:
-            df[COL_PRECO] = df[COL_PRECO].astype(str).str.replace('₹', '', regex=False).str.replace(',', '', regex=False)
-            df[COL_PRECO] = pd.to_numeric(df[COL_PRECO], errors='coerce')
-
-        if COL_AVALIACAO in df.columns:
-            df[COL_AVALIACAO] = df[COL_AVALIACAO].astype(str).str.extract(r'(\d+\.?\d*)').astype(float)
-            df[COL_SENTIMENTO] = df[COL_AVALIACAO].apply(classificar_sentimento)
-
-        if COL_CONTAGEM_AVALIACOES in df.columns:
-            df[COL_CONTAGEM_AVALIACOES] = df[COL_CONTAGEM_AVALIACOES].astype(str).str.replace(',', '', regex=False)
-            df[COL_CONTAGEM_AVALIACOES] = pd.to_numeric(df[COL_CONTAGEM_AVALIACOES], errors='coerce')
-
-        if COL_PERCENTUAL_DESCONTO in df.columns:
-            df[COL_PERCENTUAL_DESCONTO] = df[COL_PERCENTUAL_DESCONTO].astype(str).str.replace('%', '', regex=False)
-            df[COL_PERCENTUAL_DESCONTO] = pd.to_numeric(df[COL_PERCENTUAL_DESCONTO], errors='coerce')
-
-        if COL_CATEGORIA in df.columns:
-            df[COL_CATEGORIA] = df[COL_CATEGORIA].astype(str).str.split('|').str[0]
-        else:
-            print(f"ERRO: Coluna '{COL_CATEGORIA}' (mapeada de '{CSV_CATEGORY}') não encontrada após o carregamento e renomeação.")
-            return None
-        
-        if COL_NOME_PRODUTO not in df.columns:
-            print(f"ERRO: Coluna '{COL_NOME_PRODUTO}' (mapeada de '{CSV_PRODUCT_NAME}') não encontrada após o carregamento e renomeação.")
-            return None
-            
-        return df
-        
+        with gerenciador.leitura() as conn:
+            return _carregar_dados_com_conexao(gerenciador, conn, usar_cache, perfil)
     except sqlite3.Error as e:
         print(f"ERRO de Banco de Dados: Erro ao carregar dados de '{db_path}': {e}")
         return None
     except Exception as e:
         print(f"ERRO: Ocorreu um erro inesperado ao carregar os dados do banco de dados '{db_path}': {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
-def verificar_login(username, password):
-    if username in USUARIOS_FUNCIONARIOS:
-        user_data = USUARIOS_FUNCIONARIOS[username]
-        if user_data["password"] == password and user_data.get("active", False):
-            return "funcionario"
-    if username in USUARIOS_GERENTES and USUARIOS_GERENTES[username] == password:
-        return "gerente"
-    return None
+
+def _carregar_dados_com_conexao(gerenciador, conn, usar_cache, perfil):
+    db_path = gerenciador.db_path
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='vendas'")
+    if not cursor.fetchone():
+        print(f"ERRO: A tabela 'vendas' não existe no banco de dados '{db_path}'. Execute a inicialização primeiro.")
+        return None
+
+    if obter_versao_esquema(cursor) < SCHEMA_VERSION:
+        with gerenciador.escrita() as conn_escrita:
+            migrar_esquema(conn_escrita)
+
+    chave_cache = snapshot_cache.chave_snapshot(db_path, f"{SCHEMA_VERSION}-{perfil}")
+    if usar_cache:
+        df_cache = snapshot_cache.ler_snapshot(db_path, chave_cache)
+        if df_cache is not None:
+            print(f"INFO: Dados carregados do snapshot em cache de '{db_path}'.")
+            return df_cache
+
+    # As colunas já estão tipadas no banco; 'category_main' guarda o primeiro nível da categoria.
+    df = pd.read_sql_query(f'''
+        SELECT rowid AS "{COL_ID_VENDA}", "{CSV_PRODUCT_NAME}", "{CSV_CATEGORY_MAIN}" AS "{CSV_CATEGORY}", "{CSV_RATING}", "{CSV_RATING_COUNT}",
+               "{CSV_DISCOUNTED_PRICE}", "{CSV_ACTUAL_PRICE}", "{CSV_DISCOUNT_PERCENTAGE}", "{CSV_CATEGORY_ID}"
+        FROM vendas
+        WHERE "{CSV_DISCOUNTED_PRICE}" IS NOT NULL
+    ''', conn)
+
+    if df.empty:
+        print(f"INFO: A tabela 'vendas' no banco de dados '{db_path}' está vazia.")
+        return pd.DataFrame()
+
+    df = df.rename(columns={
+        CSV_CATEGORY: COL_CATEGORIA,
+        CSV_PRODUCT_NAME: COL_NOME_PRODUTO,
+        CSV_DISCOUNTED_PRICE: COL_VALOR,
+        CSV_RATING: COL_AVALIACAO,
+        CSV_RATING_COUNT: COL_CONTAGEM_AVALIACOES,
+        CSV_DISCOUNT_PERCENTAGE: COL_PERCENTUAL_DESCONTO,
+        CSV_ACTUAL_PRICE: COL_PRECO
+    })
+
+    df[COL_SENTIMENTO] = classificar_sentimento_vetorizado(df[COL_AVALIACAO].to_numpy())
+    df[COL_CATEGORIA] = df[COL_CATEGORIA].astype('category')
+    if perfil == PERFIL_CARGA_COMPACTO:
+        df = compactar_dataframe(df)
+
+    if COL_CATEGORIA not in df.columns:
+        print(f"ERRO: Coluna '{COL_CATEGORIA}' (mapeada de '{CSV_CATEGORY}') não encontrada após o carregamento e renomeação.")
+        return None
+    
+    if COL_NOME_PRODUTO not in df.columns:
+        print(f"ERRO: Coluna '{COL_NOME_PRODUTO}' (mapeada de '{CSV_PRODUCT_NAME}') não encontrada após o carregamento e renomeação.")
+        return None
+
+    snapshot_cache.salvar_snapshot(db_path, chave_cache, df)
+    return df
+
+DIMENSOES_SQL = {
+    "categoria": (CSV_CATEGORY_MAIN, COL_CATEGORIA),
+    "sentimento": (CSV_SENTIMENT, COL_SENTIMENTO),
+    "produto": (CSV_PRODUCT_NAME, COL_NOME_PRODUTO),
+}
+
+METRICAS_SQL = {
+    "receita": (f'COALESCE(SUM("{CSV_DISCOUNTED_PRICE}"), 0)', COL_VALOR),
+    "contagem": ("COUNT(*)", "Contagem"),
+    "ticket_medio": (f'AVG("{CSV_DISCOUNTED_PRICE}")', "Ticket Médio"),
+    "avaliacao_media": (f'AVG("{CSV_RATING}")', "Avaliação Média"),
+}
+
+def montar_consulta_busca(texto):
+    # Cada palavra vira um termo de prefixo entre aspas ("usb"* "c"* "cabl"*): todas precisam casar e
+    # nada do que foi digitado é interpretado como sintaxe do FTS5.
+    termos = re.findall(r'\w+', texto or '')
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+def buscar_produtos(texto, limite=None):
+    # rowids de 'vendas' que casam com a busca, do mais relevante (bm25) para o menos.
+    consulta = montar_consulta_busca(texto)
+    if not consulta:
+        return np.zeros(0, dtype=np.int64)
+    sql = f"SELECT rowid FROM {TABELA_BUSCA} WHERE {TABELA_BUSCA} MATCH ? ORDER BY rank"
+    parametros = [consulta]
+    if limite:
+        sql += " LIMIT ?"
+        parametros.append(int(limite))
+    gerenciador = obter_gerenciador_conexoes()
+    try:
+        with gerenciador.leitura() as conn:
+            linhas = conn.execute(sql, parametros).fetchall()
+    except sqlite3.Error as e:
+        print(f"ERRO de Banco de Dados: Erro na busca por '{texto}' em '{gerenciador.db_path}': {e}")
+        return None
+    return np.fromiter((linha[0] for linha in linhas), dtype=np.int64, count=len(linhas))
+
+def montar_where_filtros(filtros):
+    # Mesmo recorte de carregar_dados: linhas sem preço com desconto nunca entram no dashboard.
+    condicoes = [f'"{CSV_DISCOUNTED_PRICE}" IS NOT NULL']
+    parametros = []
+    filtros = filtros or {}
+
+    categoria = filtros.get("categoria")
+    if categoria and categoria != "Todas":
+        condicoes.append(f'"{CSV_CATEGORY_MAIN}" = ?')
+        parametros.append(categoria)
+    categoria_id = filtros.get("categoria_id")
+    if categoria_id is not None:
+        condicoes.append(f'"{CSV_CATEGORY_ID}" IN (SELECT descendente_id FROM categorias_ancestrais WHERE ancestral_id = ?)')
+        parametros.append(int(categoria_id))
+    sentimento = filtros.get("sentimento")
+    if sentimento and sentimento != "Todos":
+        condicoes.append(f'"{CSV_SENTIMENT}" = ?')
+        parametros.append(sentimento)
+    busca = montar_consulta_busca(filtros.get("busca"))
+    if busca:
+        condicoes.append(f'rowid IN (SELECT rowid FROM {TABELA_BUSCA} WHERE {TABELA_BUSCA} MATCH ?)')
+        parametros.append(busca)
+    for chave, coluna, operador in [
+        ("valor_min", CSV_DISCOUNTED_PRICE, ">="), ("valor_max", CSV_DISCOUNTED_PRICE, "<="),
+        ("avaliacao_min", CSV_RATING, ">="), ("avaliacao_max", CSV_RATING, "<="),
+        ("desconto_min", CSV_DISCOUNT_PERCENTAGE, ">="), ("desconto_max", CSV_DISCOUNT_PERCENTAGE, "<="),
+    ]:
+        if filtros.get(chave) is not None:
+            condicoes.append(f'"{coluna}" {operador} ?')
+            parametros.append(filtros[chave])
+    return " AND ".join(condicoes), parametros
+
+METRICAS_RESUMO = {
+    "receita": "r.receita",
+    "contagem": "r.contagem",
+    "ticket_medio": "CASE WHEN r.contagem > 0 THEN r.receita / r.contagem END",
+    "avaliacao_media": "r.avaliacao_media",
+}
+
+def _consultar_resumo_materializado(conn, filtros, group_by, metricas, ordenar_por, limite):
+    # Atende pelas tabelas de resumo as consultas que só filtram por categoria (ou nenhuma);
+    # devolve None quando a combinação exige varrer 'vendas'.
+    filtros_ativos = {chave: valor for chave, valor in (filtros or {}).items() if valor is not None and valor != "Todas"}
+    if set(filtros_ativos) - {"categoria_id"}:
+        return None
+    categoria_id = int(filtros_ativos.get("categoria_id", ID_CATEGORIA_TODAS))
+    # Para "Todas" o agrupamento por categoria usa as raízes; para um nó, o próprio nó sob o nome da raiz.
+    if categoria_id == ID_CATEGORIA_TODAS:
+        nos_categoria = "SELECT id AS no_id, nome AS raiz FROM categorias WHERE pai_id IS NULL"
+        parametros_nos = []
+    else:
+        nos_categoria = f"SELECT c.id AS no_id, substr(c.caminho, 1, instr(c.caminho || '{SEPARADOR_CATEGORIA}', '{SEPARADOR_CATEGORIA}') - 1) AS raiz FROM categorias c WHERE c.id = ?"
+        parametros_nos = [categoria_id]
+
+    if group_by in ([], ["categoria"]) and all(m in METRICAS_RESUMO for m in metricas):
+        colunas = [f'{METRICAS_RESUMO[m]} AS "{METRICAS_SQL[m][1]}"' for m in metricas]
+        if not group_by:
+            sql = f'SELECT {", ".join(colunas)} FROM categorias_resumo r WHERE r.categoria_id = ?'
+            parametros = [categoria_id]
+        else:
+            sql = f'SELECT n.raiz AS "{COL_CATEGORIA}", {", ".join(colunas)} FROM ({nos_categoria}) n JOIN categorias_resumo r ON r.categoria_id = n.no_id'
+            parametros = parametros_nos
+    elif group_by == ["sentimento"] and list(metricas) == ["contagem"]:
+        sql = f'SELECT r.sentimento AS "{COL_SENTIMENTO}", r.contagem AS "Contagem" FROM resumo_sentimento r WHERE r.categoria_id = ?'
+        parametros = [categoria_id]
+    elif group_by == ["categoria", "sentimento"] and list(metricas) == ["contagem"]:
+        sql = f'SELECT n.raiz AS "{COL_CATEGORIA}", r.sentimento AS "{COL_SENTIMENTO}", r.contagem AS "Contagem" FROM ({nos_categoria}) n JOIN resumo_sentimento r ON r.categoria_id = n.no_id'
+        parametros = parametros_nos
+    else:
+        return None
+
+    if ordenar_por:
+        sql += f' ORDER BY "{METRICAS_SQL[ordenar_por][1]}" DESC'
+    if limite:
+        sql += " LIMIT ?"
+        parametros = parametros + [int(limite)]
+    return pd.read_sql_query(sql, conn, params=parametros)
+
+def consultar_agregados(filtros=None, group_by=None, metricas=("receita", "contagem"), ordenar_por=None, limite=None):
+    # Executa filtro e agregação dentro do SQLite; só o resultado (pequeno) vem para o pandas.
+    group_by = list(group_by or [])
+    dimensoes_invalidas = [d for d in group_by if d not in DIMENSOES_SQL]
+    metricas_invalidas = [m for m in metricas if m not in METRICAS_SQL]
+    if dimensoes_invalidas or metricas_invalidas:
+        raise ValueError(f"Dimensões {dimensoes_invalidas} ou métricas {metricas_invalidas} não suportadas.")
+
+    colunas_select = [f'"{DIMENSOES_SQL[d][0]}" AS "{DIMENSOES_SQL[d][1]}"' for d in group_by]
+    colunas_select += [f'{METRICAS_SQL[m][0]} AS "{METRICAS_SQL[m][1]}"' for m in metricas]
+    where, parametros = montar_where_filtros(filtros)
+    sql = f'SELECT {", ".join(colunas_select)} FROM vendas WHERE {where}'
+    if group_by:
+        sql += " GROUP BY " + ", ".join(f'"{DIMENSOES_SQL[d][0]}"' for d in group_by)
+    if ordenar_por:
+        sql += f' ORDER BY "{METRICAS_SQL[ordenar_por][1]}" DESC'
+    if limite:
+        sql += " LIMIT ?"
+        parametros.append(int(limite))
+
+    gerenciador = obter_gerenciador_conexoes()
+    try:
+        with gerenciador.leitura() as conn:
+            resultado = _consultar_resumo_materializado(conn, filtros, group_by, metricas, ordenar_por, limite)
+            if resultado is not None:
+                return resultado
+            return pd.read_sql_query(sql, conn, params=parametros)
+    except sqlite3.Error as e:
+        print(f"ERRO de Banco de Dados: Erro ao consultar agregados em '{gerenciador.db_path}': {e}")
+        return None
+
+# Colunas da visão filtrada exportada: (coluna em 'vendas', nome no dashboard, dtype do bloco). Os dtypes são
+# fixos para que todos os blocos tenham o mesmo esquema, mesmo quando um bloco só tem valores ausentes.
+COLUNAS_EXPORTACAO = [
+    (CSV_PRODUCT_NAME, COL_NOME_PRODUTO, 'string'),
+    (CSV_CATEGORY_MAIN, COL_CATEGORIA, 'string'),
+    (CSV_DISCOUNTED_PRICE, COL_VALOR, 'float64'),
+    (CSV_ACTUAL_PRICE, COL_PRECO, 'float64'),
+    (CSV_DISCOUNT_PERCENTAGE, COL_PERCENTUAL_DESCONTO, 'float64'),
+    (CSV_RATING, COL_AVALIACAO, 'float64'),
+    (CSV_RATING_COUNT, COL_CONTAGEM_AVALIACOES, 'Int64'),
+    (CSV_SENTIMENT, COL_SENTIMENTO, 'string'),
+]
+
+def iterar_vendas_filtradas(filtros=None, tamanho_bloco=TAMANHO_BLOCO_IMPORTACAO):
+    # Lê as linhas filtradas direto de um cursor, um bloco por vez (fetchmany): a exportação nunca monta a
+    # visão inteira na memória. A conexão de leitura fica presa até o gerador terminar ou ser fechado.
+    # Sempre gera ao menos um bloco (vazio, se nada casar), para o arquivo ter cabeçalho.
+    where, parametros = montar_where_filtros(filtros)
+    colunas = ", ".join(f'"{origem}" AS "{destino}"' for origem, destino, _ in COLUNAS_EXPORTACAO)
+    nomes = [destino for _, destino, _ in COLUNAS_EXPORTACAO]
+    tipos = {destino: tipo for _, destino, tipo in COLUNAS_EXPORTACAO}
+    gerenciador = obter_gerenciador_conexoes()
+    with gerenciador.leitura() as conn:
+        cursor = conn.execute(f'SELECT {colunas} FROM vendas WHERE {where}', parametros)
+        linhas = cursor.fetchmany(tamanho_bloco)
+        yield pd.DataFrame.from_records(linhas, columns=nomes).astype(tipos)
+        while len(linhas) == tamanho_bloco:
+            linhas = cursor.fetchmany(tamanho_bloco)
+            if not linhas:
+                break
+            yield pd.DataFrame.from_records(linhas, columns=nomes).astype(tipos)
+
+def carregar_arvore_categorias():
+    gerenciador = obter_gerenciador_conexoes()
+    try:
+        with gerenciador.leitura() as conn:
+            return pd.read_sql_query('''
+                SELECT c.id, c.pai_id, c.nome, c.caminho, c.nivel,
+                       COALESCE(r.receita, 0) AS receita, COALESCE(r.contagem, 0) AS contagem, r.avaliacao_media
+                FROM categorias c
+                LEFT JOIN categorias_resumo r ON r.categoria_id = c.id
+                ORDER BY c.nivel, c.nome
+            ''', conn).set_index('id')
+    except sqlite3.Error as e:
+        print(f"ERRO de Banco de Dados: Erro ao carregar a árvore de categorias de '{gerenciador.db_path}': {e}")
+        return None
+
+def filhos_categoria(arvore, pai_id=None):
+    if arvore is None or arvore.empty:
+        return arvore
+    if pai_id is None:
+        return arvore[arvore['pai_id'].isna()]
+    return arvore[arvore['pai_id'] == pai_id]
+
+def descendentes_categoria(arvore, categoria_id):
+    # O caminho é único e prefixado pelos ancestrais, então a subárvore é um filtro de prefixo na tabela pequena.
+    caminho = arvore.at[categoria_id, 'caminho']
+    mascara = (arvore['caminho'] == caminho) | arvore['caminho'].str.startswith(caminho + SEPARADOR_CATEGORIA)
+    return arvore.index[mascara].to_numpy()
+
+def _bytes_objeto(valor):
+    if hasattr(valor, 'bytes_em_uso'):
+        return int(valor.bytes_em_uso)
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(valor.memory_usage(deep=True).sum()) if isinstance(valor, pd.DataFrame) else int(valor.memory_usage(deep=True))
+    return sys.getsizeof(valor)
+
+def relatorio_memoria(app_state=None, df=None):
+    # Bytes por coluna do DataFrame carregado e por atributo do AppState. Atributos que apontam para o
+    # mesmo objeto (ex.: df_filtrado sem filtro ativo) são marcados como compartilhados e não somam de novo.
+    if df is None and app_state is not None:
+        df = app_state.df_vendas
+    relatorio = {"colunas": {}, "total_colunas": 0, "atributos": {}, "total_atributos": 0}
+    if df is not None:
+        uso = df.memory_usage(deep=True, index=True)
+        relatorio["colunas"] = {str(col): int(bytes_col) for col, bytes_col in uso.items()}
+        relatorio["total_colunas"] = int(uso.sum())
+
+    if app_state is not None:
+        vistos = {}
+        for nome, valor in vars(app_state).items():
+            if valor is None:
+                continue
+            if id(valor) in vistos:
+                relatorio["atributos"][nome] = {"bytes": 0, "compartilhado_com": vistos[id(valor)]}
+                continue
+            vistos[id(valor)] = nome
+            bytes_atributo = _bytes_objeto(valor)
+            relatorio["atributos"][nome] = {"bytes": bytes_atributo, "compartilhado_com": None}
+            relatorio["total_atributos"] += bytes_atributo
+    return relatorio
+
+def obter_versao_dados():
+    # Muda a cada importação que gravou linhas, a cada nova versão do esquema e a cada banco novo (o token de
+    # banco_identidade): serve de chave para caches de resultados que sobrevivem entre sessões, como as imagens
+    # dos gráficos. Só o id da importação não basta: ele recomeça em 1 quando o banco é recriado.
+    gerenciador = obter_gerenciador_conexoes()
+    try:
+        with gerenciador.leitura() as conn:
+            token = conn.execute("SELECT token FROM banco_identidade LIMIT 1").fetchone()
+            ultima_importacao = conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM importacoes WHERE status = 'sucesso' AND (linhas_novas > 0 OR linhas_alteradas > 0 OR linhas_removidas > 0)"
+            ).fetchone()[0]
+    except sqlite3.Error as e:
+        print(f"AVISO: Não foi possível obter a versão dos dados de '{gerenciador.db_path}': {e}")
+        return None
+    if token is None:
+        print(f"AVISO: O banco de dados '{gerenciador.db_path}' não tem token de identidade; o cache de gráficos em disco não será usado.")
+        return None
+    return f"{SCHEMA_VERSION}.{token[0]}.{ultima_importacao}"
+
+def estatisticas_cache_dados():
+    return snapshot_cache.estatisticas_snapshot(resource_path_backend(DATABASE_NAME))
@@ -0,0 +1,68 @@
+import sys
+import threading
+from collections import OrderedDict
+
+CACHE_DERIVADOS_MAX_BYTES = 64 * 1024 * 1024
+CACHE_DERIVADOS_MAX_ITENS = 256
+
+def assinatura_filtros(filtros):
+    # Filtros equivalentes geram a mesma assinatura, independentemente da ordem das chaves.
+    return tuple(sorted((chave, valor) for chave, valor in (filtros or {}).items() if valor is not None))
+
+def tamanho_resultado(valor):
+    if hasattr(valor, 'memory_usage'):
+        uso = valor.memory_usage(deep=True)
+        return int(uso.sum()) if hasattr(uso, 'sum') else int(uso)
+    if hasattr(valor, 'nbytes'):
+        return int(valor.nbytes)
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(tamanho_resultado(item) for item in valor)
+    return sys.getsizeof(valor)
+
+class CacheDerivados:
+    # Resultados derivados (agregados, rankings, correlações...) por (assinatura dos filtros, id do cálculo).
+    # Voltar a um filtro já usado reaproveita tudo; o que foi usado há mais tempo sai primeiro quando
+    # o total passa do limite de memória. Os resultados são compartilhados: quem os usa não deve alterá-los.
+
+    def __init__(self, max_bytes=CACHE_DERIVADOS_MAX_BYTES, max_itens=CACHE_DERIVADOS_MAX_ITENS):
+        self.max_bytes = max_bytes
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_em_uso = 0
+        self.estatisticas = {"hits": 0, "misses": 0, "removidos": 0}
+
+    def obter(self, filtros, calculo_id, calcular):
+        chave = (assinatura_filtros(filtros), calculo_id)
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.estatisticas["hits"] += 1
+                return self._itens[chave][0]
+            self.estatisticas["misses"] += 1
+
+        resultado = calcular()
+        if resultado is None:
+            return None
+        tamanho = tamanho_resultado(resultado)
+        if tamanho > self.max_bytes:
+            return resultado
+
+        with self._lock:
+            if chave in self._itens:
+                self.bytes_em_uso -= self._itens.pop(chave)[1]
+            self._itens[chave] = (resultado, tamanho)
+            self.bytes_em_uso += tamanho
+            while self._itens and (self.bytes_em_uso > self.max_bytes or len(self._itens) > self.max_itens):
+                _, (_, tamanho_removido) = self._itens.popitem(last=False)
+                self.bytes_em_uso -= tamanho_removido
+                self.estatisticas["removidos"] += 1
+        return resultado
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.bytes_em_uso = 0
+
+    def __len__(self):
+        return len(self._itens)
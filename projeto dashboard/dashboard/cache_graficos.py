@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+GRAFICOS_DIR_NAME = 'cache_graficos'
+GRAFICOS_MAX_ITENS_MEMORIA = 48
+GRAFICOS_MAX_BYTES_DISCO = 64 * 1024 * 1024
+
+def _diretorio_graficos(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), GRAFICOS_DIR_NAME)
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+        return True
+    except OSError:
+        return False
+
+class CacheGraficos:
+    # Imagens já rasterizadas dos gráficos, por (gráfico, filtros, versão dos dados, tamanho em pixels, tema).
+    # Camada em memória (LRU) e camada em disco ao lado do banco, limitada em bytes: o mesmo gráfico
+    # aberto em outra sessão ou por outro usuário é exibido sem nenhum trabalho do matplotlib.
+
+    def __init__(self, db_path, max_itens_memoria=GRAFICOS_MAX_ITENS_MEMORIA, max_bytes_disco=GRAFICOS_MAX_BYTES_DISCO):
+        self.diretorio = _diretorio_graficos(db_path)
+        self.max_itens_memoria = max_itens_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self.estatisticas = {"hits_memoria": 0, "hits_disco": 0, "misses": 0, "escritas": 0, "removidos": 0}
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, hashlib.sha1(repr(chave).encode('utf-8')).hexdigest()[:24] + '.png')
+
+    def _guardar_memoria(self, chave, imagem):
+        with self._lock:
+            self._memoria[chave] = imagem
+            self._memoria.move_to_end(chave)
+            while len(self._memoria) > self.max_itens_memoria:
+                self._memoria.popitem(last=False)
+
+    def obter(self, chave):
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self.estatisticas["hits_memoria"] += 1
+                return self._memoria[chave]
+
+        caminho = self._caminho(chave)
+        if not os.path.exists(caminho):
+            self.estatisticas["misses"] += 1
+            return None
+        try:
+            with Image.open(caminho) as arquivo:
+                imagem = arquivo.copy()
+            os.utime(caminho)
+        except Exception as e:
+            print(f"AVISO: Imagem de gráfico '{caminho}' ilegível ({type(e).__name__} - {e}). Ela será descartada.")
+            _remover(caminho)
+            self.estatisticas["misses"] += 1
+            return None
+        self.estatisticas["hits_disco"] += 1
+        self._guardar_memoria(chave, imagem)
+        return imagem
+
+    def guardar(self, chave, imagem):
+        self._guardar_memoria(chave, imagem)
+        caminho = self._caminho(chave)
+        temporario = caminho + '.tmp'
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            imagem.save(temporario, format='PNG')
+            os.replace(temporario, caminho)
+        except Exception as e:
+            print(f"AVISO: Não foi possível gravar a imagem do gráfico '{caminho}': {type(e).__name__} - {e}")
+            _remover(temporario)
+            return False
+        self.estatisticas["escritas"] += 1
+        self._aplicar_limite_disco()
+        return True
+
+    def _aplicar_limite_disco(self):
+        # Remove as imagens usadas há mais tempo (mtime é atualizado a cada leitura) até caber no limite.
+        arquivos = []
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            if nome.endswith('.png') and os.path.isfile(caminho):
+                st = os.stat(caminho)
+                arquivos.append((st.st_mtime_ns, st.st_size, caminho))
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.max_bytes_disco:
+                break
+            if _remover(caminho):
+                total -= tamanho
+                self.estatisticas["removidos"] += 1
+
+    def limpar(self):
+        with self._lock:
+            self._memoria.clear()
+        if os.path.isdir(self.diretorio):
+            for nome in os.listdir(self.diretorio):
+                if nome.endswith('.png'):
+                    _remover(os.path.join(self.diretorio, nome))
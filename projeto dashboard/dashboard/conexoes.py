@@ -0,0 +1,98 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+MMAP_SIZE = 256 * 1024 * 1024
+CACHE_SIZE_KIB = -32768
+BUSY_TIMEOUT_MS = 5000
+STATEMENTS_EM_CACHE = 256
+MAX_CONEXOES_LEITURA = 4
+
+class GerenciadorConexoes:
+    # Uma conexão de escrita (importações e alterações) protegida por lock e um pool de conexões
+    # somente leitura. Em modo WAL as leituras seguem enquanto uma importação grava.
+
+    def __init__(self, db_path, max_leitura=MAX_CONEXOES_LEITURA):
+        self.db_path = db_path
+        self._lock_escrita = threading.RLock()
+        self._conexao_escrita = None
+        self._pool_leitura = queue.LifoQueue()
+        self._semaforo_leitura = threading.BoundedSemaphore(max_leitura)
+        self._todas_leitura = []
+        self._lock_pool = threading.Lock()
+
+    def _aplicar_pragmas(self, conn):
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size={CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+
+    def _abrir_escrita(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=STATEMENTS_EM_CACHE)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._aplicar_pragmas(conn)
+        return conn
+
+    def _abrir_leitura(self):
+        uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=STATEMENTS_EM_CACHE)
+        self._aplicar_pragmas(conn)
+        return conn
+
+    @contextmanager
+    def escrita(self):
+        with self._lock_escrita:
+            if self._conexao_escrita is None:
+                self._conexao_escrita = self._abrir_escrita()
+            yield self._conexao_escrita
+
+    @contextmanager
+    def leitura(self):
+        # Cada thread retira uma conexão do pool e a devolve ao sair; nenhuma conexão é usada por duas threads ao mesmo tempo.
+        self._semaforo_leitura.acquire()
+        try:
+            try:
+                conn = self._pool_leitura.get_nowait()
+            except queue.Empty:
+                conn = self._abrir_leitura()
+                with self._lock_pool:
+                    self._todas_leitura.append(conn)
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._pool_leitura.put(conn)
+        finally:
+            self._semaforo_leitura.release()
+
+    def fechar(self):
+        with self._lock_pool:
+            for conn in self._todas_leitura:
+                conn.close()
+            self._todas_leitura = []
+            self._pool_leitura = queue.LifoQueue()
+        with self._lock_escrita:
+            if self._conexao_escrita is not None:
+                self._conexao_escrita.close()
+                self._conexao_escrita = None
+
+_GERENCIADORES = {}
+_LOCK_GERENCIADORES = threading.Lock()
+
+def obter_gerenciador(db_path):
+    caminho = os.path.abspath(db_path)
+    with _LOCK_GERENCIADORES:
+        if caminho not in _GERENCIADORES:
+            _GERENCIADORES[caminho] = GerenciadorConexoes(caminho)
+        return _GERENCIADORES[caminho]
+
+def fechar_todos():
+    with _LOCK_GERENCIADORES:
+        for gerenciador in _GERENCIADORES.values():
+            gerenciador.fechar()
+        _GERENCIADORES.clear()
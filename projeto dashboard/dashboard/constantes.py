@@ -0,0 +1,37 @@
+import os
+import sys
+
+DATABASE_NAME = 'dashboard_data.db'
+CSV_FILE_NAME = 'vendas.csv'
+ID_CATEGORIA_TODAS = 0
+
+COL_CATEGORIA = 'Categoria'
+COL_NOME_PRODUTO = 'Nome do Produto'
+COL_VALOR = 'Valor'
+COL_AVALIACAO = 'Avaliação'
+COL_CONTAGEM_AVALIACOES = 'Contagem de Avaliações'
+COL_PERCENTUAL_DESCONTO = 'Percentual de Desconto'
+COL_SENTIMENTO = 'Sentimento'
+COL_PRECO = 'Preço Original'
+COL_CATEGORIA_ID = 'categoria_id'
+COL_ID_VENDA = 'id_venda'
+
+ORDEM_SENTIMENTO = ["Positivo", "Neutro", "Negativo", "Não Avaliado"]
+
+# Faixas de desconto do filtro lateral: (rótulo, desconto_min, desconto_max), em pontos percentuais inteiros.
+FAIXAS_DESCONTO = [
+    ("Todas", None, None),
+    ("Até 20%", 0, 20),
+    ("21% a 40%", 21, 40),
+    ("41% a 60%", 41, 60),
+    ("Acima de 60%", 61, None),
+]
+
+COLUNAS_NUMERICAS = [COL_AVALIACAO, COL_CONTAGEM_AVALIACOES, COL_VALOR, COL_PRECO, COL_PERCENTUAL_DESCONTO]
+
+def resource_path_backend(relative_path):
+    if hasattr(sys, '_MEIPASS'):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.abspath(os.path.dirname(__file__))
+    return os.path.join(base_path, relative_path)
@@ -0,0 +1,66 @@
+import numpy as np
+
+BINS_HISTOGRAMA = 30
+PONTOS_GRADE_KDE = 512
+CORTE_VIOLINO = 2
+
+def _valores_finitos(valores):
+    valores = np.asarray(valores, dtype=np.float64)
+    return valores[np.isfinite(valores)]
+
+def histograma(valores, bins=BINS_HISTOGRAMA):
+    valores = _valores_finitos(valores)
+    if len(valores) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    return np.histogram(valores, bins=bins)
+
+def largura_scott(valores):
+    # Regra de Scott (a mesma do gaussian_kde usado pelo seaborn): desvio padrão * n^(-1/5).
+    n = len(valores)
+    if n < 2:
+        return None
+    desvio = float(np.std(valores, ddof=1))
+    return desvio * n ** (-1 / 5) if desvio > 0 else None
+
+def kde_binned(valores, corte=0, pontos=PONTOS_GRADE_KDE, largura=None):
+    # KDE gaussiana aproximada: os valores são distribuídos linearmente numa grade regular e a grade é
+    # convoluída com o núcleo por FFT. O custo é O(n + pontos·log pontos), em vez de O(n·pontos).
+    valores = _valores_finitos(valores)
+    largura = largura or largura_scott(valores)
+    if largura is None:
+        return np.zeros(0), np.zeros(0)
+    n = len(valores)
+    inicio = valores.min() - corte * largura
+    fim = valores.max() + corte * largura
+    grade = np.linspace(inicio, fim, pontos)
+    passo = grade[1] - grade[0]
+
+    posicao = (valores - inicio) / passo
+    esquerda = np.clip(np.floor(posicao).astype(np.int64), 0, pontos - 2)
+    fracao = posicao - esquerda
+    pesos = np.bincount(esquerda, weights=1 - fracao, minlength=pontos) + np.bincount(esquerda + 1, weights=fracao, minlength=pontos)
+
+    alcance = min(pontos - 1, int(np.ceil(4 * largura / passo)))
+    deslocamentos = np.arange(-alcance, alcance + 1) * passo
+    nucleo = np.exp(-0.5 * (deslocamentos / largura) ** 2) / (largura * np.sqrt(2 * np.pi))
+    tamanho_fft = 1 << int(np.ceil(np.log2(pontos + 2 * alcance + 1)))
+    convolucao = np.fft.irfft(np.fft.rfft(pesos, tamanho_fft) * np.fft.rfft(nucleo, tamanho_fft), tamanho_fft)
+    densidade = np.maximum(convolucao[alcance:alcance + pontos] / n, 0)
+    return grade, densidade
+
+def distribuicao(valores, bins=BINS_HISTOGRAMA):
+    # Histograma + KDE na escala das contagens (como o histplot(kde=True)), prontos para bar/plot.
+    valores = _valores_finitos(valores)
+    contagens, bordas = histograma(valores, bins)
+    grade, densidade = kde_binned(valores)
+    if len(bordas) > 1 and len(densidade):
+        densidade = densidade * len(valores) * (bordas[1] - bordas[0])
+    return contagens, bordas, grade, densidade
+
+def violino(valores, corte=CORTE_VIOLINO):
+    # Densidade e quartis (Q1, mediana, Q3) de um grupo, para desenhar um violino sem o seaborn.
+    valores = _valores_finitos(valores)
+    if len(valores) == 0:
+        return np.zeros(0), np.zeros(0), np.full(3, np.nan)
+    grade, densidade = kde_binned(valores, corte=corte)
+    return grade, densidade, np.percentile(valores, [25, 50, 75])
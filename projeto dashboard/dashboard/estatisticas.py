@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from backend import COL_CATEGORIA_ID, COLUNAS_NUMERICAS, ID_CATEGORIA_TODAS, descendentes_categoria
+
+class EstatisticasSuficientes:
+    # Somas que bastam para médias, totais, variâncias e correlações de um conjunto de linhas, e que se somam
+    # entre conjuntos disjuntos. Para cada par de colunas (i, j) as somas consideram só as linhas em que as duas
+    # têm valor, como a exclusão par a par do DataFrame.corr(): n[i, j], soma[i, j] = Σxi, quadrados[i, j] = Σxi²
+    # e produtos[i, j] = Σxi·xj. Os valores entram deslocados por uma referência por coluna (a média geral),
+    # o que evita perder precisão nas subtrações com somas grandes.
+
+    def __init__(self, colunas, referencia, linhas=0, n=None, soma=None, quadrados=None, produtos=None):
+        k = len(colunas)
+        self.colunas = list(colunas)
+        self.referencia = referencia
+        self.linhas = linhas
+        self.n = n if n is not None else np.zeros((k, k))
+        self.soma = soma if soma is not None else np.zeros((k, k))
+        self.quadrados = quadrados if quadrados is not None else np.zeros((k, k))
+        self.produtos = produtos if produtos is not None else np.zeros((k, k))
+
+    @classmethod
+    def de_valores(cls, colunas, referencia, valores):
+        validos = np.isfinite(valores)
+        centrados = np.where(validos, valores - referencia, 0.0)
+        validos = validos.astype(np.float64)
+        return cls(colunas, referencia, len(valores),
+                   validos.T @ validos, centrados.T @ validos, (centrados * centrados).T @ validos, centrados.T @ centrados)
+
+    def __add__(self, outra):
+        return EstatisticasSuficientes(self.colunas, self.referencia, self.linhas + outra.linhas, self.n + outra.n,
+                                       self.soma + outra.soma, self.quadrados + outra.quadrados, self.produtos + outra.produtos)
+
+    def contagem(self):
+        return pd.Series(np.diag(self.n).astype(np.int64), index=self.colunas)
+
+    def total(self):
+        n = np.diag(self.n)
+        return pd.Series(np.where(n > 0, self.referencia * n + np.diag(self.soma), 0.0), index=self.colunas)
+
+    def media(self):
+        n = np.diag(self.n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(np.where(n > 0, self.referencia + np.diag(self.soma) / n, np.nan), index=self.colunas)
+
+    def variancia(self, ddof=1):
+        n = np.diag(self.n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            soma_desvios = np.diag(self.quadrados) - np.diag(self.soma) ** 2 / n
+            variancia = np.where(n > ddof, np.maximum(soma_desvios, 0) / (n - ddof), np.nan)
+        return pd.Series(variancia, index=self.colunas)
+
+    def correlacao(self):
+        # Pearson par a par; NaN quando o par tem menos de 2 linhas ou uma das colunas é constante nele.
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariancia = self.produtos - self.soma * self.soma.T / self.n
+            desvios_i = self.quadrados - self.soma ** 2 / self.n
+            desvios_j = desvios_i.T
+            correlacao = covariancia / np.sqrt(desvios_i * desvios_j)
+            correlacao = np.where((self.n >= 2) & (desvios_i > 0) & (desvios_j > 0), np.clip(correlacao, -1, 1), np.nan)
+        return pd.DataFrame(correlacao, index=self.colunas, columns=self.colunas)
+
+    def resumo_indicadores(self, coluna_valor):
+        # Mesmo formato de consultar_agregados(metricas=("receita", "ticket_medio", "contagem")).
+        return pd.DataFrame({
+            coluna_valor: [self.total()[coluna_valor]],
+            "Ticket Médio": [self.media()[coluna_valor]],
+            "Contagem": [self.linhas],
+        })
+
+class MotorEstatisticas:
+    # Estatísticas suficientes por categoria, calculadas uma vez no carregamento. Qualquer união de categorias
+    # (uma subárvore, ou "Todas") sai da soma das estatísticas das categorias, sem reler as linhas.
+
+    def __init__(self, df, arvore=None, colunas=COLUNAS_NUMERICAS):
+        self.colunas = [coluna for coluna in colunas if coluna in df.columns]
+        self.arvore = arvore
+        self.por_categoria = {}
+        valores = np.column_stack([df[coluna].to_numpy(dtype=np.float64, na_value=np.nan) for coluna in self.colunas]) if self.colunas else np.empty((len(df), 0))
+        with np.errstate(invalid='ignore'):
+            self.referencia = np.nan_to_num(np.nanmean(valores, axis=0)) if len(valores) else np.zeros(len(self.colunas))
+        if COL_CATEGORIA_ID in df.columns:
+            ids = df[COL_CATEGORIA_ID].to_numpy(dtype=np.float64, na_value=np.nan)
+            ids = np.where(np.isnan(ids), -1, ids).astype(np.int64)
+        else:
+            ids = np.full(len(df), -1, dtype=np.int64)
+        # Agrupa ordenando uma vez; cada categoria vira um bloco contíguo e um produto de matrizes.
+        ordem = np.argsort(ids, kind='stable')
+        ids_ordenados = ids[ordem]
+        grupos, inicios = np.unique(ids_ordenados, return_index=True)
+        fins = np.append(inicios[1:], len(ids_ordenados))
+        for categoria_id, inicio, fim in zip(grupos, inicios, fins):
+            bloco = valores[ordem[inicio:fim]]
+            self.por_categoria[int(categoria_id)] = EstatisticasSuficientes.de_valores(self.colunas, self.referencia, bloco)
+
+    def combinar(self, categoria_ids=None):
+        # None = todas as linhas, inclusive as sem categoria.
+        if categoria_ids is None:
+            partes = self.por_categoria.values()
+        else:
+            partes = [self.por_categoria[int(c)] for c in categoria_ids if int(c) in self.por_categoria]
+        resultado = EstatisticasSuficientes(self.colunas, self.referencia)
+        for parte in partes:
+            resultado = resultado + parte
+        return resultado
+
+    def para_filtros(self, filtros):
+        # Só filtros de categoria são atendidos pelas estatísticas; com outros filtros devolve None e quem chamou
+        # calcula sobre as linhas filtradas.
+        filtros_ativos = {chave: valor for chave, valor in (filtros or {}).items() if valor is not None and valor != "Todas"}
+        if set(filtros_ativos) - {"categoria_id"}:
+            return None
+        categoria_id = filtros_ativos.get("categoria_id")
+        if categoria_id is None or int(categoria_id) == ID_CATEGORIA_TODAS:
+            return self.combinar()
+        if self.arvore is None or int(categoria_id) not in self.arvore.index:
+            return None
+        return self.combinar(descendentes_categoria(self.arvore, int(categoria_id)))
+
+    @property
+    def bytes_em_uso(self):
+        k = len(self.colunas)
+        return len(self.por_categoria) * 4 * k * k * 8
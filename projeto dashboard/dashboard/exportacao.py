@@ -0,0 +1,141 @@
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+TAMANHO_BLOCO_EXPORTACAO = 50000
+MAX_LINHAS_XLSX = 1048575
+FORMATOS_EXPORTACAO = {
+    "CSV": ".csv",
+    "Parquet": ".parquet",
+    "Excel (XLSX)": ".xlsx",
+}
+
+class ExportacaoCancelada(Exception):
+    pass
+
+def formatos_disponiveis():
+    # Parquet e XLSX dependem de bibliotecas opcionais (pyarrow, openpyxl).
+    indisponiveis = set()
+    if pq is None:
+        indisponiveis.add("Parquet")
+    if Workbook is None:
+        indisponiveis.add("Excel (XLSX)")
+    return [formato for formato in FORMATOS_EXPORTACAO if formato not in indisponiveis]
+
+def blocos_dataframe(df, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO):
+    # Fatias do próprio DataFrame, sem copiar o todo. Um DataFrame vazio gera um bloco vazio (só o cabeçalho).
+    if df.empty:
+        yield df
+        return
+    for inicio in range(0, len(df), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco]
+
+class _EscritorCSV:
+    def __init__(self, caminho):
+        # utf-8 com BOM: o Excel abre os acentos corretamente.
+        self.arquivo = open(caminho, 'w', encoding='utf-8-sig', newline='')
+        self.cabecalho = True
+
+    def escrever(self, bloco):
+        bloco.to_csv(self.arquivo, index=False, header=self.cabecalho)
+        self.cabecalho = False
+
+    def fechar(self):
+        self.arquivo.close()
+
+class _EscritorParquet:
+    # Um row group por bloco; os blocos seguintes são convertidos para o esquema do primeiro.
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.escritor = None
+
+    def escrever(self, bloco):
+        tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+        if self.escritor is None:
+            self.escritor = pq.ParquetWriter(self.caminho, tabela.schema)
+        elif not tabela.schema.equals(self.escritor.schema):
+            tabela = tabela.cast(self.escritor.schema, safe=False)
+        self.escritor.write_table(tabela)
+
+    def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+
+class _EscritorXLSX:
+    # Modo write-only do openpyxl: as linhas vão para um arquivo temporário em vez de ficar na memória.
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.livro = Workbook(write_only=True)
+        self.planilha = self.livro.create_sheet("Dados")
+        self.cabecalho = True
+
+    def escrever(self, bloco):
+        if self.cabecalho:
+            self.planilha.append([str(coluna) for coluna in bloco.columns])
+            self.cabecalho = False
+        for linha in bloco.astype(object).where(bloco.notna(), None).itertuples(index=False, name=None):
+            self.planilha.append(list(linha))
+
+    def fechar(self):
+        self.livro.save(self.caminho)
+
+ESCRITORES = {
+    "CSV": _EscritorCSV,
+    "Parquet": _EscritorParquet,
+    "Excel (XLSX)": _EscritorXLSX,
+}
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+def exportar(blocos, caminho, formato, total=None, ao_progredir=None, cancelamento=None):
+    # Grava bloco a bloco num arquivo temporário ao lado do destino: a memória de pico é a de um bloco, e o
+    # destino só é substituído por um arquivo completo. 'cancelamento' (threading.Event) é verificado entre blocos.
+    if formato not in formatos_disponiveis():
+        raise ValueError(f"Formato '{formato}' indisponível: a biblioteca opcional necessária não está instalada.")
+    if formato == "Excel (XLSX)" and total is not None and total > MAX_LINHAS_XLSX:
+        raise ValueError(f"O formato XLSX suporta até {MAX_LINHAS_XLSX} linhas ({total} pedidas). Use CSV ou Parquet.")
+
+    temporario = caminho + '.parcial'
+    escritor = None
+    linhas = 0
+    try:
+        escritor = ESCRITORES[formato](temporario)
+        for bloco in blocos:
+            if cancelamento is not None and cancelamento.is_set():
+                raise ExportacaoCancelada()
+            escritor.escrever(bloco)
+            linhas += len(bloco)
+            if formato == "Excel (XLSX)" and linhas > MAX_LINHAS_XLSX:
+                raise ValueError(f"O formato XLSX suporta até {MAX_LINHAS_XLSX} linhas. Use CSV ou Parquet.")
+            if ao_progredir:
+                ao_progredir(linhas, total)
+        escritor.fechar()
+        escritor = None
+        os.replace(temporario, caminho)
+    except BaseException:
+        if escritor is not None:
+            try:
+                escritor.fechar()
+            except Exception:
+                pass
+        _remover(temporario)
+        raise
+    finally:
+        # Devolve a conexão de leitura quando os blocos vêm de um cursor do SQLite.
+        if hasattr(blocos, 'close'):
+            blocos.close()
+    return linhas
@@ -0,0 +1,162 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from backend import (
+    COL_AVALIACAO, COL_CATEGORIA_ID, COL_ID_VENDA, COL_PERCENTUAL_DESCONTO, COL_SENTIMENTO, COL_VALOR,
+    SEPARADOR_CATEGORIA, buscar_produtos
+)
+
+# Filtros de faixa: prefixo da chave em 'filtros' (mesmas chaves de montar_where_filtros) -> coluna do DataFrame.
+FILTROS_FAIXA = {
+    "valor": COL_VALOR,
+    "avaliacao": COL_AVALIACAO,
+    "desconto": COL_PERCENTUAL_DESCONTO,
+}
+MAX_MASCARAS_EM_CACHE = 32
+
+def _ordem_pre_arvore(arvore):
+    # Ordenar os caminhos como listas de nomes dá a travessia em profundidade; a subárvore de um nó termina
+    # no primeiro nó seguinte de nível igual ou menor.
+    partes = arvore['caminho'].str.split(SEPARADOR_CATEGORIA)
+    ids_ordenados = sorted(arvore.index, key=lambda categoria_id: partes[categoria_id])
+    niveis = arvore['nivel']
+    fim_subarvore = {}
+    pilha = []
+    for posicao, categoria_id in enumerate(ids_ordenados):
+        while pilha and niveis[pilha[-1][0]] >= niveis[categoria_id]:
+            fim_subarvore[pilha.pop()[0]] = posicao
+        pilha.append((categoria_id, posicao))
+    for categoria_id, _ in pilha:
+        fim_subarvore[categoria_id] = len(ids_ordenados)
+    return ids_ordenados, fim_subarvore
+
+class MotorFiltros:
+    # As vendas ficam ordenadas pela posição da categoria na árvore: cada subárvore vira um intervalo contíguo
+    # de linhas e selecionar uma categoria é um fatiamento, sem varrer nem copiar o DataFrame. Os demais
+    # filtros são máscaras booleanas guardadas em cache e combinadas só dentro do intervalo.
+
+    def __init__(self, df, arvore=None, max_mascaras=MAX_MASCARAS_EM_CACHE):
+        self.intervalos = {}
+        if arvore is not None and not arvore.empty and COL_CATEGORIA_ID in df.columns and not df.empty:
+            ids_ordenados, fim_subarvore = _ordem_pre_arvore(arvore)
+            ids_ordenados = np.asarray(ids_ordenados, dtype=np.int64)
+            # Linhas sem categoria conhecida vão para o fim, depois de todas as subárvores.
+            posicao_por_id = np.full(int(ids_ordenados.max()) + 2, len(ids_ordenados), dtype=np.int64)
+            posicao_por_id[ids_ordenados] = np.arange(len(ids_ordenados))
+            ids_linhas = df[COL_CATEGORIA_ID].to_numpy(dtype=np.float64, na_value=-1)
+            ids_linhas = np.where((ids_linhas >= 0) & (ids_linhas < len(posicao_por_id) - 1), ids_linhas, len(posicao_por_id) - 1).astype(np.int64)
+            posicao_linhas = posicao_por_id[ids_linhas]
+            if np.any(posicao_linhas[1:] < posicao_linhas[:-1]):
+                ordem = np.argsort(posicao_linhas, kind='stable')
+                df = df.take(ordem).reset_index(drop=True)
+                posicao_linhas = posicao_linhas[ordem]
+            inicios = np.searchsorted(posicao_linhas, np.arange(len(ids_ordenados)), side='left')
+            fins = np.searchsorted(posicao_linhas, [fim_subarvore[c] for c in ids_ordenados], side='left')
+            self.intervalos = {int(c): (int(i), int(f)) for c, i, f in zip(ids_ordenados, inicios, fins)}
+        self.df = df
+        self._max_mascaras = max_mascaras
+        self._mascaras = OrderedDict()
+        self._colunas = {}
+        self._posicoes_id = None
+
+    def _coluna(self, coluna):
+        # Colunas float ficam no dtype carregado (float32 no perfil compacto); as demais viram float64.
+        if coluna not in self._colunas:
+            serie = self.df[coluna]
+            dtype = serie.dtype if serie.dtype in (np.float32, np.float64) else np.float64
+            self._colunas[coluna] = serie.to_numpy(dtype=dtype, na_value=np.nan)
+        return self._colunas[coluna]
+
+    def _mascara(self, chave, construir):
+        if chave in self._mascaras:
+            self._mascaras.move_to_end(chave)
+            return self._mascaras[chave]
+        mascara = construir()
+        self._mascaras[chave] = mascara
+        while len(self._mascaras) > self._max_mascaras:
+            self._mascaras.popitem(last=False)
+        return mascara
+
+    def _mascara_faixa(self, coluna, minimo, maximo):
+        def construir():
+            valores = self._coluna(coluna)
+            # O limite vai para o dtype da coluna: comparar float32 com um limite float64 descarta as linhas
+            # exatamente no limite (4.2 em float32 é menor que 4.2 em float64), e o SQL as mantém.
+            with np.errstate(invalid='ignore'):
+                mascara = np.ones(len(valores), dtype=bool)
+                if minimo is not None:
+                    mascara &= valores >= valores.dtype.type(minimo)
+                if maximo is not None:
+                    mascara &= valores <= valores.dtype.type(maximo)
+            return mascara
+        return self._mascara((coluna, minimo, maximo), construir)
+
+    def _mascara_sentimento(self, sentimento):
+        def construir():
+            serie = self.df[COL_SENTIMENTO]
+            if sentimento not in serie.cat.categories:
+                return np.zeros(len(serie), dtype=bool)
+            return serie.cat.codes.to_numpy() == serie.cat.categories.get_loc(sentimento)
+        return self._mascara((COL_SENTIMENTO, sentimento), construir)
+
+    def _posicoes_por_id(self):
+        # id da venda (rowid no banco) -> posição da linha no df do motor; -1 para ids fora do df.
+        if self._posicoes_id is None:
+            ids = self.df[COL_ID_VENDA].to_numpy(dtype=np.int64)
+            self._posicoes_id = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int64)
+            self._posicoes_id[ids] = np.arange(len(ids))
+        return self._posicoes_id
+
+    def posicoes_busca(self, texto):
+        # Posições das linhas que casam com a busca de texto (FTS5), da mais relevante para a menos.
+        def construir():
+            ids = buscar_produtos(texto)
+            if ids is None or len(ids) == 0:
+                return np.zeros(0, dtype=np.int64)
+            posicoes_id = self._posicoes_por_id()
+            posicoes = posicoes_id[ids[(ids >= 0) & (ids < len(posicoes_id))]]
+            return posicoes[posicoes >= 0]
+        return self._mascara(("busca_posicoes", texto), construir)
+
+    def _mascara_busca(self, texto):
+        def construir():
+            mascara = np.zeros(len(self.df), dtype=bool)
+            mascara[self.posicoes_busca(texto)] = True
+            return mascara
+        return self._mascara(("busca", texto), construir)
+
+    def mascaras_ativas(self, filtros):
+        mascaras = []
+        for prefixo, coluna in FILTROS_FAIXA.items():
+            minimo, maximo = filtros.get(f"{prefixo}_min"), filtros.get(f"{prefixo}_max")
+            if (minimo is not None or maximo is not None) and coluna in self.df.columns:
+                mascaras.append(self._mascara_faixa(coluna, minimo, maximo))
+        sentimento = filtros.get("sentimento")
+        if sentimento and sentimento != "Todos" and COL_SENTIMENTO in self.df.columns:
+            mascaras.append(self._mascara_sentimento(sentimento))
+        busca = filtros.get("busca")
+        if busca and COL_ID_VENDA in self.df.columns:
+            mascaras.append(self._mascara_busca(busca))
+        return mascaras
+
+    def intervalo(self, filtros):
+        categoria_id = filtros.get("categoria_id")
+        if categoria_id is None:
+            return 0, len(self.df)
+        return self.intervalos.get(int(categoria_id), (0, 0))
+
+    def aplicar(self, filtros):
+        filtros = filtros or {}
+        inicio, fim = self.intervalo(filtros)
+        mascaras = self.mascaras_ativas(filtros)
+        if inicio == 0 and fim == len(self.df) and not mascaras:
+            return self.df
+
+        resultado = self.df.iloc[inicio:fim]
+        if mascaras:
+            combinada = mascaras[0][inicio:fim].copy()
+            for mascara in mascaras[1:]:
+                combinada &= mascara[inicio:fim]
+            resultado = resultado.iloc[np.flatnonzero(combinada)]
+        return resultado
@@ -1,23 +1,39 @@
+import hashlib
 import tkinter as tk
 import customtkinter
 import pandas as pd
 import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
 import seaborn as sns
 import numpy as np
 from tksheet import Sheet
 
+from tarefas import Debounce
+from cache_derivados import assinatura_filtros
+from paginacao import ProvedorPaginas
+from distribuicoes import distribuicao, histograma, violino
+from gui.lista_virtual import ListaVirtual
+from gui.lod import LIMITE_PONTOS_LOD, usar_lod, densidade_2d, desenhar_densidade, amostra_por_grupo, anotar_lod
 from backend import (
     COL_CATEGORIA, COL_NOME_PRODUTO, COL_VALOR,
     COL_AVALIACAO, COL_CONTAGEM_AVALIACOES, COL_PERCENTUAL_DESCONTO,
-    COL_SENTIMENTO, COL_PRECO
+    COL_SENTIMENTO, COL_PRECO, COLUNAS_NUMERICAS, ORDEM_SENTIMENTO, consultar_agregados
 )
 
+TOP_N_MAXIMO = 20
+ATRASO_PRE_RENDERIZACAO_MS = 1500
+
 class DashboardTabsUIManager:
     def __init__(self, app, notebook):
         self.app = app
         self.notebook = notebook
         self.tab_frames = {}
+        self.tabs_sujas = set()
+        self._pre_renderizacao_id = None
+        self.limite_pontos_lod = LIMITE_PONTOS_LOD
+        # Agregado por trás de cada gráfico desenhado, para a exportação: slot -> (título, DataFrame, assinatura dos filtros).
+        self.dados_graficos = {}
+        # Estrutura fixa de cada aba (frames dos gráficos, controles): aba -> {nome: widget}.
+        self.esqueletos = {}
 
         self.font_normal = self.app.font_normal
         self.font_bold = self.app.font_bold
@@ -27,6 +43,8 @@ class DashboardTabsUIManager:
         self.top_n_var = tk.IntVar(value=10)
         self._top_n_var_trace_set_up = False
         self.current_top_n_label_widget = None
+        self._top_n_desenhado = None
+        self._top_n_debounce = Debounce(notebook, self._update_top_produtos_chart)
 
         self.geral_chart_frame = None
         self.geral_product_list_frame = None
@@ -42,27 +60,187 @@ class DashboardTabsUIManager:
             ("Análise de Feedbacks", self.build_tab_sentimento),
             ("Dados Detalhados", self.build_tab_dados_detalhados)
         ]
+        # Consultas SQL de cada aba, feitas em segundo plano antes de montar os gráficos na thread do Tk:
+        # (group_by, métricas, ordenar_por, limite), as mesmas que os métodos de construção pedem a _agregado.
+        self.tabs_consultas = {
+            "Visão Geral": [(["categoria"], ["receita"], "receita", None)],
+            "Análise de Produtos": [(["produto"], ["receita"], "receita", TOP_N_MAXIMO), (["categoria"], ["contagem"], "contagem", None)],
+            "Análise de Feedbacks": [(["sentimento"], ["contagem"], None, None), (["categoria", "sentimento"], ["contagem"], None, None)],
+        }
 
     def setup_tabs(self):
         for titulo, _ in self.tabs_config:
             tab = self.notebook.add(titulo)
             self.tab_frames[titulo] = tab
+        self.tabs_sujas = set(self.tab_frames)
+        self.notebook.configure(command=self._on_tab_changed)
 
     def update_all_tabs(self):
+        # Todas as abas ficam desatualizadas, mas só a visível é reconstruída agora; as demais
+        # são reconstruídas quando forem abertas (ou, no ócio, a próxima aba da lista).
         if hasattr(self.app, 'app_state') and self.app.app_state.df_filtrado is not None:
-            for titulo, builder_func in self.tabs_config:
-                if titulo in self.tab_frames:
-                    builder_func(self.tab_frames[titulo])
+            self.tabs_sujas = set(self.tab_frames)
+            for titulo in self.tab_frames:
+                self.app.executor.cancelar(f"aba:{titulo}")
+            self._render_tab(self.notebook.get())
+            self._schedule_prerender()
+
+    def _render_tab(self, titulo):
+        if titulo not in self.tabs_sujas or titulo not in self.tab_frames:
+            return
+        self.tabs_sujas.discard(titulo)
+        builder_func = dict(self.tabs_config)[titulo]
+        tab_frame = self.tab_frames[titulo]
+        consultas = self.tabs_consultas.get(titulo)
+        if not consultas:
+            builder_func(tab_frame)
+            return
+
+        filtros = dict(self.app.app_state.filtros)
+        def preparar():
+            for group_by, metricas, ordenar_por, limite in consultas:
+                self._agregado(group_by, metricas, ordenar_por, limite, filtros=filtros)
+
+        def montar(_):
+            if tab_frame.winfo_exists():
+                builder_func(tab_frame)
+
+        self.app.executor.enviar(f"aba:{titulo}", preparar, montar)
+
+    def _on_tab_changed(self):
+        self._render_tab(self.notebook.get())
+        self._schedule_prerender()
+
+    def _schedule_prerender(self):
+        if self._pre_renderizacao_id is not None:
+            self.notebook.after_cancel(self._pre_renderizacao_id)
+            self._pre_renderizacao_id = None
+        if self.tabs_sujas:
+            self._pre_renderizacao_id = self.notebook.after(ATRASO_PRE_RENDERIZACAO_MS, self._prerender_next_tab)
+
+    def _prerender_next_tab(self):
+        self._pre_renderizacao_id = None
+        if not self.notebook.winfo_exists():
+            return
+        titulos = [titulo for titulo, _ in self.tabs_config]
+        atual = self.notebook.get()
+        if atual not in titulos:
+            return
+        proxima = titulos[(titulos.index(atual) + 1) % len(titulos)]
+        self.notebook.after_idle(self._render_tab, proxima)
+
+    # --- Resultados derivados (cache por filtro) ---
+
+    def _derivado(self, calculo_id, calcular, filtros=None):
+        estado = self.app.app_state
+        return estado.cache_derivados.obter(estado.filtros if filtros is None else filtros, calculo_id, calcular)
+
+    def _agregado(self, group_by, metricas, ordenar_por=None, limite=None, filtros=None):
+        filtros = self.app.app_state.filtros if filtros is None else filtros
+        return self._derivado(
+            ("agregado", tuple(group_by), tuple(metricas), ordenar_por, limite),
+            lambda: consultar_agregados(filtros, group_by, metricas, ordenar_por=ordenar_por, limite=limite),
+            filtros
+        )
+
+    def _registrar_dados_grafico(self, slot_id, titulo, dados):
+        self.dados_graficos[slot_id] = (titulo, dados, assinatura_filtros(self.app.app_state.filtros))
+
+    def dados_exportaveis(self):
+        # Só os agregados calculados com os filtros atuais: abas ainda não reconstruídas ficam de fora.
+        assinatura = assinatura_filtros(self.app.app_state.filtros)
+        return [(titulo, dados) for titulo, dados, assinatura_dados in self.dados_graficos.values() if assinatura_dados == assinatura]
+
+    def _chave_grafico(self, slot_id, frame, *extra):
+        # Sem versão dos dados não há como saber se a imagem guardada ainda vale: não usa o cache.
+        # O tamanho é o do frame já dimensionado pelo Tk (o canvas e a imagem o preenchem); um frame ainda
+        # não exibido (aba oculta) mede 1x1 e também fica sem cache.
+        estado = self.app.app_state
+        if getattr(estado, 'versao_dados', None) is None:
+            return None
+        frame.update_idletasks()
+        tamanho = (frame.winfo_width(), frame.winfo_height())
+        if min(tamanho) <= 1:
+            return None
+        return (slot_id, assinatura_filtros(estado.filtros), estado.versao_dados, tamanho, customtkinter.get_appearance_mode(), *extra)
+
+    def _desenhar_barras(self, slot_id, frame, rotulos, valores, titulo, xlabel, ylabel, paleta, figsize=(8, 5), fontsize=None, usar_cache=True):
+        # Com o mesmo número de barras só as alturas e os rótulos mudam; senão o eixo é refeito na mesma figura.
+        # Fora desse caso, a imagem já rasterizada para os mesmos filtros/dados/tamanho é exibida direto.
+        rotulos = [str(rotulo) for rotulo in rotulos]
+        valores = np.asarray(valores, dtype=float)
+        fig = self.app.charts.figura_atual(slot_id, frame)
+        ax = fig.axes[0] if fig is not None and len(fig.axes) == 1 else None
+        chave = None
+        if ax is not None and len(ax.patches) == len(valores):
+            for barra, valor in zip(ax.patches, valores):
+                barra.set_height(valor)
+            ax.relim()
+            ax.autoscale_view()
+        else:
+            conteudo = hashlib.sha1(repr((rotulos, valores.tobytes(), fontsize)).encode('utf-8')).hexdigest()
+            chave = self._chave_grafico(slot_id, frame, titulo, xlabel, ylabel, paleta, conteudo) if usar_cache else None
+            imagem = self.app.chart_images.obter(chave) if chave is not None else None
+            if imagem is not None:
+                ativar = lambda: self._desenhar_barras(slot_id, frame, rotulos, valores, titulo, xlabel, ylabel, paleta, figsize, fontsize, usar_cache=False)
+                self.app.charts.mostrar_imagem(slot_id, frame, imagem, ao_ativar=ativar)
+                return
+            fig = self.app.charts.figura(slot_id, frame, figsize)
+            ax = fig.add_subplot(111)
+            ax.bar(range(len(valores)), valores, color=sns.color_palette(paleta, len(valores)))
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+        ax.set_xticks(range(len(rotulos)), rotulos)
+        plt.setp(ax.get_xticklabels(), rotation=45, ha='right', fontsize=fontsize)
+        ax.set_title(titulo)
+        fig.tight_layout()
+        if chave is not None:
+            imagem = self.app.charts.capturar(slot_id, chave[3])
+            if imagem is not None:
+                self.app.chart_images.guardar(chave, imagem)
+                return
+        self.app.charts.desenhar(slot_id)
+
+    def _amostra_lod(self, dados, calculo_id):
+        # Abaixo do limite devolve os próprios dados (desenho exato); acima, uma amostra estratificada por categoria.
+        total = len(dados)
+        if not usar_lod(total, self.limite_pontos_lod):
+            return dados, None
+        def calcular():
+            grupos = pd.factorize(dados[COL_CATEGORIA])[0] if COL_CATEGORIA in dados.columns else None
+            return amostra_por_grupo(total, grupos)
+        return dados.iloc[self._derivado(("amostra_lod", calculo_id, total), calcular)], total
+
+    def _correlacao(self, data):
+        # Com filtro só de categoria a matriz vem das estatísticas por categoria já somadas; senão, das linhas.
+        motor_estatisticas = self.app.app_state.motor_estatisticas
+        estatisticas = motor_estatisticas.para_filtros(self.app.app_state.filtros) if motor_estatisticas is not None else None
+        if estatisticas is not None and list(data.columns) == estatisticas.colunas:
+            return estatisticas.correlacao()
+        return data.corr(numeric_only=True)
+
+    def _ranking_produtos(self):
+        # Um único ranking (até TOP_N_MAXIMO) atende a lista do Top 10 e o gráfico do slider.
+        return self._agregado(["produto"], ["receita"], ordenar_por="receita", limite=TOP_N_MAXIMO)
+
+    def _esqueleto(self, tab_frame, chave, montar):
+        # A estrutura fixa da aba é montada uma vez e mantida entre as reconstruções por mudança de filtro:
+        # como os frames dos gráficos continuam os mesmos, o registro de gráficos reaproveita figura e canvas.
+        # Só é remontada se algum widget foi destruído (aba limpa para uma mensagem de "sem dados").
+        esqueleto = self.esqueletos.get(chave)
+        if esqueleto is None or not all(widget.winfo_exists() for widget in esqueleto.values()):
+            self.app._clear_tab_frame(tab_frame)
+            esqueleto = montar(tab_frame)
+            self.esqueletos[chave] = esqueleto
+        return esqueleto
 
     # --- Métodos de Construção das Abas ---
 
-    def build_tab_geral(self, tab_frame):
-        self.app._clear_tab_frame(tab_frame)
+    def _montar_tab_geral(self, tab_frame):
         customtkinter.CTkLabel(tab_frame, text="Performance Geral de Vendas", font=self.font_header).pack(anchor="w", pady=(0,10))
-        df = self.app.app_state.df_filtrado
 
-        self.geral_chart_frame = customtkinter.CTkFrame(tab_frame)
-        self.geral_chart_frame.pack(fill="both", expand=True, pady=5)
+        grafico = customtkinter.CTkFrame(tab_frame)
+        grafico.pack(fill="both", expand=True, pady=5)
 
         geral_buttons_frame = customtkinter.CTkFrame(tab_frame, fg_color="transparent")
         geral_buttons_frame.pack(fill="x", pady=(10, 5))
@@ -77,20 +255,27 @@ class DashboardTabsUIManager:
         ).pack(side="left", padx=5)
 
         customtkinter.CTkLabel(tab_frame, text="Lista de Produtos:", font=self.font_bold).pack(anchor="w", pady=(10, 5))
-        self.geral_product_list_frame = customtkinter.CTkScrollableFrame(tab_frame, height=200)
-        self.geral_product_list_frame.pack(fill="both", expand=True, pady=5)
-        customtkinter.CTkLabel(self.geral_product_list_frame, text="Clique nos botões acima para ver a lista de produtos.", font=self.font_normal).pack(pady=10)
+        lista = ListaVirtual(tab_frame, font=self.font_normal, font_titulo=self.font_bold, height=200)
+        lista.pack(fill="both", expand=True, pady=5)
+        return {"grafico": grafico, "lista": lista}
+
+    def build_tab_geral(self, tab_frame):
+        esqueleto = self._esqueleto(tab_frame, "Visão Geral", self._montar_tab_geral)
+        self.geral_chart_frame = esqueleto["grafico"]
+        self.geral_product_list_frame = esqueleto["lista"]
+        self.geral_product_list_frame.mostrar_mensagem("Clique nos botões acima para ver a lista de produtos.")
+        df = self.app.app_state.df_filtrado
 
         if df is None or df.empty:
             self.app._show_no_data_message(self.geral_chart_frame)
             return
 
-        if COL_CATEGORIA in df.columns and COL_VALOR in df.columns:
-            vendas_por_categoria = df.groupby(COL_CATEGORIA)[COL_VALOR].sum().reset_index()
+        vendas_por_categoria = self._agregado(["categoria"], ["receita"], ordenar_por="receita")
+        if vendas_por_categoria is not None:
             vendas_por_categoria = vendas_por_categoria[vendas_por_categoria[COL_VALOR] > 0]
-            vendas_por_categoria = vendas_por_categoria.sort_values(by=COL_VALOR, ascending=False)
 
             if not vendas_por_categoria.empty:
+                self._registrar_dados_grafico("geral_categorias", f"Vendas por {COL_CATEGORIA}", vendas_por_categoria)
                 top_n = 5
                 vendas_para_plotar = vendas_por_categoria.head(top_n)
                 if len(vendas_por_categoria) > top_n:
@@ -99,68 +284,71 @@ class DashboardTabsUIManager:
                         outros_df = pd.DataFrame([{COL_CATEGORIA: "Outros", COL_VALOR: outras_categorias_soma}])
                         vendas_para_plotar = pd.concat([vendas_para_plotar, outros_df], ignore_index=True)
                 
-                fig = Figure(figsize=(8, 5), dpi=100)
-                ax = fig.add_subplot(111)
-                sns.barplot(x=COL_CATEGORIA, y=COL_VALOR, data=vendas_para_plotar, ax=ax, palette="viridis", hue=COL_CATEGORIA, legend=False)
-                ax.set_title(f"Top Categorias por Vendas")
-                ax.set_xlabel(COL_CATEGORIA)
-                ax.set_ylabel(f"{COL_VALOR} ($)")
-                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-                fig.tight_layout()
-                self.app.embed_matplotlib_figure(fig, self.geral_chart_frame)
+                self._desenhar_barras("geral_categorias", self.geral_chart_frame, vendas_para_plotar[COL_CATEGORIA], vendas_para_plotar[COL_VALOR],
+                                      "Top Categorias por Vendas", COL_CATEGORIA, f"{COL_VALOR} ($)", "viridis")
             else:
                 self.app._show_no_data_message(self.geral_chart_frame, f"Nenhuma venda positiva para {COL_CATEGORIA} nos filtros.")
         else:
-            self.app._show_no_data_message(self.geral_chart_frame, f"Gráfico de Vendas por {COL_CATEGORIA} desabilitado (colunas ausentes).")
+            self.app._show_no_data_message(self.geral_chart_frame, f"Gráfico de Vendas por {COL_CATEGORIA} indisponível (erro ao consultar o banco).")
 
     def _show_top_general_products(self):
-        if not self.geral_product_list_frame or not self.geral_product_list_frame.winfo_exists(): return
-        self.app._clear_tab_frame(self.geral_product_list_frame)
+        lista = self.geral_product_list_frame
+        if not lista or not lista.winfo_exists(): return
         df = self.app.app_state.df_filtrado
 
         if df is None or df.empty or COL_NOME_PRODUTO not in df.columns or COL_VALOR not in df.columns:
-            customtkinter.CTkLabel(self.geral_product_list_frame, text="Dados insuficientes para mostrar produtos.", font=self.font_normal).pack(pady=10)
+            lista.mostrar_mensagem("Dados insuficientes para mostrar produtos.")
             return
 
-        top_produtos = df.groupby(COL_NOME_PRODUTO)[COL_VALOR].sum().nlargest(10).reset_index()
-        if top_produtos.empty:
-             customtkinter.CTkLabel(self.geral_product_list_frame, text="Nenhum produto encontrado.", font=self.font_normal).pack(pady=10)
-             return
-        customtkinter.CTkLabel(self.geral_product_list_frame, text="Top 10 Produtos (Geral):", font=self.font_bold).pack(anchor="w")
-        for index, row in top_produtos.iterrows():
-            product_info = f"{index + 1}. {row[COL_NOME_PRODUTO]} - Vendas: ${row[COL_VALOR]:,.2f}"
-            customtkinter.CTkLabel(self.geral_product_list_frame, text=product_info, font=self.font_normal, anchor="w").pack(fill="x", padx=5)
+        top_produtos = self._ranking_produtos()
+        if top_produtos is not None:
+            top_produtos = top_produtos.head(10)
+        if top_produtos is None or top_produtos.empty:
+            lista.mostrar_mensagem("Nenhum produto encontrado.")
+            return
+        nomes = top_produtos[COL_NOME_PRODUTO].to_numpy()
+        valores = top_produtos[COL_VALOR].to_numpy(dtype=float)
+        lista.mostrar("Top 10 Produtos (Geral):", len(nomes), lambda i: f"{i + 1}. {nomes[i]} - Vendas: ${valores[i]:,.2f}")
+
+    def _produtos_ordenados(self):
+        # Nomes e valores já na ordem de exibição (maior venda primeiro, ou mais relevante primeiro quando há
+        # busca de texto); a lista virtual formata só as linhas visíveis.
+        estado = self.app.app_state
+        df = estado.df_filtrado
+        valores = df[COL_VALOR].to_numpy(dtype=np.float64, na_value=np.nan)
+        busca = estado.filtros.get("busca")
+        if busca and estado.motor_filtros is not None:
+            # O índice de df_filtrado é a posição da linha no df do motor, a mesma de posicoes_busca.
+            posicoes = estado.motor_filtros.posicoes_busca(busca)
+            relevancia = np.full(len(estado.motor_filtros.df), len(posicoes), dtype=np.int64)
+            relevancia[posicoes] = np.arange(len(posicoes))
+            ordem = np.argsort(relevancia[df.index.to_numpy()], kind='stable')
+        else:
+            ordem = np.argsort(-valores, kind='stable')
+        return df[COL_NOME_PRODUTO].to_numpy()[ordem], valores[ordem]
 
     def _show_products_in_current_category(self):
-        if not self.geral_product_list_frame or not self.geral_product_list_frame.winfo_exists(): return
-        self.app._clear_tab_frame(self.geral_product_list_frame)
+        lista = self.geral_product_list_frame
+        if not lista or not lista.winfo_exists(): return
         df = self.app.app_state.df_filtrado
         categoria_selecionada = self.app.categoria_var.get()
+        busca = self.app.app_state.filtros.get("busca")
 
         if df is None or df.empty or COL_NOME_PRODUTO not in df.columns or COL_CATEGORIA not in df.columns:
-            customtkinter.CTkLabel(self.geral_product_list_frame, text="Dados insuficientes.", font=self.font_normal).pack(pady=10)
+            lista.mostrar_mensagem("Dados insuficientes.")
             return
-        if categoria_selecionada == "Todas":
-             customtkinter.CTkLabel(self.geral_product_list_frame, text="Selecione uma categoria no filtro.", font=self.font_normal).pack(pady=10)
-             return
-        produtos_categoria = df[df[COL_CATEGORIA] == categoria_selecionada].copy()
-        if produtos_categoria.empty:
-             customtkinter.CTkLabel(self.geral_product_list_frame, text=f"Nenhum produto em '{categoria_selecionada}'.", font=self.font_normal).pack(pady=10)
-             return
-        produtos_categoria = produtos_categoria.sort_values(by=COL_VALOR, ascending=False)
-        customtkinter.CTkLabel(self.geral_product_list_frame, text=f"Produtos em '{categoria_selecionada}':", font=self.font_bold).pack(anchor="w")
-        for index, row in produtos_categoria.iterrows():
-             product_info = f"- {row[COL_NOME_PRODUTO]} - Vendas: ₹{row[COL_VALOR]:,.2f}"
-             customtkinter.CTkLabel(self.geral_product_list_frame, text=product_info, font=self.font_normal, anchor="w").pack(fill="x", padx=5)
+        if categoria_selecionada == "Todas" and not busca:
+            lista.mostrar_mensagem("Selecione uma categoria ou busque um produto no filtro.")
+            return
+        nomes, valores = self._derivado(("produtos_ordenados",), self._produtos_ordenados)
+        if len(nomes) == 0:
+            lista.mostrar_mensagem(f"Nenhum produto em '{categoria_selecionada}'.")
+            return
+        titulo = f"Resultados para '{busca}' ({len(nomes)}):" if busca else f"Produtos em '{categoria_selecionada}' ({len(nomes)}):"
+        lista.mostrar(titulo, len(nomes), lambda i: f"- {nomes[i]} - Vendas: ₹{valores[i]:,.2f}")
 
-    def build_tab_produtos(self, tab_frame):
-        self.app._clear_tab_frame(tab_frame)
+    def _montar_tab_produtos(self, tab_frame):
         customtkinter.CTkLabel(tab_frame, text="Análise Detalhada de Produtos", font=self.font_header).pack(anchor="w", pady=(0,10))
-        df = self.app.app_state.df_filtrado
-
-        if df is None or df.empty:
-            self.app._show_no_data_message(tab_frame)
-            return
 
         # Criar um frame rolável para conter todos os elementos da aba
         scrollable_content_frame = customtkinter.CTkScrollableFrame(tab_frame)
@@ -171,8 +359,8 @@ class DashboardTabsUIManager:
         customtkinter.CTkLabel(controls_frame, text="Top N Produtos:", font=self.font_normal).pack(side="left", padx=5)
         
         top_n_slider = customtkinter.CTkSlider(
-            controls_frame, from_=3, to=20, variable=self.top_n_var,
-            orientation="horizontal", command=lambda val: self._update_tab_produtos_charts()
+            controls_frame, from_=3, to=TOP_N_MAXIMO, variable=self.top_n_var,
+            orientation="horizontal", command=lambda val: self._top_n_debounce()
         )
         top_n_slider.pack(side="left", padx=5, fill="x", expand=True)
         
@@ -186,122 +374,152 @@ class DashboardTabsUIManager:
             self.top_n_var.trace_add("write", _update_slider_label_callback)
             self._top_n_var_trace_set_up = True
 
-        self.top_produtos_chart_frame = customtkinter.CTkFrame(scrollable_content_frame)
-        self.top_produtos_chart_frame.pack(fill="both", expand=True, pady=5)
-        self.produtos_por_categoria_chart_frame = customtkinter.CTkFrame(scrollable_content_frame)
-        self.produtos_por_categoria_chart_frame.pack(fill="both", expand=True, pady=5)
+        top_produtos = customtkinter.CTkFrame(scrollable_content_frame)
+        top_produtos.pack(fill="both", expand=True, pady=5)
+        por_categoria = customtkinter.CTkFrame(scrollable_content_frame)
+        por_categoria.pack(fill="both", expand=True, pady=5)
+        return {"top_produtos": top_produtos, "por_categoria": por_categoria}
+
+    def build_tab_produtos(self, tab_frame):
+        df = self.app.app_state.df_filtrado
+        if df is None or df.empty:
+            self.app._show_no_data_message(tab_frame)
+            return
+
+        esqueleto = self._esqueleto(tab_frame, "Análise de Produtos", self._montar_tab_produtos)
+        self.top_produtos_chart_frame = esqueleto["top_produtos"]
+        self.produtos_por_categoria_chart_frame = esqueleto["por_categoria"]
         self._update_tab_produtos_charts()
 
     def _update_tab_produtos_charts(self):
+        self._top_n_desenhado = None
+        self._update_top_produtos_chart()
+        self._update_produtos_por_categoria_chart()
+
+    def _update_top_produtos_chart(self):
+        # Chamado pelo slider (com debounce): só o gráfico de barras do ranking é redesenhado.
         df = self.app.app_state.df_filtrado
+        if not self.top_produtos_chart_frame or not self.top_produtos_chart_frame.winfo_exists():
+            return
         if df is None or df.empty:
-            if self.top_produtos_chart_frame and self.top_produtos_chart_frame.winfo_exists():
-                 self.app._show_no_data_message(self.top_produtos_chart_frame)
-            if self.produtos_por_categoria_chart_frame and self.produtos_por_categoria_chart_frame.winfo_exists():
-                 self.app._show_no_data_message(self.produtos_por_categoria_chart_frame)
+            self.app._show_no_data_message(self.top_produtos_chart_frame)
             return
 
-        if self.top_produtos_chart_frame and self.top_produtos_chart_frame.winfo_exists():
-            if COL_NOME_PRODUTO in df.columns and COL_VALOR in df.columns:
-                top_n = self.top_n_var.get()
-                top_produtos = df.groupby(COL_NOME_PRODUTO)[COL_VALOR].sum().nlargest(top_n).reset_index()
-                if not top_produtos.empty:
-                    max_len_pn = 25
-                    top_produtos = top_produtos.copy()
-                    top_produtos[COL_NOME_PRODUTO + '_display'] = top_produtos[COL_NOME_PRODUTO].apply(
-                        lambda x: x[:max_len_pn] if len(x) > max_len_pn else x
-                    )
-
-                    fig = Figure(figsize=(8, 5), dpi=100)
-                    ax = fig.add_subplot(111)
-                    sns.barplot(x=COL_NOME_PRODUTO + '_display', y=COL_VALOR, data=top_produtos, ax=ax, hue=COL_NOME_PRODUTO + '_display', palette="viridis", legend=False)
-                    ax.set_title(f"Top {top_n} Produtos por {COL_VALOR}")
-                    ax.set_xlabel("Produto")
-                    ax.set_ylabel(f"{COL_VALOR} ($)")
-                    plt.setp(ax.get_xticklabels(), rotation=45, ha='right', fontsize=8)
-                    fig.tight_layout()
-                    self.app.embed_matplotlib_figure(fig, self.top_produtos_chart_frame)
-                else:
-                    self.app._show_no_data_message(self.top_produtos_chart_frame, "Nenhum produto para ranking.")
-            else:
-                self.app._show_no_data_message(self.top_produtos_chart_frame, f"Colunas para ranking ausentes.")
-
-        if self.produtos_por_categoria_chart_frame and self.produtos_por_categoria_chart_frame.winfo_exists():
-            if COL_CATEGORIA in df.columns:
-                contagem_categoria = df[COL_CATEGORIA].value_counts().reset_index()
-                if not contagem_categoria.empty:
-                    contagem_categoria.columns = [COL_CATEGORIA, 'Contagem']
-                    fig2 = Figure(figsize=(8, 5), dpi=100)
-                    ax2 = fig2.add_subplot(111)
-                    sns.barplot(x=COL_CATEGORIA, y='Contagem', data=contagem_categoria, ax=ax2, hue=COL_CATEGORIA, palette="Set3", legend=False)
-                    ax2.set_title(f"Produtos por {COL_CATEGORIA}")
-                    ax2.set_xlabel(COL_CATEGORIA)
-                    ax2.set_ylabel("Nº Produtos")
-                    plt.setp(ax2.get_xticklabels(), rotation=45, ha='right', fontsize=8)
-                    fig2.tight_layout()
-                    self.app.embed_matplotlib_figure(fig2, self.produtos_por_categoria_chart_frame)
-                else:
-                    self.app._show_no_data_message(self.produtos_por_categoria_chart_frame, "Nenhuma categoria encontrada.")
+        top_n = self.top_n_var.get()
+        if top_n == self._top_n_desenhado:
+            return
+        self._top_n_desenhado = top_n
+        if COL_NOME_PRODUTO in df.columns and COL_VALOR in df.columns:
+            top_produtos = self._ranking_produtos()
+            if top_produtos is not None and not top_produtos.empty:
+                max_len_pn = 25
+                top_produtos = top_produtos.head(top_n).copy()
+                self._registrar_dados_grafico("produtos_top_n", f"Top {top_n} Produtos por {COL_VALOR}", top_produtos[[COL_NOME_PRODUTO, COL_VALOR]])
+                top_produtos[COL_NOME_PRODUTO + '_display'] = top_produtos[COL_NOME_PRODUTO].apply(
+                    lambda x: x[:max_len_pn] if len(x) > max_len_pn else x
+                )
+
+                self._desenhar_barras("produtos_top_n", self.top_produtos_chart_frame, top_produtos[COL_NOME_PRODUTO + '_display'], top_produtos[COL_VALOR],
+                                      f"Top {top_n} Produtos por {COL_VALOR}", "Produto", f"{COL_VALOR} ($)", "viridis", fontsize=8)
             else:
-                self.app._show_no_data_message(self.produtos_por_categoria_chart_frame, f"Coluna {COL_CATEGORIA} ausente.")
+                self.app._show_no_data_message(self.top_produtos_chart_frame, "Nenhum produto para ranking.")
+        else:
+            self.app._show_no_data_message(self.top_produtos_chart_frame, f"Colunas para ranking ausentes.")
 
-    def build_tab_precos_avaliacoes(self, tab_frame):
-        self.app._clear_tab_frame(tab_frame)
-        customtkinter.CTkLabel(tab_frame, text=f"Análise de Preços ({COL_VALOR}), Descontos e Avaliações", font=self.font_header).pack(anchor="w", pady=(0,10))
+    def _update_produtos_por_categoria_chart(self):
         df = self.app.app_state.df_filtrado
+        if not self.produtos_por_categoria_chart_frame or not self.produtos_por_categoria_chart_frame.winfo_exists():
+            return
         if df is None or df.empty:
-            self.app._show_no_data_message(tab_frame)
+            self.app._show_no_data_message(self.produtos_por_categoria_chart_frame)
             return
 
+        if COL_CATEGORIA in df.columns:
+            contagem_categoria = self._agregado(["categoria"], ["contagem"], ordenar_por="contagem")
+            if contagem_categoria is not None and not contagem_categoria.empty:
+                self._registrar_dados_grafico("produtos_por_categoria", f"Produtos por {COL_CATEGORIA}", contagem_categoria)
+                self._desenhar_barras("produtos_por_categoria", self.produtos_por_categoria_chart_frame, contagem_categoria[COL_CATEGORIA], contagem_categoria['Contagem'],
+                                      f"Produtos por {COL_CATEGORIA}", COL_CATEGORIA, "Nº Produtos", "Set3", fontsize=8)
+            else:
+                self.app._show_no_data_message(self.produtos_por_categoria_chart_frame, "Nenhuma categoria encontrada.")
+        else:
+            self.app._show_no_data_message(self.produtos_por_categoria_chart_frame, f"Coluna {COL_CATEGORIA} ausente.")
+
+    def _montar_tab_precos_avaliacoes(self, tab_frame):
+        customtkinter.CTkLabel(tab_frame, text=f"Análise de Preços ({COL_VALOR}), Descontos e Avaliações", font=self.font_header).pack(anchor="w", pady=(0,10))
         scrollable_charts_frame = customtkinter.CTkScrollableFrame(tab_frame)
         scrollable_charts_frame.pack(fill="both", expand=True)
+        esqueleto = {}
+        for nome, altura in (("histograma", 400), ("dispersao", 450), ("descontos", 520)):
+            esqueleto[nome] = customtkinter.CTkFrame(scrollable_charts_frame, height=altura)
+            esqueleto[nome].pack(fill="x", expand=True, pady=5)
+        return esqueleto
+
+    def build_tab_precos_avaliacoes(self, tab_frame):
+        df = self.app.app_state.df_filtrado
+        if df is None or df.empty:
+            self.app._show_no_data_message(tab_frame)
+            return
 
-        chart1_frame = customtkinter.CTkFrame(scrollable_charts_frame, height=400)
-        chart1_frame.pack(fill="x", expand=True, pady=5)
+        esqueleto = self._esqueleto(tab_frame, "Preços & Avaliações", self._montar_tab_precos_avaliacoes)
+        chart1_frame = esqueleto["histograma"]
         if COL_VALOR in df.columns and df[COL_VALOR].notna().any():
-            fig1 = Figure(figsize=(7, 4), dpi=100)
+            fig1 = self.app.charts.figura("precos_histograma", chart1_frame, (7, 4))
             ax1 = fig1.add_subplot(111)
-            sns.histplot(df[COL_VALOR], kde=True, ax=ax1, color="skyblue", bins=30)
+            # Histograma e KDE calculados uma vez por filtro; aqui só bar/plot.
+            contagens, bordas, grade, densidade = self._derivado(("distribuicao", COL_VALOR, 30), lambda: distribuicao(df[COL_VALOR], 30))
+            self._registrar_dados_grafico("precos_histograma", f"Distribuição de Preços ({COL_VALOR})",
+                                          pd.DataFrame({"Início da Faixa": bordas[:-1], "Fim da Faixa": bordas[1:], "Frequência": contagens}))
+            ax1.bar(bordas[:-1], contagens, width=np.diff(bordas), align='edge', color="skyblue", edgecolor="white", alpha=0.75)
+            if len(densidade):
+                dentro = (grade >= bordas[0]) & (grade <= bordas[-1])
+                ax1.plot(grade[dentro], densidade[dentro], color="skyblue", linewidth=1.5)
             ax1.set_title(f"Distribuição de Preços ({COL_VALOR} com Desconto)")
             ax1.set_xlabel("Preço (₹)")
             ax1.set_ylabel("Frequência")
             fig1.tight_layout()
-            self.app.embed_matplotlib_figure(fig1, chart1_frame)
+            self.app.charts.desenhar("precos_histograma")
         else:
             self.app._show_no_data_message(chart1_frame, f"Dados de {COL_VALOR} insuficientes.")
 
-        chart2_frame = customtkinter.CTkFrame(scrollable_charts_frame, height=450)
-        chart2_frame.pack(fill="x", expand=True, pady=5)
+        chart2_frame = esqueleto["dispersao"]
         if COL_VALOR in df.columns and COL_AVALIACAO in df.columns and df[COL_AVALIACAO].notna().any():
             df_scatter = df.dropna(subset=[COL_AVALIACAO, COL_VALOR])
             if not df_scatter.empty:
-                fig2 = Figure(figsize=(7, 4.3), dpi=100)
+                fig2 = self.app.charts.figura("precos_dispersao", chart2_frame, (7, 4.3))
                 ax2 = fig2.add_subplot(111)
-                scatter = ax2.scatter(df_scatter[COL_AVALIACAO], df_scatter[COL_VALOR], c=df_scatter[COL_AVALIACAO], cmap="plasma", alpha=0.7)
+                if usar_lod(len(df_scatter), self.limite_pontos_lod):
+                    densidade = self._derivado(("densidade", COL_AVALIACAO, COL_VALOR),
+                                               lambda: densidade_2d(df_scatter[COL_AVALIACAO], df_scatter[COL_VALOR]))
+                    scatter = desenhar_densidade(ax2, densidade)
+                    anotar_lod(ax2, len(df_scatter))
+                    rotulo_cor = "Nº Produtos (escala log)"
+                else:
+                    scatter = ax2.scatter(df_scatter[COL_AVALIACAO], df_scatter[COL_VALOR], c=df_scatter[COL_AVALIACAO], cmap="plasma", alpha=0.7)
+                    rotulo_cor = COL_AVALIACAO
                 ax2.set_title(f"Preço ({COL_VALOR}) vs. {COL_AVALIACAO}")
                 ax2.set_xlabel(COL_AVALIACAO)
                 ax2.set_ylabel("Preço ($)")
                 cbar = fig2.colorbar(scatter, ax=ax2)
-                cbar.set_label(COL_AVALIACAO)
+                cbar.set_label(rotulo_cor)
                 fig2.tight_layout()
-                self.app.embed_matplotlib_figure(fig2, chart2_frame)
+                self.app.charts.desenhar("precos_dispersao")
             else:
                 self.app._show_no_data_message(chart2_frame, f"Dados de {COL_VALOR} ou {COL_AVALIACAO} insuficientes.")
         else:
             self.app._show_no_data_message(chart2_frame, f"Colunas {COL_VALOR} ou {COL_AVALIACAO} ausentes.")
 
-        chart3_frame = customtkinter.CTkFrame(scrollable_charts_frame, height=520)
-        chart3_frame.pack(fill="x", expand=True, pady=5)
+        chart3_frame = esqueleto["descontos"]
         if COL_NOME_PRODUTO in df.columns and COL_PERCENTUAL_DESCONTO in df.columns and df[COL_PERCENTUAL_DESCONTO].notna().any():
             top_n_desconto = 10
-            produtos_maior_desconto = df.nlargest(top_n_desconto, COL_PERCENTUAL_DESCONTO)
+            produtos_maior_desconto = self._derivado(("maiores_descontos", top_n_desconto), lambda: df.nlargest(top_n_desconto, COL_PERCENTUAL_DESCONTO))
             if not produtos_maior_desconto.empty:
+                self._registrar_dados_grafico("precos_descontos", f"Top {top_n_desconto} Produtos por {COL_PERCENTUAL_DESCONTO}", produtos_maior_desconto)
                 max_len_pn = 25
                 produtos_maior_desconto = produtos_maior_desconto.copy()
-                produtos_maior_desconto[COL_NOME_PRODUTO + '_display'] = produtos_maior_desconto[COL_NOME_PRODUTO].apply(
-                    lambda x: x[:max_len_pn] if len(x) > max_len_pn else x
-                )
-                fig3 = Figure(figsize=(7, 5.0), dpi=100)
+                # Nomes de produto podem vir codificados como categoria (perfil compacto): converte antes de cortar.
+                produtos_maior_desconto[COL_NOME_PRODUTO + '_display'] = produtos_maior_desconto[COL_NOME_PRODUTO].astype(str).str.slice(0, max_len_pn)
+                fig3 = self.app.charts.figura("precos_descontos", chart3_frame, (7, 5.0))
                 ax3 = fig3.add_subplot(111)
                 sns.barplot(x=COL_NOME_PRODUTO + '_display', y=COL_PERCENTUAL_DESCONTO, data=produtos_maior_desconto, ax=ax3, palette="OrRd")
                 ax3.set_title(f"Top {top_n_desconto} Produtos por {COL_PERCENTUAL_DESCONTO}")
@@ -310,52 +528,58 @@ class DashboardTabsUIManager:
                 ax3.tick_params(axis='x', rotation=65, labelsize=8)
                 fig3.subplots_adjust(bottom=0.3)
                 fig3.tight_layout()
-                self.app.embed_matplotlib_figure(fig3, chart3_frame)
+                self.app.charts.desenhar("precos_descontos")
             else:
                 self.app._show_no_data_message(chart3_frame, "Nenhum produto com desconto.")
         else:
             self.app._show_no_data_message(chart3_frame, f"Colunas {COL_NOME_PRODUTO} ou {COL_PERCENTUAL_DESCONTO} ausentes.")
 
-    def build_tab_matplotlib_avancado(self, tab_frame):
-        self.app._clear_tab_frame(tab_frame)
+    def _montar_tab_matplotlib_avancado(self, tab_frame, titulos):
         customtkinter.CTkLabel(tab_frame, text="Exploração Avançada com Matplotlib & Seaborn", font=self.font_header).pack(anchor="w", pady=(0,10))
+        scrollable_charts_frame = customtkinter.CTkScrollableFrame(tab_frame)
+        scrollable_charts_frame.pack(fill="both", expand=True)
+        esqueleto = {}
+        for indice, title in enumerate(titulos):
+            chart_f = customtkinter.CTkFrame(scrollable_charts_frame, height=450)
+            chart_f.pack(fill="x", expand=True, pady=10)
+            customtkinter.CTkLabel(chart_f, text=title, font=self.font_bold).pack(anchor="w")
+            esqueleto[indice] = chart_f
+        return esqueleto
+
+    def build_tab_matplotlib_avancado(self, tab_frame):
         df = self.app.app_state.df_filtrado
         if df is None or df.empty:
             self.app._show_no_data_message(tab_frame)
             return
 
-        scrollable_charts_frame = customtkinter.CTkScrollableFrame(tab_frame)
-        scrollable_charts_frame.pack(fill="both", expand=True)
-
         chart_configs = [
             (f"Box Plot: {COL_VALOR} por {COL_CATEGORIA}", [COL_CATEGORIA, COL_VALOR],
-             lambda ax, data: sns.boxplot(x=COL_CATEGORIA, y=COL_VALOR, data=data, ax=ax, palette="Set3"),
+             lambda ax, data: sns.boxplot(x=COL_CATEGORIA, y=COL_VALOR, data=data, ax=ax, palette="Set3", order=sorted(self._categorias_presentes(data))),
              {'xlabel': COL_CATEGORIA, 'ylabel': f'{COL_VALOR} ($)', 'rotation': 45}),
             (f"Violin Plot: {COL_AVALIACAO} por {COL_CATEGORIA}", [COL_CATEGORIA, COL_AVALIACAO],
-             lambda ax, data: sns.violinplot(x=COL_CATEGORIA, y=COL_AVALIACAO, data=data.dropna(subset=[COL_AVALIACAO]), ax=ax, palette="Pastel1"),
+             self._desenhar_violino,
              {'xlabel': COL_CATEGORIA, 'ylabel': COL_AVALIACAO, 'rotation': 45},
              lambda d: d[COL_AVALIACAO].notna().any()),
             (f"Scatter Plot: {COL_VALOR} vs. {COL_PERCENTUAL_DESCONTO}", [COL_VALOR, COL_PERCENTUAL_DESCONTO, COL_CATEGORIA],
-             lambda ax, data: sns.scatterplot(x=COL_PERCENTUAL_DESCONTO, y=COL_VALOR, data=data.dropna(subset=[COL_PERCENTUAL_DESCONTO, COL_VALOR]), ax=ax, hue=COL_CATEGORIA, palette="viridis", alpha=0.7),
+             self._desenhar_dispersao_por_categoria,
              {'xlabel': f'{COL_PERCENTUAL_DESCONTO} (%)', 'ylabel': f'{COL_VALOR} (₹)'},
              lambda d: d[COL_PERCENTUAL_DESCONTO].notna().any()),
             ("Heatmap de Correlação", [],
-             lambda ax, data: sns.heatmap(data.corr(numeric_only=True), annot=True, cmap='coolwarm', fmt=".2f", linewidths=.5, ax=ax),
+             self._desenhar_heatmap_correlacao,
              {},
-             lambda d: len(d.select_dtypes(include=np.number).columns) > 1,
-             lambda d: d.select_dtypes(include=np.number)),
+             lambda d: len([col for col in COLUNAS_NUMERICAS if col in d.columns]) > 1,
+             lambda d: d[[col for col in COLUNAS_NUMERICAS if col in d.columns]]),
             (f"Count Plot: Produtos por {COL_CATEGORIA}", [COL_CATEGORIA],
-             lambda ax, data: sns.countplot(y=COL_CATEGORIA, data=data, ax=ax, palette="Spectral", order = data[COL_CATEGORIA].value_counts().index),
+             lambda ax, data: sns.countplot(y=COL_CATEGORIA, data=data, ax=ax, palette="Spectral", order=self._categorias_presentes(data)),
              {'xlabel': 'Contagem', 'ylabel': COL_CATEGORIA}),
             (f"Joint Plot: {COL_AVALIACAO} vs. {COL_CONTAGEM_AVALIACOES}", [COL_AVALIACAO, COL_CONTAGEM_AVALIACOES],
              None, {}, lambda d: d[COL_AVALIACAO].notna().any() and d[COL_CONTAGEM_AVALIACOES].notna().any())
         ]
 
-        for title, req_cols, plot_func, labels, *prereq_and_prep in chart_configs:
-            chart_f = customtkinter.CTkFrame(scrollable_charts_frame, height=450)
-            chart_f.pack(fill="x", expand=True, pady=10)
-            customtkinter.CTkLabel(chart_f, text=title, font=self.font_bold).pack(anchor="w")
-            
+        titulos = [config[0] for config in chart_configs]
+        esqueleto = self._esqueleto(tab_frame, "Exploração Avançada", lambda frame: self._montar_tab_matplotlib_avancado(frame, titulos))
+        for indice, (title, req_cols, plot_func, labels, *prereq_and_prep) in enumerate(chart_configs):
+            chart_f = esqueleto[indice]
             prereq_check = prereq_and_prep[0] if prereq_and_prep else lambda d: True
             data_prep_func = prereq_and_prep[1] if len(prereq_and_prep) > 1 else lambda d: d
 
@@ -366,13 +590,11 @@ class DashboardTabsUIManager:
                     continue
                 if title.startswith("Joint Plot"):
                     try:
-                        joint_fig = sns.jointplot(x=COL_AVALIACAO, y=COL_CONTAGEM_AVALIACOES, data=df.dropna(subset=[COL_AVALIACAO, COL_CONTAGEM_AVALIACOES]), kind='scatter', color='skyblue', marginal_kws=dict(bins=15, fill=True))
-                        joint_fig.fig.suptitle(f'{COL_AVALIACAO} vs. {COL_CONTAGEM_AVALIACOES} (Marginais)', y=1.02, fontsize=10)
-                        self.app.embed_matplotlib_figure(joint_fig.fig, chart_f)
+                        self._desenhar_joint_plot(f"avancado_{indice}", chart_f, df.dropna(subset=[COL_AVALIACAO, COL_CONTAGEM_AVALIACOES]))
                     except Exception as e:
                         self.app._show_no_data_message(chart_f, f"Erro Joint Plot: {e}")
                 elif plot_func:
-                    fig = Figure(figsize=(7, 4.2), dpi=100)
+                    fig = self.app.charts.figura(f"avancado_{indice}", chart_f, (7, 4.2))
                     ax = fig.add_subplot(111)
                     plot_func(ax, plot_data)
                     ax.set_title(title, fontsize=10)
@@ -380,24 +602,96 @@ class DashboardTabsUIManager:
                     if 'rotation' in labels: plt.setp(ax.get_xticklabels(), rotation=labels['rotation'], ha='right' if labels['rotation'] > 0 else 'center')
                     if 'ylabel' in labels: ax.set_ylabel(labels['ylabel'])
                     fig.tight_layout()
-                    self.app.embed_matplotlib_figure(fig, chart_f)
+                    self.app.charts.desenhar(f"avancado_{indice}")
             else:
                 self.app._show_no_data_message(chart_f, f"Colunas ({', '.join(req_cols)}) ou pré-requisitos não atendidos.")
 
-    def build_tab_3d(self, tab_frame):
-        self.app._clear_tab_frame(tab_frame)
+    def _categorias_presentes(self, data):
+        # Categorias com linhas no filtro, da mais frequente para a menos. A coluna categórica de df_filtrado
+        # mantém todas as categorias do df completo; passar esta lista como 'order'/'hue_order' evita grupos
+        # vazios nos gráficos sem copiar o DataFrame para remover as categorias não usadas.
+        def calcular():
+            contagens = data[COL_CATEGORIA].value_counts()
+            return list(contagens[contagens > 0].index)
+        return self._derivado(("categorias_presentes",), calcular)
+
+    def _desenhar_heatmap_correlacao(self, ax, data):
+        correlacao = self._derivado(("correlacao",), lambda: self._correlacao(data))
+        self._registrar_dados_grafico("correlacao", "Correlação entre Colunas Numéricas", correlacao.reset_index(names="Coluna"))
+        sns.heatmap(correlacao, annot=True, cmap='coolwarm', fmt=".2f", linewidths=.5, ax=ax)
+
+    def _desenhar_violino(self, ax, data):
+        # Densidades por categoria vindas do serviço de distribuições (KDE em grade): usam todas as linhas,
+        # sem amostragem, e ficam em cache por filtro.
+        def calcular():
+            dados = data.dropna(subset=[COL_AVALIACAO])
+            return [(categoria, *violino(valores)) for categoria, valores in dados.groupby(COL_CATEGORIA, observed=True)[COL_AVALIACAO]]
+        violinos = self._derivado(("violinos", COL_CATEGORIA, COL_AVALIACAO), calcular)
+        cores = sns.color_palette("Pastel1", len(violinos))
+        for posicao, (_, grade, densidade, quartis) in enumerate(violinos):
+            if len(densidade) and densidade.max() > 0:
+                meia_largura = densidade / densidade.max() * 0.4
+                ax.fill_betweenx(grade, posicao - meia_largura, posicao + meia_largura, facecolor=cores[posicao], edgecolor="dimgray", linewidth=0.8)
+            ax.vlines(posicao, quartis[0], quartis[2], color="dimgray", linewidth=4)
+            ax.scatter([posicao], [quartis[1]], color="white", s=12, zorder=3)
+        ax.set_xticks(range(len(violinos)), [str(categoria) for categoria, *_ in violinos])
+
+    def _desenhar_dispersao_por_categoria(self, ax, data):
+        dados, total = self._amostra_lod(data.dropna(subset=[COL_PERCENTUAL_DESCONTO, COL_VALOR]), "dispersao_desconto")
+        sns.scatterplot(x=COL_PERCENTUAL_DESCONTO, y=COL_VALOR, data=dados, ax=ax, hue=COL_CATEGORIA, palette="viridis", alpha=0.7,
+                        hue_order=sorted(self._categorias_presentes(data)))
+        if total is not None:
+            anotar_lod(ax, total, len(dados))
+
+    def _desenhar_joint_plot(self, slot_id, frame, dados):
+        # Equivalente ao sns.jointplot, mas na Figure do slot: o jointplot criava figuras do pyplot que nunca eram fechadas.
+        fig = self.app.charts.figura(slot_id, frame, (7, 6))
+        grade = fig.add_gridspec(4, 4, hspace=0.05, wspace=0.05)
+        ax = fig.add_subplot(grade[1:, :3])
+        ax_x = fig.add_subplot(grade[0, :3], sharex=ax)
+        ax_y = fig.add_subplot(grade[1:, 3], sharey=ax)
+        if usar_lod(len(dados), self.limite_pontos_lod):
+            ax.hexbin(dados[COL_AVALIACAO], dados[COL_CONTAGEM_AVALIACOES], gridsize=40, bins='log', mincnt=1, cmap='Blues')
+            anotar_lod(ax, len(dados))
+        else:
+            ax.scatter(dados[COL_AVALIACAO], dados[COL_CONTAGEM_AVALIACOES], color='skyblue', edgecolor='white', linewidth=0.5)
+        contagens_x, bordas_x = self._derivado(("histograma_joint", COL_AVALIACAO, 15), lambda: histograma(dados[COL_AVALIACAO], 15))
+        contagens_y, bordas_y = self._derivado(("histograma_joint", COL_CONTAGEM_AVALIACOES, 15), lambda: histograma(dados[COL_CONTAGEM_AVALIACOES], 15))
+        ax_x.bar(bordas_x[:-1], contagens_x, width=np.diff(bordas_x), align='edge', color='skyblue', alpha=0.6, edgecolor='skyblue')
+        ax_y.barh(bordas_y[:-1], contagens_y, height=np.diff(bordas_y), align='edge', color='skyblue', alpha=0.6, edgecolor='skyblue')
+        ax_x.tick_params(labelbottom=False, labelleft=False, left=False)
+        ax_y.tick_params(labelleft=False, labelbottom=False, bottom=False)
+        for eixo, lados in ((ax_x, ("top", "right", "left")), (ax_y, ("top", "right", "bottom"))):
+            for lado in lados:
+                eixo.spines[lado].set_visible(False)
+        ax.set_xlabel(COL_AVALIACAO)
+        ax.set_ylabel(COL_CONTAGEM_AVALIACOES)
+        fig.suptitle(f'{COL_AVALIACAO} vs. {COL_CONTAGEM_AVALIACOES} (Marginais)', fontsize=10)
+        self.app.charts.desenhar(slot_id)
+
+    def _montar_tab_3d(self, tab_frame):
         customtkinter.CTkLabel(tab_frame, text="Visualizações 3D Interativas", font=self.font_header).pack(anchor="w", pady=(0,10))
+        grafico = customtkinter.CTkFrame(tab_frame, fg_color="transparent")
+        grafico.pack(fill="both", expand=True)
+        nota = customtkinter.CTkLabel(tab_frame, text="Nota: Interatividade 3D limitada. Para rotação, use a barra de ferramentas Matplotlib ou salve.", wraplength=tab_frame.winfo_width()-20, font=self.font_normal)
+        return {"grafico": grafico, "nota": nota}
+
+    def build_tab_3d(self, tab_frame):
         df = self.app.app_state.df_filtrado
         if df is None or df.empty:
             self.app._show_no_data_message(tab_frame)
             return
 
+        esqueleto = self._esqueleto(tab_frame, "Visualizações 3D", self._montar_tab_3d)
+        grafico_frame, nota = esqueleto["grafico"], esqueleto["nota"]
+        nota.pack_forget()
+
         cols_3d_mpl = [COL_VALOR, COL_AVALIACAO, COL_CONTAGEM_AVALIACOES, COL_CATEGORIA]
         if all(col in df.columns for col in cols_3d_mpl) and all(df[col].notna().any() for col in [COL_VALOR, COL_AVALIACAO, COL_CONTAGEM_AVALIACOES]):
-            df_3d = df.dropna(subset=cols_3d_mpl)
+            df_3d, total_3d = self._amostra_lod(df.dropna(subset=cols_3d_mpl), "dispersao_3d")
             if not df_3d.empty:
                 try:
-                    fig = Figure(figsize=(8, 6), dpi=100)
+                    fig = self.app.charts.figura("dispersao_3d", grafico_frame, (8, 6))
                     ax = fig.add_subplot(111, projection='3d')
                     unique_categories = df_3d[COL_CATEGORIA].unique()
                     colors = plt.get_cmap('viridis', len(unique_categories))
@@ -410,19 +704,27 @@ class DashboardTabsUIManager:
                     ax.set_zlabel(COL_VALOR + " (₹)")
                     ax.set_title(f"3D: {COL_AVALIACAO}, {COL_CONTAGEM_AVALIACOES}, {COL_VALOR}", fontsize=10)
                     ax.legend(title=COL_CATEGORIA, fontsize=8)
+                    if total_3d is not None:
+                        anotar_lod(ax, total_3d, len(df_3d))
                     fig.tight_layout()
-                    self.app.embed_matplotlib_figure(fig, tab_frame)
-                    customtkinter.CTkLabel(tab_frame, text="Nota: Interatividade 3D limitada. Para rotação, use a barra de ferramentas Matplotlib ou salve.", wraplength=tab_frame.winfo_width()-20, font=self.font_normal).pack(pady=5)
+                    self.app.charts.desenhar("dispersao_3d")
+                    nota.pack(pady=5)
                 except Exception as e:
-                     self.app._show_no_data_message(tab_frame, f"Erro ao gerar gráfico 3D: {e}")
+                     self.app._show_no_data_message(grafico_frame, f"Erro ao gerar gráfico 3D: {e}")
             else:
-                self.app._show_no_data_message(tab_frame, "Dados insuficientes para 3D após NAs.")
+                self.app._show_no_data_message(grafico_frame, "Dados insuficientes para 3D após NAs.")
         else:
-            self.app._show_no_data_message(tab_frame, f"Colunas para 3D não disponíveis.")
+            self.app._show_no_data_message(grafico_frame, f"Colunas para 3D não disponíveis.")
 
-    def build_tab_sentimento(self, tab_frame):
-        self.app._clear_tab_frame(tab_frame)
+    def _montar_tab_sentimento(self, tab_frame):
         customtkinter.CTkLabel(tab_frame, text="Análise de Sentimento Baseada em Avaliações", font=self.font_header).pack(anchor="w", pady=(0,10))
+        distribuicao_frame = customtkinter.CTkFrame(tab_frame, height=350)
+        distribuicao_frame.pack(fill="x", expand=True, pady=5)
+        por_categoria_frame = customtkinter.CTkFrame(tab_frame, height=450)
+        por_categoria_frame.pack(fill="x", expand=True, pady=5)
+        return {"distribuicao": distribuicao_frame, "por_categoria": por_categoria_frame}
+
+    def build_tab_sentimento(self, tab_frame):
         df = self.app.app_state.df_filtrado
         if df is None or df.empty:
             self.app._show_no_data_message(tab_frame)
@@ -431,35 +733,37 @@ class DashboardTabsUIManager:
             self.app._show_no_data_message(tab_frame, f"Coluna '{COL_SENTIMENTO}' não gerada.")
             return
 
-        chart1_frame = customtkinter.CTkFrame(tab_frame, height=350)
-        chart1_frame.pack(fill="x", expand=True, pady=5)
-        sent_counts = df[COL_SENTIMENTO].value_counts().reset_index()
-        sent_counts.columns = [COL_SENTIMENTO, 'Contagem']
+        esqueleto = self._esqueleto(tab_frame, "Análise de Feedbacks", self._montar_tab_sentimento)
+        chart1_frame = esqueleto["distribuicao"]
+        sent_counts = self._agregado(["sentimento"], ["contagem"])
+        if sent_counts is None:
+            sent_counts = pd.DataFrame(columns=[COL_SENTIMENTO, 'Contagem'])
         color_map = {'Positivo': '#2ca02c', 'Neutro': '#1f77b4', 'Negativo': '#d62728', 'Não Avaliado': '#7f7f7f'}
-        category_orders = ["Positivo", "Neutro", "Negativo", "Não Avaliado"]
+        category_orders = ORDEM_SENTIMENTO
         sent_counts_ordered = pd.DataFrame({COL_SENTIMENTO: category_orders}).merge(sent_counts, on=COL_SENTIMENTO, how='left').fillna(0)
 
         if not sent_counts_ordered.empty:
-            fig1 = Figure(figsize=(7, 3.5), dpi=100)
+            self._registrar_dados_grafico("sentimento_distribuicao", "Distribuição de Sentimento", sent_counts_ordered)
+            fig1 = self.app.charts.figura("sentimento_distribuicao", chart1_frame, (7, 3.5))
             ax1 = fig1.add_subplot(111)
             sns.barplot(x=COL_SENTIMENTO, y='Contagem', data=sent_counts_ordered, ax=ax1, palette=[color_map.get(s, "#cccccc") for s in sent_counts_ordered[COL_SENTIMENTO]], order=category_orders)
             ax1.set_title("Distribuição de Sentimento")
             ax1.set_xlabel("Sentimento")
             ax1.set_ylabel("Nº Produtos")
             fig1.tight_layout()
-            self.app.embed_matplotlib_figure(fig1, chart1_frame)
+            self.app.charts.desenhar("sentimento_distribuicao")
         else:
             self.app._show_no_data_message(chart1_frame, "Sem dados de sentimento.")
 
-        chart2_frame = customtkinter.CTkFrame(tab_frame, height=450)
-        chart2_frame.pack(fill="x", expand=True, pady=5)
+        chart2_frame = esqueleto["por_categoria"]
         if COL_CATEGORIA in df.columns:
-            sent_cat = df.groupby([COL_CATEGORIA, COL_SENTIMENTO]).size().reset_index(name='Contagem')
-            if not sent_cat.empty:
-                fig2 = Figure(figsize=(8, 4.5), dpi=100)
+            sent_cat = self._agregado(["categoria", "sentimento"], ["contagem"])
+            if sent_cat is not None and not sent_cat.empty:
+                fig2 = self.app.charts.figura("sentimento_por_categoria", chart2_frame, (8, 4.5))
                 ax2 = fig2.add_subplot(111)
                 pivot_sent_cat = sent_cat.pivot(index=COL_CATEGORIA, columns=COL_SENTIMENTO, values='Contagem').fillna(0)
                 pivot_sent_cat = pivot_sent_cat.reindex(columns=category_orders, fill_value=0)
+                self._registrar_dados_grafico("sentimento_por_categoria", f"{COL_SENTIMENTO} por {COL_CATEGORIA}", pivot_sent_cat.reset_index())
                 pivot_sent_cat.plot(kind='bar', ax=ax2, color=[color_map.get(s, "#cccccc") for s in pivot_sent_cat.columns])
                 ax2.set_title(f"{COL_SENTIMENTO} por {COL_CATEGORIA}")
                 ax2.set_xlabel(COL_CATEGORIA)
@@ -467,7 +771,7 @@ class DashboardTabsUIManager:
                 plt.setp(ax2.get_xticklabels(), rotation=45, ha='right')
                 ax2.legend(title=COL_SENTIMENTO)
                 fig2.tight_layout()
-                self.app.embed_matplotlib_figure(fig2, chart2_frame)
+                self.app.charts.desenhar("sentimento_por_categoria")
             else:
                 self.app._show_no_data_message(chart2_frame, "Sem dados de sentimento por categoria.")
         else:
@@ -493,12 +797,43 @@ class DashboardTabsUIManager:
             self.app._show_no_data_message(tab_frame, "Nenhuma coluna selecionada para exibição está nos dados.")
             return
 
-        df_to_display = df[cols_existentes].copy()
-        data_list = df_to_display.values.tolist() if not df_to_display.empty else []
+        # A tabela recebe uma página por vez; clicar no cabeçalho ordena pelo índice do provedor.
+        provedor = ProvedorPaginas(df, cols_existentes)
+        navegacao_frame = customtkinter.CTkFrame(tab_frame, fg_color="transparent")
+        navegacao_frame.pack(fill="x", padx=5)
+        anterior_button = customtkinter.CTkButton(navegacao_frame, text="◀ Anterior", width=100, font=self.font_normal)
+        anterior_button.pack(side="left")
+        pagina_label = customtkinter.CTkLabel(navegacao_frame, text="", font=self.font_normal)
+        pagina_label.pack(side="left", padx=10)
+        proxima_button = customtkinter.CTkButton(navegacao_frame, text="Próxima ▶", width=100, font=self.font_normal)
+        proxima_button.pack(side="left")
 
         try:
-            sheet = Sheet(tab_frame, data=data_list, headers=cols_existentes)
+            sheet = Sheet(tab_frame, data=provedor.pagina(0), headers=cols_existentes)
             sheet.pack(fill="both", expand=True, padx=5, pady=5)
             sheet.enable_bindings()
         except Exception as e:
             customtkinter.CTkLabel(tab_frame, text=f"Erro ao carregar tabela: {e}", text_color="red", font=self.font_normal).pack()
+            return
+
+        def mostrar_pagina(numero):
+            sheet.set_sheet_data(provedor.pagina(numero), reset_col_positions=False)
+            inicio, fim = provedor.intervalo()
+            pagina_label.configure(text=f"Linhas {inicio + 1}-{fim} de {provedor.total} (página {provedor.pagina_atual + 1} de {provedor.total_paginas})")
+            anterior_button.configure(state="normal" if provedor.pagina_atual > 0 else "disabled")
+            proxima_button.configure(state="normal" if provedor.pagina_atual < provedor.total_paginas - 1 else "disabled")
+
+        def ordenar(evento):
+            selecionado = evento.get("selected") if hasattr(evento, "get") else None
+            if not selecionado or selecionado.column is None or not 0 <= selecionado.column < len(cols_existentes):
+                return
+            provedor.ordenar(cols_existentes[selecionado.column])
+            seta = " ▼" if provedor.decrescente else " ▲"
+            sheet.headers([col + (seta if col == provedor.coluna_ordem else "") for col in cols_existentes])
+            sheet.deselect()
+            mostrar_pagina(0)
+
+        anterior_button.configure(command=lambda: mostrar_pagina(provedor.pagina_atual - 1))
+        proxima_button.configure(command=lambda: mostrar_pagina(provedor.pagina_atual + 1))
+        sheet.extra_bindings("column_select", ordenar)
+        mostrar_pagina(0)
@@ -0,0 +1,114 @@
+import tkinter as tk
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from PIL import Image, ImageTk
+
+class RegistroGraficos:
+    # Um slot por gráfico do dashboard, com uma única Figure e um único canvas. Enquanto o frame do slot
+    # existir, redesenhar reaproveita os dois (fig.clear() + draw_idle); quando o frame é trocado, a figura
+    # antiga é fechada e o widget destruído explicitamente, para a memória não crescer ao longo do dia.
+
+    def __init__(self):
+        self._slots = {}
+        self._imagens = {}
+
+    def _slot_vivo(self, slot_id, frame):
+        slot = self._slots.get(slot_id)
+        if slot is None or slot["frame"] is not frame:
+            return None
+        if not slot["canvas"].get_tk_widget().winfo_exists():
+            return None
+        return slot
+
+    def figura_atual(self, slot_id, frame):
+        # Figura já exibida no slot, para atualizar artistas no lugar (alturas de barras, rótulos...).
+        slot = self._slot_vivo(slot_id, frame)
+        return slot["figura"] if slot is not None else None
+
+    def figura(self, slot_id, frame, figsize):
+        slot = self._slot_vivo(slot_id, frame)
+        if slot is not None:
+            widget_canvas = slot["canvas"].get_tk_widget()
+            for widget in frame.winfo_children():
+                if widget is not widget_canvas:
+                    widget.destroy()
+            slot["figura"].clear()
+            return slot["figura"]
+
+        self._podar()
+        self.liberar(slot_id)
+        self._imagens.pop(slot_id, None)
+        for widget in frame.winfo_children():
+            widget.destroy()
+        fig = Figure(figsize=figsize, dpi=100)
+        canvas = FigureCanvasTkAgg(fig, master=frame)
+        canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
+        self._slots[slot_id] = {"figura": fig, "canvas": canvas, "frame": frame}
+        return fig
+
+    def desenhar(self, slot_id):
+        slot = self._slots.get(slot_id)
+        if slot is not None:
+            slot["canvas"].draw_idle()
+
+    def mostrar_imagem(self, slot_id, frame, imagem, ao_ativar=None):
+        # Exibe uma imagem já rasterizada no lugar do canvas, sem nenhum trabalho do matplotlib.
+        # Um duplo clique chama 'ao_ativar' para voltar ao gráfico interativo.
+        self.liberar(slot_id)
+        for widget in frame.winfo_children():
+            widget.destroy()
+        foto = ImageTk.PhotoImage(imagem, master=frame)
+        rotulo = tk.Label(frame, image=foto, borderwidth=0, highlightthickness=0)
+        rotulo.image = foto
+        rotulo.pack(side="top", fill="both", expand=True)
+        if ao_ativar is not None:
+            rotulo.configure(cursor="hand2")
+            rotulo.bind("<Double-Button-1>", lambda _evento: ao_ativar())
+        self._imagens[slot_id] = rotulo
+        return rotulo
+
+    def capturar(self, slot_id, tamanho):
+        # Renderiza o slot agora e devolve a imagem, se o widget do canvas, já dimensionado pelo Tk, tiver o
+        # tamanho da chave do cache. A figura é levada ao tamanho do widget antes do desenho: o evento
+        # <Configure> que faria isso só é tratado depois, no laço de eventos.
+        slot = self._slots.get(slot_id)
+        if slot is None:
+            return None
+        canvas = slot["canvas"]
+        widget = canvas.get_tk_widget()
+        widget.update_idletasks()
+        largura, altura = widget.winfo_width(), widget.winfo_height()
+        if (largura, altura) != tuple(tamanho):
+            return None
+        figura = slot["figura"]
+        figura.set_size_inches(largura / figura.dpi, altura / figura.dpi, forward=False)
+        canvas.draw()
+        if tuple(canvas.get_width_height(physical=True)) != tuple(tamanho):
+            return None
+        return Image.frombuffer("RGBA", tuple(tamanho), bytes(canvas.buffer_rgba()), "raw", "RGBA", 0, 1).convert("RGB")
+
+    def liberar(self, slot_id):
+        slot = self._slots.pop(slot_id, None)
+        if slot is None:
+            return
+        slot["figura"].clear()
+        plt.close(slot["figura"])
+        widget = slot["canvas"].get_tk_widget()
+        if widget.winfo_exists():
+            widget.destroy()
+
+    def _podar(self):
+        # Slots cujo frame foi destruído junto com a aba não voltam a ser usados: libera as figuras.
+        for slot_id, slot in list(self._slots.items()):
+            if not slot["canvas"].get_tk_widget().winfo_exists():
+                self.liberar(slot_id)
+
+    def liberar_todos(self):
+        for slot_id in list(self._slots):
+            self.liberar(slot_id)
+        self._imagens.clear()
+
+    def __len__(self):
+        return len(self._slots)
@@ -0,0 +1,84 @@
+import customtkinter
+
+ALTURA_LINHA = 24
+LINHAS_POR_ROLAGEM = 3
+
+class ListaVirtual(customtkinter.CTkFrame):
+    # Lista rolável que só cria rótulos para as linhas que cabem na área visível. Ao rolar, os mesmos
+    # rótulos são reaproveitados e só o texto muda, pedido a 'texto_linha(indice)': o custo não depende
+    # de quantas linhas a lista tem.
+
+    def __init__(self, master, font=None, font_titulo=None, altura_linha=ALTURA_LINHA, **kwargs):
+        super().__init__(master, **kwargs)
+        self.font = font
+        self.font_titulo = font_titulo
+        self.altura_linha = altura_linha
+        self.total = 0
+        self.primeira = 0
+        self._texto_linha = None
+        self._rotulos = []
+
+        self.titulo_label = customtkinter.CTkLabel(self, text="", font=font_titulo, anchor="w")
+        self.titulo_label.pack(fill="x", padx=5)
+        corpo = customtkinter.CTkFrame(self, fg_color="transparent")
+        corpo.pack(fill="both", expand=True)
+        self.scrollbar = customtkinter.CTkScrollbar(corpo, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.area = customtkinter.CTkFrame(corpo, fg_color="transparent")
+        self.area.pack(side="left", fill="both", expand=True)
+        self.area.bind("<Configure>", self._on_configure)
+        self._bind_rolagem(self.area)
+
+    def mostrar(self, titulo, total, texto_linha):
+        self.titulo_label.configure(text=titulo, font=self.font_titulo, anchor="w")
+        self.total = total
+        self._texto_linha = texto_linha
+        self._rolar_para(0)
+
+    def mostrar_mensagem(self, mensagem):
+        self.titulo_label.configure(text=mensagem, font=self.font, anchor="center")
+        self.total = 0
+        self._texto_linha = None
+        self._rolar_para(0)
+
+    def _bind_rolagem(self, widget):
+        widget.bind("<MouseWheel>", self._on_mousewheel)
+        widget.bind("<Button-4>", lambda _evento: self._rolar_para(self.primeira - LINHAS_POR_ROLAGEM))
+        widget.bind("<Button-5>", lambda _evento: self._rolar_para(self.primeira + LINHAS_POR_ROLAGEM))
+
+    def _linhas_visiveis(self):
+        return max(1, self.area.winfo_height() // self.altura_linha)
+
+    def _on_configure(self, _evento=None):
+        # O pool de rótulos acompanha a altura da área; sobra no máximo uma linha parcialmente visível.
+        necessarios = self._linhas_visiveis() + 1
+        while len(self._rotulos) < necessarios:
+            rotulo = customtkinter.CTkLabel(self.area, text="", font=self.font, anchor="w", height=self.altura_linha)
+            rotulo.place(x=5, y=len(self._rotulos) * self.altura_linha, relwidth=1)
+            self._bind_rolagem(rotulo)
+            self._rotulos.append(rotulo)
+        while len(self._rotulos) > necessarios:
+            self._rotulos.pop().destroy()
+        self._rolar_para(self.primeira)
+
+    def _on_mousewheel(self, evento):
+        passos = -int(evento.delta / 120) if abs(evento.delta) >= 120 else (-1 if evento.delta > 0 else 1)
+        self._rolar_para(self.primeira + passos * LINHAS_POR_ROLAGEM)
+
+    def _on_scrollbar(self, acao, quantidade, unidade=None):
+        if acao == "moveto":
+            self._rolar_para(int(round(float(quantidade) * self.total)))
+        elif acao == "scroll":
+            passo = self._linhas_visiveis() if unidade == "pages" else 1
+            self._rolar_para(self.primeira + int(quantidade) * passo)
+
+    def _rolar_para(self, primeira):
+        visiveis = self._linhas_visiveis()
+        self.primeira = max(0, min(int(primeira), self.total - visiveis))
+        for posicao, rotulo in enumerate(self._rotulos):
+            indice = self.primeira + posicao
+            rotulo.configure(text=self._texto_linha(indice) if indice < self.total and self._texto_linha else "")
+        if self.total > 0:
+            self.scrollbar.set(self.primeira / self.total, min(1.0, (self.primeira + visiveis) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,54 @@
+import numpy as np
+from matplotlib.colors import LogNorm
+
+# Acima deste número de pontos os gráficos de dispersão passam para o modo de nível de detalhe (LOD):
+# densidade em grade ou uma amostra reduzida de marcadores. Abaixo dele o desenho continua exato.
+LIMITE_PONTOS_LOD = 50000
+MAX_MARCADORES_LOD = 5000
+BINS_DENSIDADE = 80
+
+def usar_lod(total, limite=LIMITE_PONTOS_LOD):
+    return limite is not None and total > limite
+
+def _formatar_contagem(valor):
+    return f"{int(valor):,}".replace(",", ".")
+
+def densidade_2d(x, y, bins=BINS_DENSIDADE):
+    # Contagem de pontos por célula de uma grade regular, numa única passada vetorizada.
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    validos = np.isfinite(x) & np.isfinite(y)
+    return np.histogram2d(x[validos], y[validos], bins=bins)
+
+def desenhar_densidade(ax, densidade, cmap="plasma"):
+    contagens, bordas_x, bordas_y = densidade
+    # Células vazias ficam transparentes; a escala log mantém visíveis as regiões com poucos pontos.
+    contagens = np.ma.masked_equal(contagens.T, 0)
+    maximo = float(contagens.max()) if contagens.count() else 1.0
+    return ax.pcolormesh(bordas_x, bordas_y, contagens, cmap=cmap, norm=LogNorm(vmin=1, vmax=max(maximo, 1.0)), shading='flat')
+
+def amostra_por_grupo(total, grupos=None, max_pontos=MAX_MARCADORES_LOD, semente=0):
+    # Índices (ordenados) de uma amostra com no máximo ~max_pontos linhas, proporcional ao tamanho de cada grupo
+    # e com pelo menos um ponto por grupo, para nenhuma categoria sumir do gráfico. A semente fixa mantém
+    # a mesma amostra entre redesenhos.
+    if total <= max_pontos:
+        return np.arange(total)
+    rng = np.random.default_rng(semente)
+    if grupos is None:
+        return np.sort(rng.choice(total, max_pontos, replace=False))
+    grupos = np.asarray(grupos)
+    ordem = np.argsort(grupos, kind='stable')
+    _, inicios, tamanhos = np.unique(grupos[ordem], return_index=True, return_counts=True)
+    cotas = np.minimum(tamanhos, np.maximum(1, np.round(tamanhos * max_pontos / total).astype(np.int64)))
+    partes = [ordem[inicio + rng.choice(tamanho, cota, replace=False)] for inicio, tamanho, cota in zip(inicios, tamanhos, cotas)]
+    return np.sort(np.concatenate(partes))
+
+def anotar_lod(ax, total, exibidos=None):
+    if exibidos is None:
+        texto = f"LOD: {_formatar_contagem(total)} pontos representados por densidade"
+    else:
+        texto = f"LOD: {_formatar_contagem(exibidos)} de {_formatar_contagem(total)} pontos (amostra por categoria)"
+    # Eixos 3D só aceitam texto em coordenadas da tela por text2D.
+    escrever = getattr(ax, 'text2D', ax.text)
+    escrever(0.01, 0.99, texto, transform=ax.transAxes, ha='left', va='top', fontsize=7,
+             bbox=dict(boxstyle='round,pad=0.2', facecolor='white', alpha=0.7, linewidth=0))
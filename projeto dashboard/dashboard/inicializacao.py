@@ -0,0 +1,172 @@
+import os
+import platform
+import sys
+import threading
+import time
+
+INICIO_PROCESSO = time.perf_counter()
+
+ARGUMENTO_RELATORIO = '--relatorio-inicio'
+VARIAVEL_RELATORIO = 'DASHBOARD_RELATORIO_INICIO'
+ARQUIVO_RELATORIO = 'relatorio_inicio.txt'
+MAX_MODULOS_RELATORIO = 30
+
+def relatorio_ativado():
+    return ARGUMENTO_RELATORIO in sys.argv or os.environ.get(VARIAVEL_RELATORIO, '') not in ('', '0')
+
+def _diretorio_relatorio():
+    # No executável do PyInstaller, ao lado do .exe (a pasta _MEIPASS é temporária).
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.abspath(os.path.dirname(__file__))
+
+class _CarregadorMedido:
+    # Envolve o loader real de um módulo só para cronometrar exec_module; o resto é delegado.
+
+    def __init__(self, carregador, nome, medidor):
+        self._carregador = carregador
+        self._nome = nome
+        self._medidor = medidor
+
+    def __getattr__(self, atributo):
+        return getattr(self._carregador, atributo)
+
+    def create_module(self, spec):
+        return self._carregador.create_module(spec)
+
+    def exec_module(self, modulo):
+        pilha = self._medidor._pilha()
+        pilha.append(0.0)
+        inicio = time.perf_counter()
+        try:
+            self._carregador.exec_module(modulo)
+        finally:
+            acumulado = time.perf_counter() - inicio
+            filhos = pilha.pop()
+            if pilha:
+                pilha[-1] += acumulado
+            self._medidor._registrar(self._nome, acumulado - filhos, acumulado)
+
+class MedidorImportacoes:
+    # Equivalente ao 'python -X importtime', mas ligado por dentro do app (funciona também no executável
+    # congelado): um finder no início de sys.meta_path cronometra a execução de cada módulo importado.
+    # 'próprio' exclui os submódulos importados durante a execução; 'acumulado' os inclui.
+
+    def __init__(self):
+        self.tempos = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _pilha(self):
+        if not hasattr(self._local, 'pilha'):
+            self._local.pilha = []
+        return self._local.pilha
+
+    def _registrar(self, nome, proprio, acumulado):
+        with self._lock:
+            self.tempos[nome] = (proprio, acumulado, threading.current_thread().name)
+
+    def instalar(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def remover(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, nome, caminho, alvo=None):
+        if getattr(self._local, 'buscando', False):
+            return None
+        self._local.buscando = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(nome, caminho, alvo)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.buscando = False
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _CarregadorMedido(spec.loader, nome, self)
+        return spec
+
+    def por_pacote(self):
+        # Soma dos tempos próprios por pacote de topo (pandas, matplotlib, ...).
+        totais = {}
+        for nome, (proprio, _, _) in self.tempos.items():
+            pacote = nome.split('.')[0]
+            totais[pacote] = totais.get(pacote, 0.0) + proprio
+        return sorted(totais.items(), key=lambda item: item[1], reverse=True)
+
+class RelatorioInicializacao:
+    # Marcos da partida (login visível, módulos carregados, banco pronto, dados carregados), contados desde
+    # o início do processo. Com --relatorio-inicio (ou DASHBOARD_RELATORIO_INICIO=1) inclui os tempos de
+    # importação por módulo e grava tudo em relatorio_inicio.txt, para comparar a partida entre versões.
+
+    def __init__(self, detalhado=None):
+        self.detalhado = relatorio_ativado() if detalhado is None else detalhado
+        self.marcos = []
+        self.finalizado = False
+        self.medidor = MedidorImportacoes() if self.detalhado else None
+        if self.medidor is not None:
+            self.medidor.instalar()
+
+    def marcar(self, etapa):
+        # Só a primeira ocorrência de cada etapa conta (um novo login não é uma nova partida).
+        if any(anterior == etapa for anterior, _ in self.marcos):
+            return
+        decorrido = time.perf_counter() - INICIO_PROCESSO
+        self.marcos.append((etapa, decorrido))
+        print(f"INFO: Inicialização: {etapa} em {decorrido:.2f} s.")
+
+    def linhas(self):
+        linhas = [f"Relatório de inicialização - {time.strftime('%Y-%m-%d %H:%M:%S')} - Python {platform.python_version()}"
+                  f" - {'executável' if getattr(sys, 'frozen', False) else 'script'}"]
+        linhas += [f"  {decorrido:8.3f} s  {etapa}" for etapa, decorrido in self.marcos]
+        if self.medidor is not None and self.medidor.tempos:
+            linhas.append("  Importações por pacote (tempo próprio somado, ms):")
+            linhas += [f"  {total * 1000:10.1f}  {pacote}" for pacote, total in self.medidor.por_pacote()[:MAX_MODULOS_RELATORIO]]
+            linhas.append("  Módulos mais lentos (próprio ms | acumulado ms | thread | módulo):")
+            mais_lentos = sorted(self.medidor.tempos.items(), key=lambda item: item[1][1], reverse=True)[:MAX_MODULOS_RELATORIO]
+            linhas += [f"  {proprio * 1000:10.1f} | {acumulado * 1000:10.1f} | {thread} | {nome}"
+                       for nome, (proprio, acumulado, thread) in mais_lentos]
+        return linhas
+
+    def finalizar(self):
+        # Chamado quando a partida termina (módulos e dados carregados); só a primeira chamada vale.
+        if self.finalizado:
+            return
+        self.finalizado = True
+        if not self.detalhado:
+            return
+        self.medidor.remover()
+        linhas = self.linhas()
+        print("\n".join(f"INFO: {linha}" for linha in linhas))
+        caminho = os.path.join(_diretorio_relatorio(), ARQUIVO_RELATORIO)
+        try:
+            with open(caminho, 'a', encoding='utf-8') as arquivo:
+                arquivo.write("\n".join(linhas) + "\n\n")
+        except OSError as e:
+            print(f"AVISO: Não foi possível gravar o relatório de inicialização em '{caminho}': {e}")
+
+RELATORIO_INICIO = RelatorioInicializacao()
+
+def carregar_modulos_pesados():
+    # Roda numa thread de trabalho enquanto a tela de login está aberta, para que o dashboard não pague
+    # essas importações depois do login. Imports explícitos (e não por nome), para o PyInstaller continuar
+    # encontrando os módulos ao gerar o SlaDash.spec.
+    import numpy
+    import pandas
+    import matplotlib.pyplot
+    from matplotlib.backends import backend_tkagg
+    import seaborn
+    import tksheet
+    import backend
+    import filtros
+    import estatisticas
+    import exportacao
+    import gui.graficos
+    import gui.dashboard_tabs_ui
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+LINHAS_POR_PAGINA = 500
+
+def chave_ordenacao(serie):
+    # Converte a coluna num array numérico com a mesma ordem dos valores (NaN para ausentes), para ordenar
+    # com argsort vetorizado. Categorias são ordenadas uma vez pelo texto e cada linha recebe o posto da sua.
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = np.asarray(serie.cat.categories.astype(str))
+        postos = np.empty(len(categorias), dtype=np.float64)
+        postos[np.argsort(categorias, kind='stable')] = np.arange(len(categorias))
+        codigos = serie.cat.codes.to_numpy()
+        return np.where(codigos >= 0, postos[np.maximum(codigos, 0)], np.nan)
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    codigos, _ = pd.factorize(serie, sort=True)
+    return np.where(codigos >= 0, codigos, np.nan).astype(np.float64)
+
+class ProvedorPaginas:
+    # Entrega as linhas filtradas à tabela uma página por vez: só as linhas da página viram listas Python.
+    # Ordenar por uma coluna calcula um índice de linhas (argsort estável, ausentes no fim) guardado por
+    # (coluna, sentido); as páginas seguintes são fatias desse índice.
+
+    def __init__(self, df, colunas, linhas_por_pagina=LINHAS_POR_PAGINA):
+        self.df = df
+        self.colunas = list(colunas)
+        self._posicoes = [df.columns.get_loc(coluna) for coluna in self.colunas]
+        self.linhas_por_pagina = linhas_por_pagina
+        self.coluna_ordem = None
+        self.decrescente = False
+        self.pagina_atual = 0
+        self._ordem = None
+        self._ordens = {}
+
+    @property
+    def total(self):
+        return len(self.df)
+
+    @property
+    def total_paginas(self):
+        return max(1, -(-self.total // self.linhas_por_pagina))
+
+    def ordenar(self, coluna, decrescente=None):
+        # Sem sentido explícito, clicar de novo na mesma coluna inverte a ordem.
+        if decrescente is None:
+            decrescente = not self.decrescente if coluna == self.coluna_ordem else False
+        chave = (coluna, decrescente)
+        if chave not in self._ordens:
+            valores = chave_ordenacao(self.df[coluna])
+            self._ordens[chave] = np.argsort(-valores if decrescente else valores, kind='stable')
+        self.coluna_ordem, self.decrescente = coluna, decrescente
+        self._ordem = self._ordens[chave]
+        self.pagina_atual = 0
+
+    def intervalo(self, numero=None):
+        numero = self.pagina_atual if numero is None else numero
+        inicio = numero * self.linhas_por_pagina
+        return inicio, min(inicio + self.linhas_por_pagina, self.total)
+
+    def pagina(self, numero=None):
+        self.pagina_atual = max(0, min(self.pagina_atual if numero is None else numero, self.total_paginas - 1))
+        inicio, fim = self.intervalo()
+        linhas = self._ordem[inicio:fim] if self._ordem is not None else np.arange(inicio, fim)
+        return self.df.iloc[linhas, self._posicoes].values.tolist()
@@ -0,0 +1,146 @@
+import os
+import hashlib
+import pickle
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+SNAPSHOT_DIR_NAME = 'cache_snapshot'
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_MAX_BYTES = 256 * 1024 * 1024
+
+ESTATISTICAS_SNAPSHOT = {
+    "hits": 0,
+    "misses": 0,
+    "escritas": 0,
+    "removidos": 0,
+    "erros": 0,
+    "ignorados": 0,
+}
+
+def _extensao_snapshot():
+    return '.arrow' if feather is not None else '.pkl'
+
+def _diretorio_snapshot(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), SNAPSHOT_DIR_NAME)
+
+def _assinatura_arquivo(caminho):
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return (0, 0)
+    if st.st_size == 0:
+        return (0, 0)
+    return (st.st_mtime_ns, st.st_size)
+
+def chave_snapshot(db_path, versao_esquema):
+    # O arquivo -wal entra na chave porque, em modo WAL, as escritas só chegam ao .db no checkpoint.
+    # Um -wal vazio (criado apenas por leitores) não altera a chave.
+    partes = [
+        os.path.abspath(db_path),
+        _assinatura_arquivo(db_path),
+        _assinatura_arquivo(db_path + '-wal'),
+        versao_esquema,
+        SNAPSHOT_FORMAT_VERSION,
+        _extensao_snapshot(),
+    ]
+    return hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()[:20]
+
+def _caminho_snapshot(db_path, chave):
+    return os.path.join(_diretorio_snapshot(db_path), f"vendas_{chave}{_extensao_snapshot()}")
+
+def ler_snapshot(db_path, chave):
+    caminho = _caminho_snapshot(db_path, chave)
+    if not os.path.exists(caminho):
+        ESTATISTICAS_SNAPSHOT["misses"] += 1
+        return None
+    try:
+        if feather is not None:
+            # O memory map só evita a cópia do arquivo para um buffer na leitura; to_pandas() ainda copia
+            # as colunas para arrays do pandas, então o DataFrame ocupa a memória normal.
+            tabela = feather.read_table(caminho, memory_map=True)
+            df = tabela.to_pandas()
+        else:
+            with open(caminho, 'rb') as f:
+                df = pickle.load(f)
+        os.utime(caminho)
+    except Exception as e:
+        print(f"AVISO: Snapshot '{caminho}' ilegível ({type(e).__name__} - {e}). Ele será descartado.")
+        ESTATISTICAS_SNAPSHOT["erros"] += 1
+        ESTATISTICAS_SNAPSHOT["misses"] += 1
+        _remover(caminho)
+        return None
+    ESTATISTICAS_SNAPSHOT["hits"] += 1
+    return df
+
+def salvar_snapshot(db_path, chave, df):
+    diretorio = _diretorio_snapshot(db_path)
+    caminho = _caminho_snapshot(db_path, chave)
+    temporario = caminho + '.tmp'
+    # Sem compressão, o arquivo tem praticamente o tamanho do DataFrame em memória: um snapshot acima do
+    # limite não é gravado, em vez de ser gravado e apagado a cada carga.
+    tamanho_estimado = int(df.memory_usage(deep=True).sum())
+    if tamanho_estimado > SNAPSHOT_MAX_BYTES:
+        ESTATISTICAS_SNAPSHOT["ignorados"] += 1
+        if ESTATISTICAS_SNAPSHOT["ignorados"] == 1:
+            print(f"AVISO: Os dados ocupam cerca de {tamanho_estimado} bytes, acima do limite de {SNAPSHOT_MAX_BYTES} bytes do snapshot. O snapshot não será gravado.")
+        if os.path.isdir(diretorio):
+            _remover_antigos(diretorio, None)
+        return False
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        if feather is not None:
+            feather.write_feather(df.reset_index(drop=True), temporario, compression='uncompressed')
+        else:
+            with open(temporario, 'wb') as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+    except Exception as e:
+        print(f"AVISO: Não foi possível gravar o snapshot '{caminho}': {type(e).__name__} - {e}")
+        ESTATISTICAS_SNAPSHOT["erros"] += 1
+        _remover(temporario)
+        return False
+    ESTATISTICAS_SNAPSHOT["escritas"] += 1
+    _remover_antigos(diretorio, caminho)
+    return True
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+        return True
+    except OSError:
+        return False
+
+def _remover_antigos(diretorio, caminho_atual):
+    # Snapshots com outra chave pertencem a versões antigas de 'vendas' e nunca mais serão lidos.
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if not nome.startswith('vendas_') or not os.path.isfile(caminho) or caminho == caminho_atual:
+            continue
+        if _remover(caminho):
+            ESTATISTICAS_SNAPSHOT["removidos"] += 1
+
+def limpar_snapshots(db_path):
+    diretorio = _diretorio_snapshot(db_path)
+    if not os.path.isdir(diretorio):
+        return 0
+    removidos = 0
+    for nome in os.listdir(diretorio):
+        if nome.startswith('vendas_') and _remover(os.path.join(diretorio, nome)):
+            removidos += 1
+    ESTATISTICAS_SNAPSHOT["removidos"] += removidos
+    return removidos
+
+def estatisticas_snapshot(db_path=None):
+    estatisticas = dict(ESTATISTICAS_SNAPSHOT)
+    total = estatisticas["hits"] + estatisticas["misses"]
+    estatisticas["taxa_acerto"] = estatisticas["hits"] / total if total else 0.0
+    estatisticas["formato"] = 'arrow' if feather is not None else 'pickle'
+    if db_path is not None:
+        diretorio = _diretorio_snapshot(db_path)
+        estatisticas["bytes_em_disco"] = sum(
+            os.path.getsize(os.path.join(diretorio, nome)) for nome in os.listdir(diretorio)
+        ) if os.path.isdir(diretorio) else 0
+    return estatisticas
@@ -0,0 +1,138 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_TAREFAS_SIMULTANEAS = min(4, os.cpu_count() or 1)
+INTERVALO_VERIFICACAO_MS = 50
+ATRASO_DEBOUNCE_MS = 120
+
+class ExecutorTarefas:
+    # Executa I/O e trabalho de pandas/SQLite num pool de threads e entrega os resultados na thread do Tk,
+    # verificando uma fila com after(). Cada tarefa pertence a um canal ("login", "aba:...") e só o
+    # pedido mais recente de cada canal é entregue: ao trocar o filtro de novo, o resultado antigo é descartado.
+
+    def __init__(self, raiz, max_tarefas=MAX_TAREFAS_SIMULTANEAS, ao_mudar_ocupado=None):
+        self.raiz = raiz
+        self.ao_mudar_ocupado = ao_mudar_ocupado
+        self._pool = ThreadPoolExecutor(max_workers=max_tarefas, thread_name_prefix="dashboard")
+        self._fila = queue.Queue()
+        self._geracoes = {}
+        self._futuros = {}
+        self._pendentes = 0
+        self._verificacao_id = None
+        self._lock = threading.Lock()
+
+    def enviar(self, canal, funcao, ao_concluir=None, ao_falhar=None):
+        with self._lock:
+            geracao = self._geracoes.get(canal, 0) + 1
+            self._geracoes[canal] = geracao
+            anterior = self._futuros.get(canal)
+        # Um pedido antigo que ainda não começou nem chega a rodar.
+        if anterior is not None:
+            anterior.cancel()
+        futuro = self._pool.submit(funcao)
+        self._futuros[canal] = futuro
+        self._pendentes += 1
+        futuro.add_done_callback(lambda f: self._fila.put(("resultado", canal, geracao, f, ao_concluir, ao_falhar)))
+        self._atualizar_ocupado()
+        self._agendar_verificacao()
+        return geracao
+
+    def na_thread_principal(self, funcao, *args):
+        # Seguro para chamar de uma thread de trabalho (ex.: progresso de importação).
+        self._fila.put(("chamada", funcao, args))
+
+    def cancelar(self, canal):
+        with self._lock:
+            self._geracoes[canal] = self._geracoes.get(canal, 0) + 1
+            anterior = self._futuros.pop(canal, None)
+        if anterior is not None:
+            anterior.cancel()
+
+    def atual(self, canal, geracao):
+        return self._geracoes.get(canal) == geracao
+
+    @property
+    def ocupado(self):
+        return self._pendentes > 0
+
+    def _agendar_verificacao(self):
+        if self._verificacao_id is None:
+            self._verificacao_id = self.raiz.after(INTERVALO_VERIFICACAO_MS, self._verificar_fila)
+
+    def _atualizar_ocupado(self):
+        if self.ao_mudar_ocupado:
+            self.ao_mudar_ocupado(self.ocupado)
+
+    def _verificar_fila(self):
+        self._verificacao_id = None
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == "chamada":
+                _, funcao, args = item
+                self._executar_callback(funcao, *args)
+                continue
+
+            _, canal, geracao, futuro, ao_concluir, ao_falhar = item
+            self._pendentes -= 1
+            if self._futuros.get(canal) is futuro:
+                del self._futuros[canal]
+            if futuro.cancelled() or not self.atual(canal, geracao):
+                continue
+            erro = futuro.exception()
+            if erro is not None:
+                if ao_falhar:
+                    self._executar_callback(ao_falhar, erro)
+                else:
+                    print(f"ERRO: Tarefa em segundo plano '{canal}' falhou: {type(erro).__name__} - {erro}")
+            elif ao_concluir:
+                self._executar_callback(ao_concluir, futuro.result())
+
+        self._atualizar_ocupado()
+        if self._pendentes > 0 or not self._fila.empty():
+            self._agendar_verificacao()
+
+    def _executar_callback(self, funcao, *args):
+        try:
+            funcao(*args)
+        except Exception as e:
+            print(f"ERRO: Falha ao aplicar o resultado de uma tarefa em segundo plano: {type(e).__name__} - {e}")
+
+    def encerrar(self):
+        if self._verificacao_id is not None:
+            try:
+                self.raiz.after_cancel(self._verificacao_id)
+            except Exception:
+                pass
+            self._verificacao_id = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class Debounce:
+    # Agrupa rajadas de eventos de um controle interativo (ex.: arrastar um slider): só a última chamada
+    # é executada, depois de 'atraso_ms' sem novos eventos.
+
+    def __init__(self, raiz, funcao, atraso_ms=ATRASO_DEBOUNCE_MS):
+        self.raiz = raiz
+        self.funcao = funcao
+        self.atraso_ms = atraso_ms
+        self._agendamento_id = None
+
+    def __call__(self, *args):
+        self.cancelar()
+        self._agendamento_id = self.raiz.after(self.atraso_ms, self._executar, *args)
+
+    def _executar(self, *args):
+        self._agendamento_id = None
+        self.funcao(*args)
+
+    def cancelar(self):
+        if self._agendamento_id is not None:
+            try:
+                self.raiz.after_cancel(self._agendamento_id)
+            except Exception:
+                pass
+            self._agendamento_id = None